@@ -0,0 +1,278 @@
+"""
+Sinh dữ liệu HR giả lập (phòng ban, chức vụ, nhân viên, lương, chấm công, cổ tức) và nạp
+vào database dùng cho benchmark. Dữ liệu sinh theo seed nên mỗi lần chạy giống hệt nhau.
+Hỗ trợ MySQL, SQL Server và SQLite (DB_VENDOR=sqlite hoặc SQLITE_STANDIN=sqlserver,mysql).
+
+CẢNH BÁO: load_dataset() DROP rồi tạo lại các bảng -> chỉ trỏ vào database benchmark
+riêng (MYSQL_DB_NAME / SQL_SERVER_CONN_STRING của môi trường benchmark).
+
+Chạy riêng để nạp dữ liệu (từ thư mục gốc repo):
+    PYTHONPATH=src python benchmarks/hr_dataset.py --employees 5000 --months 24
+"""
+import argparse
+import datetime
+import random
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Tuple
+
+from config.db import (
+    get_attendance_db_vendor, get_db_vendor, get_dialect, get_dividend_db_vendor, get_placeholder, get_salary_db_vendor,
+    transaction
+)
+from services.reference_service import departments as department_cache, positions as position_cache
+from services.rollup_service import invalidate_rollups
+from utils.cache import mark_tables_changed
+
+TABLES = ("departments", "positions", "employees", "salaries", "attendance", "dividends")
+
+_FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương"]
+_MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Minh", "Ngọc", "Thanh", "Quang", "Đức", "Thu", "Gia"]
+_GIVEN_NAMES = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Hải", "Hạnh", "Hùng", "Khánh", "Lan", "Long",
+                "Mai", "Nam", "Nga", "Phong", "Quân", "Sơn", "Tâm", "Thảo", "Trang", "Trung", "Tuấn", "Vy"]
+_DEPARTMENT_NAMES = ["Kinh doanh", "Kế toán", "Nhân sự", "Kỹ thuật", "Marketing", "Chăm sóc khách hàng",
+                     "Pháp chế", "Mua hàng", "Kho vận", "Sản xuất", "Nghiên cứu", "Hành chính"]
+# (tên chức vụ, lương cơ bản)
+_POSITIONS = [("Thực tập sinh", 6_000_000), ("Nhân viên", 12_000_000), ("Chuyên viên", 18_000_000),
+              ("Trưởng nhóm", 25_000_000), ("Phó phòng", 32_000_000), ("Trưởng phòng", 42_000_000),
+              ("Giám đốc", 65_000_000)]
+_STATUSES = ["Đang làm việc"] * 18 + ["Nghỉ phép", "Đã nghỉ việc"]
+
+# Bảng benchmark chỉ để đọc: ID ghi tường minh (không IDENTITY) để nạp nhanh, cột đủ cho các service
+_SCHEMA = {
+    "mysql": {
+        "departments": "DepartmentID INT PRIMARY KEY, DepartmentName VARCHAR(100) NOT NULL",
+        "positions": "PositionID INT PRIMARY KEY, PositionName VARCHAR(100) NOT NULL",
+        "employees": (
+            "EmployeeID INT PRIMARY KEY, FullName VARCHAR(100) NOT NULL, DateOfBirth DATE, Gender VARCHAR(10), "
+            "PhoneNumber VARCHAR(20), Email VARCHAR(100), HireDate DATE, DepartmentID INT, PositionID INT, "
+            "Status VARCHAR(50), CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP, "
+            "INDEX IX_employees_department (DepartmentID), INDEX IX_employees_position (PositionID)"
+        ),
+        "salaries": (
+            "SalaryID INT PRIMARY KEY, EmployeeID INT NOT NULL, SalaryMonth DATE NOT NULL, BaseSalary DECIMAL(15,2), "
+            "Bonus DECIMAL(15,2), Deductions DECIMAL(15,2), NetSalary DECIMAL(15,2), "
+            "CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP, INDEX IX_salaries_employee_month (EmployeeID, SalaryMonth)"
+        ),
+        "attendance": (
+            "AttendanceID INT PRIMARY KEY, EmployeeID INT NOT NULL, AttendanceMonth DATE NOT NULL, WorkDays INT, "
+            "AbsentDays INT, LeaveDays INT, CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP, "
+            "INDEX IX_attendance_employee_month (EmployeeID, AttendanceMonth)"
+        ),
+        "dividends": (
+            "DividendID INT PRIMARY KEY, EmployeeID INT NOT NULL, DividendAmount DECIMAL(15,2), DividendDate DATE, "
+            "CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP, INDEX IX_dividends_employee (EmployeeID)"
+        ),
+    },
+    "sqlserver": {
+        "departments": "DepartmentID INT PRIMARY KEY, DepartmentName NVARCHAR(100) NOT NULL",
+        "positions": "PositionID INT PRIMARY KEY, PositionName NVARCHAR(100) NOT NULL",
+        "employees": (
+            "EmployeeID INT PRIMARY KEY, FullName NVARCHAR(100) NOT NULL, DateOfBirth DATE, Gender NVARCHAR(10), "
+            "PhoneNumber VARCHAR(20), Email VARCHAR(100), HireDate DATE, DepartmentID INT, PositionID INT, "
+            "Status NVARCHAR(50), CreatedAt DATETIME DEFAULT GETDATE(), "
+            "INDEX IX_employees_department (DepartmentID), INDEX IX_employees_position (PositionID)"
+        ),
+        "salaries": (
+            "SalaryID INT PRIMARY KEY, EmployeeID INT NOT NULL, SalaryMonth DATE NOT NULL, BaseSalary DECIMAL(15,2), "
+            "Bonus DECIMAL(15,2), Deductions DECIMAL(15,2), NetSalary DECIMAL(15,2), "
+            "CreatedAt DATETIME DEFAULT GETDATE(), INDEX IX_salaries_employee_month (EmployeeID, SalaryMonth)"
+        ),
+        "attendance": (
+            "AttendanceID INT PRIMARY KEY, EmployeeID INT NOT NULL, AttendanceMonth DATE NOT NULL, WorkDays INT, "
+            "AbsentDays INT, LeaveDays INT, CreatedAt DATETIME DEFAULT GETDATE(), "
+            "INDEX IX_attendance_employee_month (EmployeeID, AttendanceMonth)"
+        ),
+        "dividends": (
+            "DividendID INT PRIMARY KEY, EmployeeID INT NOT NULL, DividendAmount DECIMAL(15,2), DividendDate DATE, "
+            "CreatedAt DATETIME DEFAULT GETDATE(), INDEX IX_dividends_employee (EmployeeID)"
+        ),
+    },
+    # SQLite (vendor sqlite hoặc SQLITE_STANDIN): có khoá ngoại để luồng xoá nhân viên tìm được bảng con
+    "sqlite": {
+        "departments": "DepartmentID INTEGER PRIMARY KEY, DepartmentName VARCHAR(100) NOT NULL",
+        "positions": "PositionID INTEGER PRIMARY KEY, PositionName VARCHAR(100) NOT NULL",
+        "employees": (
+            "EmployeeID INTEGER PRIMARY KEY, FullName VARCHAR(100) NOT NULL, DateOfBirth DATE, Gender VARCHAR(10), "
+            "PhoneNumber VARCHAR(20), Email VARCHAR(100), HireDate DATE, "
+            "DepartmentID INTEGER REFERENCES departments(DepartmentID), "
+            "PositionID INTEGER REFERENCES positions(PositionID), "
+            "Status VARCHAR(50), CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP"
+        ),
+        "salaries": (
+            "SalaryID INTEGER PRIMARY KEY, EmployeeID INTEGER NOT NULL REFERENCES employees(EmployeeID), "
+            "SalaryMonth DATE NOT NULL, BaseSalary DECIMAL(15,2), Bonus DECIMAL(15,2), Deductions DECIMAL(15,2), "
+            "NetSalary DECIMAL(15,2), CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP"
+        ),
+        "attendance": (
+            "AttendanceID INTEGER PRIMARY KEY, EmployeeID INTEGER NOT NULL REFERENCES employees(EmployeeID), "
+            "AttendanceMonth DATE NOT NULL, WorkDays INTEGER, AbsentDays INTEGER, LeaveDays INTEGER, "
+            "CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP"
+        ),
+        "dividends": (
+            "DividendID INTEGER PRIMARY KEY, EmployeeID INTEGER NOT NULL REFERENCES employees(EmployeeID), "
+            "DividendAmount DECIMAL(15,2), DividendDate DATE, CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP"
+        ),
+    },
+}
+
+# Index tạo riêng (SQLite không hỗ trợ INDEX khai báo trong CREATE TABLE)
+_SQLITE_INDEXES = (
+    "CREATE INDEX IX_employees_department ON employees (DepartmentID)",
+    "CREATE INDEX IX_employees_position ON employees (PositionID)",
+    "CREATE INDEX IX_salaries_employee_month ON salaries (EmployeeID, SalaryMonth)",
+    # Một bản ghi mỗi nhân viên mỗi tháng, như khoá UNIQUE (EmployeeID, PeriodKey) trong migrations
+    "CREATE UNIQUE INDEX UX_salaries_employee_period ON salaries (EmployeeID, substr(SalaryMonth, 1, 7))",
+    "CREATE INDEX IX_attendance_employee_month ON attendance (EmployeeID, AttendanceMonth)",
+    "CREATE UNIQUE INDEX UX_attendance_employee_period ON attendance (EmployeeID, substr(AttendanceMonth, 1, 7))",
+    "CREATE INDEX IX_dividends_employee ON dividends (EmployeeID)",
+)
+
+# SQL Server giới hạn 2100 tham số mỗi câu lệnh
+_MAX_PARAMS = 2000
+
+
+def _month_starts(months: int, end: datetime.date) -> List[datetime.date]:
+    """months tháng liên tiếp, kết thúc ở tháng chứa end"""
+    year, month = end.year, end.month
+    result = []
+    for _ in range(months):
+        result.append(datetime.date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return list(reversed(result))
+
+
+def generate_dataset(employees: int = 1000, months: int = 12, seed: int = 42,
+                     end_month: datetime.date | None = None) -> Dict[str, Tuple[Sequence[str], List[Tuple[Any, ...]]]]:
+    """
+    Sinh dữ liệu: {tên bảng: (cột, danh sách dòng)}.
+    Mỗi nhân viên có một dòng lương và một dòng chấm công cho mỗi tháng kể từ khi vào làm;
+    khoảng 1/5 nhân viên nhận cổ tức mỗi quý.
+    """
+    rng = random.Random(seed)
+    end_month = end_month or datetime.date.today().replace(day=1)
+    month_list = _month_starts(months, end_month)
+
+    department_count = min(len(_DEPARTMENT_NAMES), max(3, employees // 40))
+    department_rows = [(i + 1, _DEPARTMENT_NAMES[i]) for i in range(department_count)]
+    position_rows = [(i + 1, name) for i, (name, _) in enumerate(_POSITIONS)]
+
+    employee_rows = []
+    base_salaries = {}
+    for employee_id in range(1, employees + 1):
+        full_name = f"{rng.choice(_FAMILY_NAMES)} {rng.choice(_MIDDLE_NAMES)} {rng.choice(_GIVEN_NAMES)}"
+        # Chức vụ thấp nhiều hơn chức vụ cao
+        position_id = min(len(_POSITIONS), 1 + int(rng.expovariate(0.7)))
+        hire_date = month_list[0] - datetime.timedelta(days=rng.randint(0, 5 * 365))
+        if rng.random() < 0.3:
+            hire_date = rng.choice(month_list) + datetime.timedelta(days=rng.randint(0, 27))
+        employee_rows.append((
+            employee_id,
+            full_name,
+            datetime.date(rng.randint(1965, 2003), rng.randint(1, 12), rng.randint(1, 28)),
+            rng.choice(["Nam", "Nữ"]),
+            f"09{rng.randint(0, 99_999_999):08d}",
+            f"nv{employee_id:06d}@company.vn",
+            hire_date,
+            rng.randint(1, department_count),
+            position_id,
+            rng.choice(_STATUSES),
+        ))
+        base = _POSITIONS[position_id - 1][1]
+        base_salaries[employee_id] = (Decimal(base + rng.randint(0, 20) * 250_000), hire_date)
+
+    salary_rows, attendance_rows = [], []
+    for month_start in month_list:
+        for employee_id, (base_salary, hire_date) in base_salaries.items():
+            if hire_date > month_start.replace(day=28):
+                continue
+            bonus = Decimal(rng.choice([0, 0, 500_000, 1_000_000, 2_000_000]))
+            deductions = (base_salary * Decimal("0.105")).quantize(Decimal("1"))
+            salary_rows.append((len(salary_rows) + 1, employee_id, month_start, base_salary, bonus, deductions,
+                                base_salary + bonus - deductions))
+            absent = rng.choice([0, 0, 0, 1, 2])
+            leave = rng.choice([0, 0, 1, 2])
+            attendance_rows.append((len(attendance_rows) + 1, employee_id, month_start, 22 - absent - leave, absent, leave))
+
+    dividend_rows = []
+    for month_start in month_list:
+        if month_start.month % 3 != 0:
+            continue
+        for employee_id in rng.sample(range(1, employees + 1), max(1, employees // 5)):
+            amount = Decimal(rng.randint(4, 200) * 250_000)
+            dividend_rows.append((len(dividend_rows) + 1, employee_id, amount, month_start.replace(day=15)))
+
+    return {
+        "departments": (("DepartmentID", "DepartmentName"), department_rows),
+        "positions": (("PositionID", "PositionName"), position_rows),
+        "employees": (("EmployeeID", "FullName", "DateOfBirth", "Gender", "PhoneNumber", "Email", "HireDate",
+                       "DepartmentID", "PositionID", "Status"), employee_rows),
+        "salaries": (("SalaryID", "EmployeeID", "SalaryMonth", "BaseSalary", "Bonus", "Deductions", "NetSalary"), salary_rows),
+        "attendance": (("AttendanceID", "EmployeeID", "AttendanceMonth", "WorkDays", "AbsentDays", "LeaveDays"), attendance_rows),
+        "dividends": (("DividendID", "EmployeeID", "DividendAmount", "DividendDate"), dividend_rows),
+    }
+
+
+def configured_vendors() -> List[str]:
+    """Các vendor đang cấu hình qua DB_VENDOR / SALARY_DB_VENDOR / ATTENDANCE_DB_VENDOR (cùng vendor của dividends)"""
+    return sorted({get_db_vendor(), get_salary_db_vendor(), get_attendance_db_vendor(), get_dividend_db_vendor()})
+
+
+def load_dataset(dataset: Dict[str, Tuple[Sequence[str], List[Tuple[Any, ...]]]], vendor: str) -> Dict[str, int]:
+    """
+    DROP + CREATE đủ 6 bảng trên vendor rồi nạp dữ liệu bằng INSERT nhiều dòng.
+    Mỗi vendor nhận đủ bộ bảng vì truy vấn lương/chấm công join employees ngay trên DB đó.
+    """
+    dialect = get_dialect(vendor)
+    if dialect not in _SCHEMA:
+        raise ValueError(f"Không có schema benchmark cho vendor {vendor}")
+    placeholder = get_placeholder(vendor)
+    counts = {}
+    with transaction(vendor) as conn:
+        cursor = conn.cursor()
+        # Xoá bảng con trước bảng cha (khoá ngoại trên SQLite)
+        for table in reversed(TABLES):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}", ())
+        for table in TABLES:
+            cursor.execute(f"CREATE TABLE {table} ({_SCHEMA[dialect][table]})", ())
+        if dialect == "sqlite":
+            for statement in _SQLITE_INDEXES:
+                cursor.execute(statement, ())
+        for table in TABLES:
+            columns, rows = dataset[table]
+            row_placeholders = "(" + ", ".join([placeholder] * len(columns)) + ")"
+            batch_size = max(1, _MAX_PARAMS // len(columns))
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row_placeholders] * len(batch)),
+                    tuple(value for row in batch for value in row),
+                )
+            counts[table] = len(rows)
+        cursor.close()
+
+    # Dữ liệu đổi hoàn toàn -> bỏ mọi cache/rollup trong process
+    mark_tables_changed(*TABLES)
+    department_cache.invalidate()
+    position_cache.invalidate()
+    invalidate_rollups()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.employees, args.months, args.seed)
+    for vendor in configured_vendors():
+        start = time.perf_counter()
+        counts = load_dataset(dataset, vendor)
+        summary = ", ".join(f"{table}={count}" for table, count in counts.items())
+        print(f"{vendor}: {summary} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+So sánh tốc độ serialize response JSON: provider mặc định của Flask và FastJSONProvider.
+
+Chạy từ thư mục gốc repo:
+    PYTHONPATH=src python benchmarks/json_serialization.py --rows 20000 --repeat 5
+Payload giả lập danh sách lương/chấm công (Decimal, date, datetime) bọc trong wrap_success.
+"""
+import argparse
+import datetime
+import statistics
+import time
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils.json_provider import FastJSONProvider, orjson
+from utils.response import wrap_success
+
+
+def build_rows(count: int):
+    base = datetime.datetime(2025, 1, 1, 8, 30)
+    return [
+        {
+            "SalaryID": i,
+            "EmployeeID": i % 5000,
+            "SalaryMonth": datetime.date(2025, i % 12 + 1, 1),
+            "BasicSalary": Decimal("15000000.00") + i,
+            "Bonus": Decimal("1250000.50"),
+            "Deduction": Decimal("320000.00"),
+            "TotalSalary": Decimal("15930000.50") + i,
+            "CreatedAt": base + datetime.timedelta(minutes=i),
+            "EmployeeName": f"Nguyễn Văn {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(app: Flask, payload, repeat: int):
+    timings = []
+    size = 0
+    with app.app_context():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = app.json.response(payload)
+            size = len(response.get_data())
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = wrap_success(build_rows(args.rows))
+    results = {}
+    for name, provider in (("flask-default", DefaultJSONProvider), ("fast", FastJSONProvider)):
+        app = Flask(__name__)
+        app.json = provider(app)
+        results[name] = measure(app, payload, args.repeat)
+
+    print(f"rows={args.rows} repeat={args.repeat} orjson={'yes' if orjson is not None else 'no (stdlib fallback)'}")
+    baseline = results["flask-default"][0]
+    for name, (median_ms, size) in results.items():
+        print(f"{name:>14}: {median_ms:9.1f} ms  {size / 1024:9.1f} KiB  x{baseline / median_ms:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark các service và route đọc dữ liệu trên bộ dữ liệu HR giả lập (xem hr_dataset.py).
+Mỗi case đo latency (p50/p90/p95/p99), throughput và số query mỗi lần gọi; kết quả ghi ra
+JSON để so sánh giữa các lần chạy.
+
+Chạy từ thư mục gốc repo, trỏ vào database benchmark riêng (DB_VENDOR, SALARY_DB_VENDOR,
+ATTENDANCE_DB_VENDOR và thông tin kết nối như khi chạy app):
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --load --employees 5000 --months 24
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --repeat 50 --concurrency 4 \\
+        --compare benchmarks/results/bench-20250101-120000.json
+Không có SQL Server/MySQL: chạy mọi vendor trên SQLite (file để đo song song):
+    SQLITE_STANDIN=sqlserver,mysql SQLITE_SQLSERVER_DB_PATH=/tmp/hr_sqlserver.db \\
+        SQLITE_MYSQL_DB_PATH=/tmp/hr_mysql.db PYTHONPATH=src python benchmarks/run_benchmarks.py --load
+Mặc định mỗi lần gọi chạy "lạnh": cache/rollup bị xoá trước khi gọi (--warm để giữ cache).
+--load DROP và tạo lại các bảng trên các vendor đang cấu hình.
+"""
+import os
+
+# Bật đếm query theo request trước khi import app (header X-Query-Count cho case HTTP)
+os.environ.setdefault("QUERY_AUDIT", "1")
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import app
+from config.query_stats import get_request_query_totals
+from services.attendance_service import get_attendances
+from services.dashboard_service import get_dashboard_trends
+from services.employee_service import get_all_employees
+from services.reference_service import departments, positions
+from services.report_service import get_financial_report
+from services.rollup_service import invalidate_rollups
+from services.salarie_service import get_salaries
+from services.search_service import search_all
+from utils.cache import mark_tables_changed
+
+from hr_dataset import TABLES, configured_vendors, generate_dataset, load_dataset
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def service_cases(year: int, keyword: str) -> Dict[str, Callable[[], Any]]:
+    return {
+        "service.employees.page": lambda: get_all_employees(page=1, size=50),
+        "service.employees.keyword": lambda: get_all_employees(keyword=keyword, page=1, size=50),
+        "service.salaries.year": lambda: get_salaries(year=year),
+        "service.attendance.year": lambda: get_attendances(year=year),
+        "service.dashboard.trends": lambda: get_dashboard_trends(6),
+        "service.reports.financial": lambda: get_financial_report(str(year)),
+        "service.search.all": lambda: search_all(keyword),
+    }
+
+
+def http_cases(year: int, keyword: str) -> Dict[str, str]:
+    return {
+        "http.employees.page": "/employees?page=1&size=50",
+        "http.salaries.columnar": f"/salaries?year={year}&format=columnar",
+        "http.dashboard.trends": "/dashboard/trends?months=6",
+        "http.dashboard.bundle": f"/dashboard/bundle?role=ADMIN&year={year}",
+        "http.reports.financial": f"/reports/financial?year={year}",
+        "http.search": f"/search?keyword={keyword}",
+    }
+
+
+def reset_caches() -> None:
+    """Đưa về trạng thái lạnh: cache TTL, cache tham chiếu và rollup đều nạp lại"""
+    mark_tables_changed(*TABLES)
+    departments.invalidate()
+    positions.invalidate()
+    invalidate_rollups()
+
+
+def _call_service(func: Callable[[], Any]) -> Tuple[float, int]:
+    # Mỗi lần gọi một request context riêng -> số query đếm riêng theo lần gọi
+    with app.test_request_context():
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        query_count, _ = get_request_query_totals()
+    return elapsed, query_count
+
+
+def _call_http(client, path: str) -> Tuple[float, int]:
+    start = time.perf_counter()
+    response = client.get(path, headers={"Accept": "application/json"})
+    response.get_data()
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return elapsed, int(response.headers.get("X-Query-Count", 0))
+
+
+def summarize(timings: List[float], query_counts: List[int], wall_seconds: float) -> Dict[str, Any]:
+    ms = sorted(t * 1000 for t in timings)
+    if len(ms) >= 2:
+        cuts = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p90, p95, p99 = cuts[49], cuts[89], cuts[94], cuts[98]
+    else:
+        p50 = p90 = p95 = p99 = ms[0]
+    return {
+        "calls": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(p50, 3),
+        "p90_ms": round(p90, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(ms[-1], 3),
+        "throughput_per_s": round(len(ms) / wall_seconds, 2) if wall_seconds else None,
+        "queries_per_call": round(statistics.fmean(query_counts), 2),
+        "max_queries": max(query_counts),
+    }
+
+
+def run_case(call: Callable[[], Tuple[float, int]], repeat: int, warmup: int, concurrency: int, warm: bool) -> Dict[str, Any]:
+    for _ in range(warmup):
+        call()
+
+    def one() -> Tuple[float, int]:
+        if not warm:
+            reset_caches()
+        return call()
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(lambda _: one(), range(repeat)))
+    else:
+        samples = [one() for _ in range(repeat)]
+    wall = time.perf_counter() - start
+    return summarize([s[0] for s in samples], [s[1] for s in samples], wall)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\nSo với {baseline_path}:")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or "p50_ms" not in previous or "p50_ms" not in current:
+            continue
+        deltas = []
+        for field in ("p50_ms", "p95_ms", "queries_per_call"):
+            before, after = previous[field], current[field]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            deltas.append(f"{field} {before} -> {after} ({change})")
+        print(f"  {name:<28} " + "; ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--load", action="store_true", help="sinh và nạp lại dữ liệu trước khi đo")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="giữ cache giữa các lần gọi")
+    parser.add_argument("--only", help="chỉ chạy case có tên chứa chuỗi này")
+    parser.add_argument("--keyword", default="Nguyễn")
+    parser.add_argument("--output", help="file JSON kết quả (mặc định benchmarks/results/bench-<thời gian>.json)")
+    parser.add_argument("--compare", help="file JSON của lần chạy trước để so sánh")
+    args = parser.parse_args()
+
+    vendors = configured_vendors()
+    load_seconds = None
+    if args.load:
+        dataset = generate_dataset(args.employees, args.months, args.seed)
+        start = time.perf_counter()
+        for vendor in vendors:
+            load_dataset(dataset, vendor)
+        load_seconds = round(time.perf_counter() - start, 2)
+
+    year = datetime.date.today().year
+    cases: Dict[str, Callable[[], Tuple[float, int]]] = {}
+    for name, func in service_cases(year, args.keyword).items():
+        cases[name] = lambda func=func: _call_service(func)
+    client = app.test_client()
+    for name, path in http_cases(year, args.keyword).items():
+        cases[name] = lambda path=path: _call_http(client, path)
+    if args.only:
+        cases = {name: call for name, call in cases.items() if args.only in name}
+
+    results: Dict[str, Any] = {}
+    for name, call in cases.items():
+        try:
+            results[name] = run_case(call, args.repeat, args.warmup, args.concurrency, args.warm)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        stats = results[name]
+        if "error" in stats:
+            print(f"{name:<28} ERROR {stats['error']}")
+        else:
+            print(f"{name:<28} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+                  f"{stats['throughput_per_s']:8.1f}/s  queries {stats['queries_per_call']:.1f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "vendors": vendors,
+            "dataset": {"employees": args.employees, "months": args.months, "seed": args.seed,
+                        "loaded": args.load, "load_seconds": load_seconds},
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "warm_cache": args.warm,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nĐã ghi {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 # src/app.py
-from flask import Flask, jsonify, g, request, render_template, url_for, send_from_directory
+from flask import Flask, Response, jsonify, g, request, render_template, url_for, send_from_directory
 import uuid
 import os
 from dotenv import load_dotenv
@@ -22,7 +22,15 @@ from routes.search import search_bp
 from routes.reports import reports_bp
 
 from utils.response import wrap_success, wrap_error
-from clients.java_client import JavaClient
+from utils.json_provider import configure_json
+from utils.etag import init_etags
+from utils.compression import init_compression, get_compression_stats
+from utils.metrics import init_metrics, render_metrics, METRICS_CONTENT_TYPE
+from utils.query_audit import init_query_audit
+from clients.java_client import JavaClient, get_java_client_stats
+from config.db_pool import get_pool_stats
+from config.query_stats import get_query_stats
+from services.reference_service import warm_reference_cache
 
 
 def create_app():
@@ -38,6 +46,7 @@ def create_app():
     app.config['SECRET_KEY'] = 'mot_chuoi_bi_mat_rat_dai_va_kho'
     app.config['JAVA_BASE_URL'] = os.getenv('JAVA_BASE_URL', 'http://localhost:8080')
     app.config['SQL_SERVER_CONN_STRING'] = os.getenv("SQL_SERVER_CONN_STRING")  # nếu dùng SQL Server
+    configure_json(app)  # JSON_PROVIDER=default để quay về encoder mặc định của Flask
 
     # 2. Đăng ký Blueprint (API routes) trước
     app.register_blueprint(employees_bp) 
@@ -50,6 +59,9 @@ def create_app():
     app.register_blueprint(search_bp)
     app.register_blueprint(reports_bp)
 
+    # Nạp sẵn departments/positions vào bộ nhớ (lỗi DB chỉ log, lần đọc đầu sẽ nạp lại)
+    warm_reference_cache()
+
     # 3. Đăng ký route HTML sau (để ưu tiên render HTML khi truy cập từ browser)
     # Trong Flask, route được match theo thứ tự LIFO (Last In First Out)
     @app.route('/login')
@@ -146,7 +158,19 @@ def create_app():
         incoming = request.headers.get('X-Request-Id')
         g.trace_id = incoming if incoming else str(uuid.uuid4())
 
-    # Endpoint test gọi sang Java
+    # Đo latency/in-flight/số query theo route; đăng ký trước ETag để request trả 304 vẫn được đếm
+    init_metrics(app)
+
+    # QUERY_AUDIT=1 (dev/staging): header X-Query-Count và cảnh báo query lặp (N+1) theo trace_id
+    init_query_audit(app)
+
+    # Nén gzip/brotli response lớn; đăng ký trước ETag để ETag được gắn trước khi nén
+    init_compression(app)
+
+    # ETag theo version bảng cho các GET đọc dữ liệu, If-None-Match khớp -> 304 (không chạy query)
+    init_etags(app)
+
+    # Endpoint test gọi sang Java (JavaClient dùng session keep-alive chung của process)
     @app.get('/java/health')
     def java_health():
         client = JavaClient(base_url=app.config['JAVA_BASE_URL'], trace_id=g.trace_id)
@@ -173,6 +197,36 @@ def create_app():
             )
         ), status_code or 500
 
+    # Thống kê gọi sang Java (số request, lỗi, độ trễ, trạng thái circuit breaker)
+    @app.get('/java/client-stats')
+    def java_client_stats():
+        return jsonify(wrap_success(get_java_client_stats(), trace_id=g.trace_id)), 200
+
+    # Thống kê connection pool theo vendor (in_use, idle, wait time) để sizing pool
+    @app.get('/db/pool-stats')
+    def db_pool_stats():
+        return jsonify(wrap_success(get_pool_stats(), trace_id=g.trace_id)), 200
+
+    # Thống kê query theo fingerprint (số lần, thời gian, số dòng, histogram) để tìm câu SQL tốn nhất
+    # ?order_by=total_ms|count|max_ms|avg_ms|rows|errors, ?limit=50
+    @app.get('/db/query-stats')
+    def db_query_stats():
+        order_by = request.args.get('order_by', 'total_ms')
+        if order_by not in ('total_ms', 'count', 'max_ms', 'avg_ms', 'rows', 'errors'):
+            order_by = 'total_ms'
+        limit = request.args.get('limit', default=50, type=int)
+        return jsonify(wrap_success(get_query_stats(order_by=order_by, limit=limit), trace_id=g.trace_id)), 200
+
+    # Số liệu cho Prometheus scrape (request, pool DB, query, cache, JavaClient)
+    @app.get('/metrics')
+    def metrics():
+        return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
+
+    # Thống kê nén response (bytes vào/ra, tỉ lệ, CPU ms) để chỉnh COMPRESS_* theo ngân sách CPU
+    @app.get('/http/compression-stats')
+    def compression_stats():
+        return jsonify(wrap_success(get_compression_stats(), trace_id=g.trace_id)), 200
+
    
     return app
 
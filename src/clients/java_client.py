@@ -1,5 +1,195 @@
-from typing import Any, Dict, Optional, Tuple
+import os
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# ------------------- HTTP session dùng chung sang app Java -------------------
+# Một requests.Session cho cả process: giữ kết nối keep-alive trong pool của urllib3
+# nên mỗi lần gọi không phải mở lại TCP. GET được retry với backoff khi lỗi kết nối
+# hoặc 502/503/504. Circuit breaker ngắt gọi sang Java sau nhiều lỗi liên tiếp.
+#   JAVA_HTTP_POOL_SIZE        - số kết nối giữ lại mỗi host (mặc định 10)
+#   JAVA_HTTP_RETRIES          - số lần retry cho GET (mặc định 2)
+#   JAVA_HTTP_BACKOFF          - hệ số backoff giây (mặc định 0.2 -> 0.2s, 0.4s...)
+#   JAVA_CB_FAILURE_THRESHOLD  - số lỗi liên tiếp để mở circuit (mặc định 5)
+#   JAVA_CB_RESET_TIMEOUT      - giây chờ trước khi cho một request thử lại (mặc định 30)
+
+RETRY_STATUSES = (502, 503, 504)
+
+# Cận trên (ms) các bucket histogram độ trễ gọi sang Java; bucket cuối là "> 5000"
+LATENCY_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _env_number(name: str, default: float) -> float:
+	try:
+		return float(os.environ.get(name, default))
+	except ValueError:
+		logger.warning(f"Giá trị {name} không hợp lệ, dùng mặc định {default}")
+		return default
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+	pool_size = max(1, int(_env_number("JAVA_HTTP_POOL_SIZE", 10)))
+	retry = Retry(
+		total=max(0, int(_env_number("JAVA_HTTP_RETRIES", 2))),
+		backoff_factor=_env_number("JAVA_HTTP_BACKOFF", 0.2),
+		status_forcelist=RETRY_STATUSES,
+		allowed_methods=frozenset({"GET", "HEAD"}),
+		raise_on_status=False,
+	)
+	adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+	session = requests.Session()
+	session.mount("http://", adapter)
+	session.mount("https://", adapter)
+	session.headers["Connection"] = "keep-alive"
+	return session
+
+
+def get_session() -> requests.Session:
+	"""Session dùng chung cho cả process (tạo lần đầu khi cần)"""
+	global _session
+	if _session is None:
+		with _session_lock:
+			if _session is None:
+				_session = _build_session()
+	return _session
+
+
+def close_session() -> None:
+	global _session
+	with _session_lock:
+		if _session is not None:
+			_session.close()
+			_session = None
+
+
+class CircuitBreaker:
+	"""
+	closed -> open sau failure_threshold lỗi liên tiếp; sau reset_timeout giây chuyển
+	half_open và cho đúng một request thử: thành công thì đóng lại, lỗi thì mở tiếp.
+	"""
+
+	def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.state = "closed"
+		self._failures = 0
+		self._opened_at = 0.0
+		self._probing = False
+		self._lock = threading.Lock()
+
+	def allow(self) -> bool:
+		with self._lock:
+			if self.state == "closed":
+				return True
+			if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+				self.state = "half_open"
+				self._probing = False
+			if self.state == "half_open" and not self._probing:
+				self._probing = True
+				return True
+			return False
+
+	def record_success(self) -> None:
+		with self._lock:
+			self.state = "closed"
+			self._failures = 0
+			self._probing = False
+
+	def record_failure(self) -> None:
+		with self._lock:
+			self._failures += 1
+			if self.state == "half_open" or self._failures >= self.failure_threshold:
+				if self.state != "open":
+					logger.warning(f"Java circuit opened after {self._failures} consecutive failures")
+				self.state = "open"
+				self._opened_at = time.monotonic()
+				self._probing = False
+
+	def snapshot(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"state": self.state,
+				"consecutive_failures": self._failures,
+				"failure_threshold": self.failure_threshold,
+				"reset_timeout": self.reset_timeout,
+			}
+
+
+_breaker = CircuitBreaker(
+	failure_threshold=max(1, int(_env_number("JAVA_CB_FAILURE_THRESHOLD", 5))),
+	reset_timeout=_env_number("JAVA_CB_RESET_TIMEOUT", 30),
+)
+
+
+class _ClientStats:
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self.requests = 0
+		self.errors = 0
+		self.short_circuited = 0
+		self.total_ms = 0.0
+		self.max_ms = 0.0
+		self.by_status: Dict[int, int] = {}
+		self.latency_buckets = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+
+	def record(self, status: int, elapsed_ms: float, failed: bool) -> None:
+		with self._lock:
+			self.requests += 1
+			self.errors += 1 if failed else 0
+			self.total_ms += elapsed_ms
+			self.max_ms = max(self.max_ms, elapsed_ms)
+			self.by_status[status] = self.by_status.get(status, 0) + 1
+			self.latency_buckets[bisect.bisect_left(LATENCY_BOUNDS_MS, elapsed_ms)] += 1
+
+	def record_short_circuit(self) -> None:
+		with self._lock:
+			self.short_circuited += 1
+
+	def snapshot(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"requests": self.requests,
+				"errors": self.errors,
+				"short_circuited": self.short_circuited,
+				"avg_ms": round(self.total_ms / self.requests, 2) if self.requests else None,
+				"max_ms": round(self.max_ms, 2),
+				"by_status": dict(self.by_status),
+			}
+
+	def histogram(self) -> Tuple[List[int], int, float]:
+		with self._lock:
+			return list(self.latency_buckets), self.requests, self.total_ms
+
+
+_stats = _ClientStats()
+
+
+def get_java_latency_histogram() -> Tuple[Tuple[int, ...], List[int], int, float]:
+	"""(bounds_ms, số lần theo bucket, tổng số lần, tổng ms) cho /metrics"""
+	buckets, count, total_ms = _stats.histogram()
+	return LATENCY_BOUNDS_MS, buckets, count, total_ms
+
+
+def get_java_client_stats() -> Dict[str, Any]:
+	"""Số request, lỗi, độ trễ và trạng thái circuit breaker của các lần gọi sang Java"""
+	return {
+		"pool_size": max(1, int(_env_number("JAVA_HTTP_POOL_SIZE", 10))),
+		"retries": max(0, int(_env_number("JAVA_HTTP_RETRIES", 2))),
+		"circuit": _breaker.snapshot(),
+		**_stats.snapshot(),
+	}
 
 
 class JavaClient:
@@ -18,8 +208,13 @@ class JavaClient:
 
 	def get(self, path: str) -> Tuple[bool, int, Any]:
 		url = f"{self.base_url}{path}"
+		if not _breaker.allow():
+			_stats.record_short_circuit()
+			return False, 503, {"exception": "Java service unavailable (circuit open)"}
+
+		start = time.perf_counter()
 		try:
-			resp = requests.get(url, headers=self._headers(), timeout=self.timeout)
+			resp = get_session().get(url, headers=self._headers(), timeout=self.timeout)
 			status = resp.status_code
 			# Try parse json; if fails keep text
 			try:
@@ -27,9 +222,22 @@ class JavaClient:
 			except Exception:
 				body = {"raw": resp.text}
 			ok = 200 <= status < 300
-			return ok, status, body
 		except requests.RequestException as ex:
+			_stats.record(500, (time.perf_counter() - start) * 1000, failed=True)
+			_breaker.record_failure()
 			return False, 500, {"exception": str(ex)}
+		except Exception:
+			# Lỗi ngoài requests vẫn phải kết thúc lượt thử half_open, nếu không circuit
+			# giữ _probing = True và chặn mọi request về sau
+			_stats.record(500, (time.perf_counter() - start) * 1000, failed=True)
+			_breaker.record_failure()
+			raise
 
-
-
+		# 4xx là lỗi nghiệp vụ phía client, không tính vào circuit breaker
+		failed = status >= 500
+		_stats.record(status, (time.perf_counter() - start) * 1000, failed=failed)
+		if failed:
+			_breaker.record_failure()
+		else:
+			_breaker.record_success()
+		return ok, status, body
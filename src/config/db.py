@@ -0,0 +1,350 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+
+from config.db_pool import acquire_connection, pooled_connection, set_cursor_wrapper
+from config.query_stats import record_query
+from config.sqlite_connection import uses_sqlite
+
+logger = logging.getLogger(__name__)
+
+# ------------------- Vendor routing -------------------
+
+# Vendor: "sqlserver", "mysql" hoặc "sqlite" (xem config/sqlite_connection.py; SQLITE_STANDIN
+# cho phép chạy cả vendor sqlserver/mysql trên SQLite mà không cần server thật)
+
+def get_db_vendor() -> str:
+    """Vendor của database chính (employees, departments, positions)"""
+    return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
+
+def get_dividend_db_vendor() -> str:
+    """Vendor cho dividends: chỉ nằm trên SQL Server, không theo DB_VENDOR"""
+    return "sqlserver"
+
+def get_salary_db_vendor() -> str:
+    """Vendor cho database salary"""
+    return os.environ.get("SALARY_DB_VENDOR", "mysql").strip().lower()
+
+def get_attendance_db_vendor() -> str:
+    """Vendor cho database attendance"""
+    return os.environ.get("ATTENDANCE_DB_VENDOR", "mysql").strip().lower()
+
+def get_dialect(vendor: str) -> str:
+    """Dialect thật của kết nối: "sqlite" khi vendor chạy trên SQLite (kể cả vendor đóng thế)"""
+    return "sqlite" if uses_sqlite(vendor) else vendor
+
+def get_placeholder(vendor: str) -> str:
+    """Ký tự placeholder cho tham số theo vendor"""
+    return "?" if vendor in ("sqlserver", "sqlite") else "%s"
+
+def month_key_expr(vendor: str, column: str) -> str:
+    """
+    Biểu thức SQL trả về khóa tháng 'YYYY-MM' của một cột
+    (cột có thể là DATE hoặc STRING dạng YYYY-MM / YYYY-MM-DD)
+    """
+    if vendor == "sqlserver":
+        return f"LEFT(CONVERT(VARCHAR(10), {column}, 120), 7)"
+    if vendor == "sqlite":
+        return f"substr({column}, 1, 7)"
+    return f"LEFT({column}, 7)"
+
+def limit_clause(vendor: str, limit: int) -> Tuple[str, str]:
+    """Trả về (tiền tố sau SELECT, hậu tố cuối query) để giới hạn số dòng"""
+    if vendor == "sqlserver":
+        return f"TOP {int(limit)}", ""
+    return "", f"LIMIT {int(limit)}"
+
+# ------------------- Khóa kỳ YYYYMM -------------------
+# Các bảng đã chạy migrations/period_key_<vendor>.sql có cột PeriodKey (INT YYYYMM,
+# tính tự động từ cột tháng) cùng index ghép, nên lọc theo năm/tháng thành index range scan.
+# Bảng chưa migrate vẫn chạy được: biểu thức được tính từ cột tháng như trước.
+
+_period_key_columns: Dict[Tuple[str, str], bool] = {}
+# Kiểm tra lỗi (DB đang có sự cố): coi như chưa migrate đến thời điểm này (time.monotonic())
+# rồi mới kiểm tra lại, tránh thêm một query catalog + một dòng log cho mỗi query theo kỳ
+_period_key_retry_at: Dict[Tuple[str, str], float] = {}
+PERIOD_KEY_RETRY_SECONDS = 30.0
+
+def period_key(value: Any) -> int:
+    """'YYYY-MM', 'YYYY-MM-DD' hoặc date -> số nguyên YYYYMM"""
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value).strip()
+    year, month = int(text[:4]), int(text[5:7])
+    if not 1 <= month <= 12:
+        raise ValueError(f"Tháng không hợp lệ: {value}")
+    return year * 100 + month
+
+def format_period_key(key: Any) -> str:
+    """YYYYMM -> 'YYYY-MM'"""
+    key = int(key)
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+def has_period_key(vendor: str, table: str) -> bool:
+    """Bảng đã có cột PeriodKey chưa (kiểm tra information_schema một lần cho mỗi vendor/bảng)"""
+    cache_key = (vendor, table)
+    if cache_key not in _period_key_columns:
+        if time.monotonic() < _period_key_retry_at.get(cache_key, 0.0):
+            return False
+        placeholder = get_placeholder(vendor)
+        query = f"""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_NAME = {placeholder} AND COLUMN_NAME = 'PeriodKey'
+        """
+        if vendor != "sqlserver":
+            query += " AND TABLE_SCHEMA = DATABASE()"
+        try:
+            _period_key_columns[cache_key] = fetch_scalar_from_db(query, (table,), vendor) > 0
+        except Exception as e:
+            # Không cache lâu dài khi lỗi: kiểm tra lại sau PERIOD_KEY_RETRY_SECONDS
+            _period_key_retry_at[cache_key] = time.monotonic() + PERIOD_KEY_RETRY_SECONDS
+            logger.warning(
+                f"Không kiểm tra được cột PeriodKey của {table} ({vendor}), "
+                f"thử lại sau {PERIOD_KEY_RETRY_SECONDS:.0f}s: {e}"
+            )
+            return False
+    return _period_key_columns[cache_key]
+
+def period_key_expr(vendor: str, table: str, column: str) -> str:
+    """
+    Biểu thức YYYYMM của cột tháng (vd: column="s.SalaryMonth" của bảng salaries).
+    Dùng cột PeriodKey nếu bảng đã migrate, ngược lại tính từ month_key_expr.
+    """
+    if has_period_key(vendor, table):
+        alias = column.rsplit(".", 1)[0] + "." if "." in column else ""
+        return f"{alias}PeriodKey"
+    cast_type = {"sqlserver": "INT", "sqlite": "INTEGER"}.get(vendor, "UNSIGNED")
+    return f"CAST(REPLACE({month_key_expr(vendor, column)}, '-', '') AS {cast_type})"
+
+def period_range(vendor: str, table: str, column: str, first: Any, last: Any) -> Tuple[str, Tuple[int, int]]:
+    """Điều kiện lọc khoảng tháng [first, last] dạng range: (sql, params)"""
+    placeholder = get_placeholder(vendor)
+    expr = period_key_expr(vendor, table, column)
+    return f"{expr} BETWEEN {placeholder} AND {placeholder}", (period_key(first), period_key(last))
+
+# Bảng đã có khoá UNIQUE theo kỳ (migrations/<table>_unique_period_mysql.sql). Chỉ cache kết quả có:
+# chưa migrate thì kiểm tra lại ở lần ghi sau, migrate xong không cần restart
+_unique_period_keys: Set[Tuple[str, str]] = set()
+
+def has_unique_period_key(vendor: str, table: str) -> bool:
+    """
+    MySQL: bảng có khoá UNIQUE chứa PeriodKey chưa. INSERT ... ON DUPLICATE KEY UPDATE không có
+    khoá này sẽ chèn thêm bản ghi trùng thay vì cập nhật.
+    """
+    cache_key = (vendor, table)
+    if cache_key in _unique_period_keys:
+        return True
+    query = f"""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = {get_placeholder(vendor)}
+          AND NON_UNIQUE = 0 AND INDEX_NAME <> 'PRIMARY' AND COLUMN_NAME = 'PeriodKey'
+    """
+    if fetch_scalar_from_db(query, (table,), vendor) > 0:
+        _unique_period_keys.add(cache_key)
+        return True
+    return False
+
+def get_connection(vendor: str):
+    """Mượn kết nối từ pool; conn.close() trả kết nối về pool"""
+    return acquire_connection(vendor)
+
+# ------------------- Thực thi query -------------------
+
+def _log_query(vendor: str, sql_query: str, elapsed_ms: float, rows: int | None = None, error: BaseException | None = None) -> None:
+    """Điểm ghi nhận chung cho mọi query đi qua cursor của pool (xem config/query_stats.py)"""
+    record_query(vendor, sql_query, elapsed_ms, rows, error)
+
+class InstrumentedCursor:
+    """
+    Bọc cursor của driver để mọi execute/executemany (kể cả trong các
+    transaction tự quản lý ở service) đều được đo thời gian tại một chỗ.
+    Với SELECT, thời gian tính cả lúc fetch và số dòng là số dòng đã đọc; query
+    được ghi nhận khi đọc hết, khi execute query tiếp theo hoặc khi đóng cursor.
+    """
+
+    def __init__(self, cursor, vendor: str) -> None:
+        self._cursor = cursor
+        self.vendor = vendor
+        self._pending: List[Any] | None = None  # [sql, elapsed_ms, rows] của SELECT đang đọc
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            _log_query(self.vendor, pending[0], pending[1], pending[2])
+
+    def _run(self, method, sql_query: str, params) -> None:
+        self._finish()
+        start = time.perf_counter()
+        try:
+            method(sql_query, params)
+        except Exception as e:
+            _log_query(self.vendor, sql_query, (time.perf_counter() - start) * 1000, error=e)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self._cursor.description is None:
+            # Câu lệnh ghi: không có kết quả để đọc, rowcount là số dòng bị ảnh hưởng
+            _log_query(self.vendor, sql_query, elapsed_ms, self._cursor.rowcount)
+        else:
+            self._pending = [sql_query, elapsed_ms, 0]
+
+    def execute(self, sql_query: str, params: Sequence[Any] = ()):
+        self._run(self._cursor.execute, sql_query, params)
+        return self
+
+    def executemany(self, sql_query: str, seq_of_params):
+        self._run(self._cursor.executemany, sql_query, seq_of_params)
+        return self
+
+    def _fetched(self, start: float, rows: int, done: bool) -> None:
+        if self._pending is not None:
+            self._pending[1] += (time.perf_counter() - start) * 1000
+            self._pending[2] += rows
+            if done:
+                self._finish()
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows), done=True)
+        return rows
+
+    def fetchmany(self, size: int | None = None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._fetched(start, len(rows), done=not rows)
+        return rows
+
+    def fetchone(self):
+        # Các service chỉ dùng fetchone cho một dòng (scalar, OUTPUT INSERTED) -> ghi nhận luôn
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, 0 if row is None else 1, done=True)
+        return row
+
+    def __iter__(self):
+        start = time.perf_counter()
+        rows = 0
+        for row in self._cursor:
+            rows += 1
+            yield row
+        self._fetched(start, rows, done=True)
+
+    def close(self) -> None:
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+set_cursor_wrapper(InstrumentedCursor)
+
+def rows_to_dicts(cursor) -> List[Dict[str, Any]]:
+    """Chuyển kết quả cursor thành list dict theo tên cột"""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...] = (), vendor: str | None = None) -> List[Dict[str, Any]]:
+    """Lấy danh sách records từ DB"""
+    actual_vendor = vendor or get_db_vendor()
+    try:
+        with pooled_connection(actual_vendor) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, params)
+            return rows_to_dicts(cursor)
+    except Exception as e:
+        logger.error(f"Error in fetch_data_from_db: {e}, Query: {sql_query}, Params: {params}")
+        raise Exception(f"Lỗi DB: {e}") from e
+
+def fetch_columnar_from_db(sql_query: str, params: Tuple[Any, ...] = (), vendor: str | None = None) -> Dict[str, Any]:
+    """
+    Kết quả dạng cột: {"columns": [...], "rows": [[...], ...]} lấy thẳng từ tuple của cursor,
+    không tạo dict cho từng dòng và không lặp lại tên cột trong JSON.
+    """
+    actual_vendor = vendor or get_db_vendor()
+    try:
+        with pooled_connection(actual_vendor) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, params)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+    except Exception as e:
+        logger.error(f"Error in fetch_columnar_from_db: {e}, Query: {sql_query}, Params: {params}")
+        raise Exception(f"Lỗi DB: {e}") from e
+    # pyodbc trả về Row (không serialize được), mysql.connector trả về tuple
+    if rows and not isinstance(rows[0], tuple):
+        rows = [tuple(row) for row in rows]
+    return {"columns": columns, "rows": rows}
+
+def stream_rows(sql_query: str, params: Tuple[Any, ...] = (), vendor: str | None = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Đọc kết quả theo từng lô fetchmany() thay vì fetchall(); bộ nhớ chỉ giữ một lô.
+    Cursor mặc định của pyodbc và mysql.connector (unbuffered) đều lấy dữ liệu dần từ server.
+    Kết nối giữ đến khi đọc hết; nếu dừng giữa chừng (client ngắt) thì kết nối bị bỏ khỏi pool
+    vì vẫn còn kết quả chưa đọc.
+    """
+    actual_vendor = vendor or get_db_vendor()
+    conn = acquire_connection(actual_vendor)
+    finished = False
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_query, params)
+        except Exception as e:
+            logger.error(f"Error in stream_rows: {e}, Query: {sql_query}, Params: {params}")
+            raise Exception(f"Lỗi DB: {e}") from e
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+        finished = True
+        cursor.close()
+    finally:
+        if finished:
+            conn.close()
+        else:
+            conn.discard()
+
+def fetch_scalar_from_db(sql_query: str, params: Tuple[Any, ...] = (), vendor: str | None = None, return_float: bool = False) -> int | float:
+    """Lấy giá trị scalar (cột đầu của dòng đầu); NULL hoặc không có dòng -> 0"""
+    actual_vendor = vendor or get_db_vendor()
+    try:
+        with pooled_connection(actual_vendor) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, params)
+            row = cursor.fetchone()
+    except Exception as e:
+        logger.error(f"Error in fetch_scalar_from_db: {e}, Query: {sql_query}, Params: {params}")
+        raise Exception(f"Lỗi DB: {e}") from e
+    if return_float:
+        return float(row[0]) if row and row[0] is not None else 0.0
+    return int(row[0]) if row and row[0] is not None else 0
+
+def execute_db(sql_query: str, params: Tuple[Any, ...] = (), vendor: str | None = None) -> int:
+    """Thực thi query ghi, commit và trả về rowcount"""
+    actual_vendor = vendor or get_db_vendor()
+    try:
+        # pooled_connection tự rollback khi có lỗi
+        with pooled_connection(actual_vendor) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, params)
+            conn.commit()
+            return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Error in execute_db: {e}, Query: {sql_query}, Params: {params}")
+        raise Exception(f"Lỗi DB: {e}") from e
+
+@contextmanager
+def transaction(vendor: str):
+    """
+    Transaction trên một kết nối từ pool:
+        with transaction("mysql") as conn:
+            ...
+    Tự commit khi thoát bình thường, rollback khi có lỗi.
+    """
+    with pooled_connection(vendor) as conn:
+        conn.autocommit = False
+        yield conn
+        conn.commit()
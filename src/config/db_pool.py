@@ -0,0 +1,399 @@
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(vendor: str, name: str, default: float) -> float:
+    """Đọc cấu hình pool: ưu tiên <VENDOR>_POOL_<NAME>, sau đó DB_POOL_<NAME>"""
+    raw = os.environ.get(f"{vendor.upper()}_POOL_{name}") or os.environ.get(f"DB_POOL_{name}")
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Giá trị pool không hợp lệ {name}={raw!r}, dùng mặc định {default}")
+        return default
+
+
+def _connect(vendor: str):
+    """Mở kết nối vật lý mới theo vendor (import lười để không bắt buộc cài cả hai driver)"""
+    from config.sqlite_connection import uses_sqlite
+    if uses_sqlite(vendor):
+        from config.sqlite_connection import get_sqlite_connection
+        return get_sqlite_connection(vendor)
+    if vendor == "mysql":
+        from config.mysql_connection import get_mysql_connection
+        return get_mysql_connection()
+    from config.sqlserver_connection import get_sqlserver_connection
+    return get_sqlserver_connection()
+
+
+def _ping(vendor: str, raw_conn) -> bool:
+    """Kiểm tra kết nối còn sống trước khi cho mượn"""
+    try:
+        if vendor == "mysql" and hasattr(raw_conn, "is_connected"):
+            return bool(raw_conn.is_connected())
+        cursor = raw_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+_cursor_wrapper: Optional[Callable[[Any, str], Any]] = None
+
+
+def set_cursor_wrapper(wrapper: Optional[Callable[[Any, str], Any]]) -> None:
+    """Đăng ký hàm bọc cursor (vd: đo thời gian query) cho mọi kết nối từ pool"""
+    global _cursor_wrapper
+    _cursor_wrapper = wrapper
+
+
+class PoolTimeoutError(Exception):
+    """Hết thời gian chờ lấy kết nối từ pool"""
+
+
+class _PoolEntry:
+    __slots__ = ("raw", "created_at", "last_used_at", "autocommit", "current_autocommit")
+
+    def __init__(self, raw) -> None:
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used_at = now
+        try:
+            self.autocommit = raw.autocommit
+        except Exception:
+            self.autocommit = None
+        # Giá trị autocommit hiện tại, ghi nhận qua PooledConnection.__setattr__
+        # (đọc raw.autocommit trên mysql.connector là một round trip tới server)
+        self.current_autocommit = self.autocommit
+
+
+class PooledConnection:
+    """
+    Proxy bọc kết nối thật. close() trả kết nối về pool thay vì đóng socket,
+    nên các đoạn code cũ dạng try/finally conn.close() vẫn dùng được.
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry) -> None:
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_entry", entry)
+
+    @property
+    def raw(self):
+        entry = self._entry
+        if entry is None:
+            raise RuntimeError("Kết nối đã được trả về pool")
+        return entry.raw
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.raw, name, value)
+        if name == "autocommit":
+            self._entry.current_autocommit = value
+
+    def cursor(self, *args, **kwargs):
+        raw_cursor = self.raw.cursor(*args, **kwargs)
+        if _cursor_wrapper is not None:
+            return _cursor_wrapper(raw_cursor, self._pool.vendor)
+        return raw_cursor
+
+    def close(self) -> None:
+        entry = self._entry
+        if entry is None:
+            return
+        object.__setattr__(self, "_entry", None)
+        self._pool.release(entry)
+
+    def discard(self) -> None:
+        """Bỏ kết nối khỏi pool (dùng khi kết nối đã hỏng)"""
+        entry = self._entry
+        if entry is None:
+            return
+        object.__setattr__(self, "_entry", None)
+        self._pool.release(entry, discard=True)
+
+
+class ConnectionPool:
+    """
+    Pool kết nối có giới hạn cho một vendor.
+    - min_size: số kết nối rảnh tối thiểu được giữ lại khi dọn idle
+    - max_size: tổng số kết nối tối đa (đang mượn + rảnh)
+    - idle_timeout: kết nối rảnh quá lâu sẽ bị đóng (giây)
+    - max_lifetime: kết nối sống quá lâu sẽ bị thay mới (giây)
+    - acquire_timeout: thời gian chờ tối đa khi pool đã đầy (giây)
+    - ping_after: chỉ ping kết nối đã rảnh lâu hơn ngưỡng này trước khi cho mượn (giây, 0 = luôn ping)
+    """
+
+    def __init__(
+        self,
+        vendor: str,
+        factory: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        acquire_timeout: float = 10.0,
+        ping_after: float = 30.0,
+    ) -> None:
+        self.vendor = vendor
+        self._factory = factory
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size), self.min_size)
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.ping_after = ping_after
+
+        self._idle: List[_PoolEntry] = []
+        self._in_use = 0
+        self._opening = 0
+        self._cond = threading.Condition()
+
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._failed_pings = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    # ------------------- Nội bộ -------------------
+
+    def _expired(self, entry: _PoolEntry, now: float) -> bool:
+        return self.max_lifetime > 0 and now - entry.created_at > self.max_lifetime
+
+    def _close_entry(self, entry: _PoolEntry) -> None:
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._closed += 1
+
+    def _prune_idle_locked(self, now: float) -> List[_PoolEntry]:
+        """Tách các kết nối rảnh quá hạn (giữ lại tối thiểu min_size)"""
+        stale: List[_PoolEntry] = []
+        keep: List[_PoolEntry] = []
+        budget = len(self._idle) - self.min_size
+        # _idle là LIFO: phần tử đầu là kết nối rảnh lâu nhất
+        for entry in self._idle:
+            too_idle = self.idle_timeout > 0 and now - entry.last_used_at > self.idle_timeout
+            if self._expired(entry, now) or (too_idle and budget > 0):
+                stale.append(entry)
+                budget -= 1
+            else:
+                keep.append(entry)
+        self._idle = keep
+        return stale
+
+    def _reset(self, entry: _PoolEntry) -> bool:
+        """
+        Huỷ transaction dở dang và khôi phục autocommit trước khi trả về pool.
+        Bỏ qua rollback khi không có transaction mở: driver có in_transaction (vd: mysql.connector)
+        thì dựa vào đó, còn lại (pyodbc) chỉ bỏ qua khi kết nối đang autocommit.
+        """
+        try:
+            raw = entry.raw
+            in_transaction = getattr(raw, "in_transaction", None)
+            if in_transaction is None:
+                in_transaction = not entry.current_autocommit
+            if in_transaction:
+                raw.rollback()
+            if entry.autocommit is not None and entry.current_autocommit != entry.autocommit:
+                raw.autocommit = entry.autocommit
+                entry.current_autocommit = entry.autocommit
+            return True
+        except Exception:
+            return False
+
+    # ------------------- API -------------------
+
+    def acquire(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+
+        while True:
+            stale: List[_PoolEntry] = []
+            entry: Optional[_PoolEntry] = None
+            should_open = False
+
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    stale.extend(self._prune_idle_locked(now))
+                    if self._idle:
+                        entry = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use + self._opening < self.max_size:
+                        self._opening += 1
+                        should_open = True
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Hết thời gian chờ kết nối {self.vendor} sau {self.acquire_timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                self._close_entry(old)
+
+            if should_open:
+                try:
+                    raw = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                entry = _PoolEntry(raw)
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use += 1
+                    self._created += 1
+            elif time.monotonic() - entry.last_used_at > self.ping_after and not _ping(self.vendor, entry.raw):
+                # Kết nối rảnh lâu và đã chết: bỏ đi và thử lại
+                with self._cond:
+                    self._in_use -= 1
+                    self._failed_pings += 1
+                    self._cond.notify()
+                self._close_entry(entry)
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self._checkouts += 1
+                self._wait_time_total += wait_time
+                if wait_time > self._wait_time_max:
+                    self._wait_time_max = wait_time
+            entry.last_used_at = time.monotonic()
+            return PooledConnection(self, entry)
+
+    def release(self, entry: _PoolEntry, discard: bool = False) -> None:
+        now = time.monotonic()
+        if not discard:
+            discard = self._expired(entry, now) or not self._reset(entry)
+        with self._cond:
+            self._in_use -= 1
+            if not discard:
+                entry.last_used_at = now
+                self._idle.append(entry)
+            self._cond.notify()
+        if discard:
+            self._close_entry(entry)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                conn.discard()
+            raise
+        finally:
+            conn.close()
+
+    def close_all(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._close_entry(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "vendor": self.vendor,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "total": self._in_use + len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "failed_pings": self._failed_pings,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_time_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+
+# ------------------- Registry theo vendor -------------------
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(vendor: str) -> ConnectionPool:
+    """Lấy (hoặc tạo) pool cho vendor"""
+    pool = _pools.get(vendor)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(vendor)
+        if pool is None:
+            pool = ConnectionPool(
+                vendor,
+                factory=lambda: _connect(vendor),
+                min_size=int(_env_number(vendor, "MIN_SIZE", 1)),
+                max_size=int(_env_number(vendor, "MAX_SIZE", 10)),
+                idle_timeout=_env_number(vendor, "IDLE_TIMEOUT", 300.0),
+                max_lifetime=_env_number(vendor, "MAX_LIFETIME", 1800.0),
+                acquire_timeout=_env_number(vendor, "ACQUIRE_TIMEOUT", 10.0),
+                ping_after=_env_number(vendor, "PING_AFTER", 30.0),
+            )
+            _pools[vendor] = pool
+        return pool
+
+
+def acquire_connection(vendor: str) -> PooledConnection:
+    """Mượn một kết nối; gọi conn.close() để trả về pool"""
+    return get_pool(vendor).acquire()
+
+
+@contextmanager
+def pooled_connection(vendor: str):
+    """
+    Context manager mượn kết nối từ pool:
+        with pooled_connection("mysql") as conn:
+            ...
+    Kết nối được rollback phần chưa commit và trả về pool khi thoát.
+    """
+    with get_pool(vendor).connection() as conn:
+        yield conn
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Thống kê pool theo vendor (in_use, idle, wait time...)"""
+    return {vendor: pool.stats() for vendor, pool in list(_pools.items())}
+
+
+def close_all_pools() -> None:
+    for pool in list(_pools.values()):
+        pool.close_all()
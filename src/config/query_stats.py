@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import bisect
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import g, has_app_context
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+# ------------------- Thống kê query theo fingerprint -------------------
+# Mọi query chạy qua cursor của pool (fetch_*/execute_db/transaction) được ghi nhận
+# theo (vendor, fingerprint): số lần, tổng/max thời gian, số dòng, lỗi và histogram
+# thời gian. Fingerprint là câu SQL đã bỏ literal/placeholder và khoảng trắng thừa,
+# nên các lần gọi cùng câu lệnh với tham số khác nhau được gộp chung.
+# Query chậm hơn SLOW_QUERY_MS (mặc định 500) ghi một dòng JSON vào logger "slow_query".
+#   SLOW_QUERY_MS                 - ngưỡng query chậm (ms), <= 0 để tắt
+#   QUERY_STATS_MAX_FINGERPRINTS  - số fingerprint tối đa giữ lại (mặc định 1000)
+#   QUERY_AUDIT                   - 1 để đếm query theo fingerprint trong từng request
+#                                   (phát hiện N+1, xem utils/query_audit.py)
+
+# Cận trên (ms) của các bucket histogram; bucket cuối là "> 5000"
+HISTOGRAM_BOUNDS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+OVERFLOW_FINGERPRINT = "<other>"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?\+\))(?:\s*,\s*\(\?\+\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql_query: str) -> str:
+    """
+    Chuẩn hoá câu SQL: literal và placeholder (?, %s) -> ?, danh sách IN (?, ?, ...)
+    và VALUES (...), (...) nhiều dòng gộp thành một, khoảng trắng thu gọn.
+    """
+    text = _STRING_LITERAL.sub("?", sql_query)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _VALUE_LIST.sub("(?+)", text)
+    text = _VALUES_ROWS.sub(r"\1", text)
+    return text
+
+
+def fingerprint_id(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _current_trace_id() -> Optional[str]:
+    # Worker của run_concurrently chạy trong bản sao context nên vẫn đọc được g
+    if has_app_context():
+        return g.get("trace_id")
+    return None
+
+
+class _FingerprintStats:
+    __slots__ = ("count", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: Optional[int], failed: bool) -> None:
+        self.count += 1
+        self.errors += 1 if failed else 0
+        self.rows += rows if rows and rows > 0 else 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Ước lượng theo cận trên của bucket chứa phân vị (bucket cuối -> max_ms)"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return float(HISTOGRAM_BOUNDS_MS[index]) if index < len(HISTOGRAM_BOUNDS_MS) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "histogram_ms": dict(zip(labels, self.buckets)),
+        }
+
+
+class QueryStats:
+    """Thống kê dùng chung cho cả process, khoá theo (vendor, fingerprint)"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _FingerprintStats] = {}
+
+    def record(self, vendor: str, text: str, elapsed_ms: float, rows: Optional[int], failed: bool) -> None:
+        key = (vendor, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Giới hạn số fingerprint (SQL sinh động) để bộ nhớ không tăng mãi
+                if len(self._entries) >= int(_env_float("QUERY_STATS_MAX_FINGERPRINTS", 1000)):
+                    key = (vendor, OVERFLOW_FINGERPRINT)
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _FingerprintStats()
+            entry.add(elapsed_ms, rows, failed)
+
+    def snapshot(self, order_by: str = "total_ms", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [
+                {"vendor": vendor, "fingerprint_id": fingerprint_id(text), "fingerprint": text, **entry.snapshot()}
+                for (vendor, text), entry in self._entries.items()
+            ]
+        items.sort(key=lambda item: item.get(order_by) or 0, reverse=True)
+        return items[:limit] if limit else items
+
+    def vendor_totals(self) -> Dict[str, Dict[str, Any]]:
+        """Cộng dồn theo vendor (count, errors, total_ms, buckets) cho /metrics"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (vendor, _), entry in self._entries.items():
+                total = totals.setdefault(vendor, {"count": 0, "errors": 0, "total_ms": 0.0, "buckets": [0] * len(entry.buckets)})
+                total["count"] += entry.count
+                total["errors"] += entry.errors
+                total["total_ms"] += entry.total_ms
+                total["buckets"] = [a + b for a, b in zip(total["buckets"], entry.buckets)]
+        return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+query_stats = QueryStats()
+
+_request_lock = threading.Lock()
+
+
+def query_audit_enabled() -> bool:
+    return os.environ.get("QUERY_AUDIT", "0").strip().lower() in ("1", "true", "yes")
+
+
+def _count_for_request(text: str, elapsed_ms: float) -> None:
+    # Worker của run_concurrently dùng chung g với request -> cộng dưới lock
+    if not has_app_context():
+        return
+    audit = query_audit_enabled()
+    with _request_lock:
+        g.query_count = g.get("query_count", 0) + 1
+        g.query_ms = g.get("query_ms", 0.0) + elapsed_ms
+        if audit:
+            fingerprints = g.get("query_fingerprints")
+            if fingerprints is None:
+                fingerprints = g.query_fingerprints = {}
+            fingerprints[text] = fingerprints.get(text, 0) + 1
+
+
+def get_request_query_totals() -> Tuple[int, float]:
+    """(số query, tổng ms) đã chạy trong request hiện tại"""
+    if not has_app_context():
+        return 0, 0.0
+    return g.get("query_count", 0), g.get("query_ms", 0.0)
+
+
+def get_request_fingerprints() -> Dict[str, int]:
+    """{fingerprint: số lần} trong request hiện tại (chỉ có khi QUERY_AUDIT bật)"""
+    if not has_app_context():
+        return {}
+    with _request_lock:
+        return dict(g.get("query_fingerprints") or {})
+
+
+def record_query(vendor: str, sql_query: str, elapsed_ms: float, rows: Optional[int] = None, error: Optional[BaseException] = None) -> None:
+    """Ghi nhận một query đã chạy xong (gọi từ InstrumentedCursor trong config.db)"""
+    text = fingerprint(sql_query)
+    query_stats.record(vendor, text, elapsed_ms, rows, error is not None)
+    _count_for_request(text, elapsed_ms)
+
+    threshold = _env_float("SLOW_QUERY_MS", 500)
+    trace_id = _current_trace_id()
+    if 0 < threshold <= elapsed_ms:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "vendor": vendor,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "rows": rows,
+            "trace_id": trace_id,
+            "fingerprint_id": fingerprint_id(text),
+            "fingerprint": text[:1000],
+            "error": str(error) if error is not None else None,
+        }, ensure_ascii=False))
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"[{vendor}] {elapsed_ms:.1f}ms rows={rows} trace={trace_id}: {text[:200]}")
+
+
+def get_query_stats(order_by: str = "total_ms", limit: Optional[int] = 50) -> Dict[str, Any]:
+    """Các fingerprint tốn nhất (mặc định theo tổng thời gian) kèm histogram"""
+    return {
+        "slow_query_ms": _env_float("SLOW_QUERY_MS", 500),
+        "histogram_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+        "queries": query_stats.snapshot(order_by=order_by, limit=limit),
+    }
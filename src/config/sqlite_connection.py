@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import datetime
+import threading
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+from config.sqlite_dialect import translate
+
+# ------------------- SQLite thay cho SQL Server / MySQL -------------------
+# Vendor "sqlite" (DB_VENDOR / SALARY_DB_VENDOR / ATTENDANCE_DB_VENDOR=sqlite) và các vendor
+# được "đóng thế" bằng SQLite (SQLITE_STANDIN=sqlserver,mysql) đều mở kết nối sqlite3 ở đây.
+# Service vẫn sinh SQL theo dialect của vendor; cursor dịch câu lệnh sang SQLite
+# (config/sqlite_dialect.py) trước khi chạy, nên các luồng chỉ có trên SQL Server
+# (dividends, ghi song song employees/departments/positions) cũng chạy được cục bộ.
+#   SQLITE_DB_PATH           - file database cho vendor "sqlite"
+#   SQLITE_<VENDOR>_DB_PATH  - file database cho vendor đóng thế (vd: SQLITE_SQLSERVER_DB_PATH)
+#   SQLITE_BUSY_TIMEOUT      - giây chờ khi database đang bị khoá ghi (mặc định 30)
+# Không đặt path thì dùng database trong bộ nhớ, dùng chung giữa các kết nối của cùng vendor.
+# In-memory dùng shared cache (khoá theo bảng) nên chỉ hợp cho test; đo tải song song thì
+# dùng file (chế độ WAL).
+
+# DATE/DATETIME trả về date/datetime và DECIMAL trả về Decimal như pyodbc/mysql.connector
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=" "))
+sqlite3.register_converter("DATE", lambda raw: datetime.date.fromisoformat(raw.decode()[:10]))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+
+# Giữ một kết nối cho mỗi database in-memory: database biến mất khi kết nối cuối cùng đóng
+# (pool có thể đóng hết kết nối rảnh)
+_memory_anchors: Dict[str, sqlite3.Connection] = {}
+_anchors_lock = threading.Lock()
+
+
+def sqlite_standin_vendors() -> List[str]:
+    """Các vendor chạy trên SQLite thay cho server thật (SQLITE_STANDIN, phân tách bằng dấu phẩy)"""
+    raw = os.environ.get("SQLITE_STANDIN", "")
+    return [vendor.strip().lower() for vendor in raw.split(",") if vendor.strip()]
+
+
+def uses_sqlite(vendor: str) -> bool:
+    return vendor == "sqlite" or vendor in sqlite_standin_vendors()
+
+
+def _database_path(vendor: str) -> str:
+    if vendor == "sqlite":
+        path = os.environ.get("SQLITE_DB_PATH")
+    else:
+        path = os.environ.get(f"SQLITE_{vendor.upper()}_DB_PATH")
+    if not path or path == ":memory:":
+        return f"file:humen_{vendor}?mode=memory&cache=shared"
+    return path
+
+
+class SQLiteCursor:
+    """Cursor dịch câu lệnh sang SQLite trước khi execute; các thuộc tính khác của sqlite3.Cursor giữ nguyên"""
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+
+    def execute(self, sql_query: str, params: Sequence[Any] = ()):
+        self._cursor.execute(translate(sql_query), tuple(params or ()))
+        return self
+
+    def executemany(self, sql_query: str, seq_of_params):
+        self._cursor.executemany(translate(sql_query), [tuple(params) for params in seq_of_params])
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """
+    Bọc sqlite3.Connection cho giống pyodbc/mysql.connector: có thuộc tính autocommit
+    (service đặt conn.autocommit = False trước khi ghi) và cursor dịch dialect.
+    """
+
+    def __init__(self, raw: sqlite3.Connection) -> None:
+        self._raw = raw
+
+    @property
+    def autocommit(self) -> bool:
+        return self._raw.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value: bool) -> None:
+        if self._raw.in_transaction and value:
+            self._raw.commit()
+        self._raw.isolation_level = None if value else "DEFERRED"
+
+    @property
+    def in_transaction(self) -> bool:
+        """Pool dựa vào đây để bỏ qua rollback khi trả kết nối không có transaction mở"""
+        return self._raw.in_transaction
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._raw.cursor())
+
+    def commit(self) -> None:
+        self._raw.commit()
+
+    def rollback(self) -> None:
+        self._raw.rollback()
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def _open(path: str) -> sqlite3.Connection:
+    raw = sqlite3.connect(
+        path,
+        uri=path.startswith("file:"),
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,  # pool cho mượn kết nối ở nhiều thread (mỗi lúc một thread)
+        timeout=float(os.environ.get("SQLITE_BUSY_TIMEOUT", "30")),
+        isolation_level="DEFERRED",
+    )
+    raw.execute("PRAGMA foreign_keys = ON")
+    return raw
+
+
+def get_sqlite_connection(vendor: str = "sqlite") -> SQLiteConnection:
+    """Tạo và trả về kết nối SQLite cho vendor (sqlite hoặc vendor đóng thế)."""
+    path = _database_path(vendor)
+    in_memory = "mode=memory" in path
+    if in_memory:
+        with _anchors_lock:
+            if path not in _memory_anchors:
+                _memory_anchors[path] = _open(path)
+    raw = _open(path)
+    if not in_memory:
+        raw.execute("PRAGMA journal_mode = WAL")
+    return SQLiteConnection(raw)
@@ -0,0 +1,311 @@
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+# ------------------- Dịch SQL Server / MySQL -> SQLite -------------------
+# Các service viết SQL theo T-SQL (nhánh sqlserver) hoặc MySQL (nhánh còn lại). Để chạy
+# chúng trên SQLite mà không sửa service, câu lệnh được dịch ngay trước khi execute:
+#   %s                                   -> ?
+#   TOP n / TOP (n)                      -> LIMIT n ở cuối SELECT tương ứng
+#   OFFSET x ROWS FETCH NEXT y ROWS ONLY -> LIMIT y OFFSET x
+#   OUTPUT INSERTED.a, INSERTED.b        -> RETURNING a, b
+#   ON DUPLICATE KEY UPDATE a = VALUES(a) -> ON CONFLICT DO UPDATE SET a = excluded.a
+#   MERGE t USING (VALUES ...) AS s (...) -> WITH s(...) AS (VALUES ...) INSERT ... ON CONFLICT DO UPDATE
+#   EOMONTH(x) / LAST_DAY(x)             -> date(x, 'start of month', '+1 month', '-1 day')
+#   FORMAT(x, 'yyyy-MM') / DATE_FORMAT(x, '%Y-%m') -> strftime('%Y-%m', x)
+#   YEAR/MONTH/DAY(x)                    -> CAST(strftime(...) AS INTEGER)
+#   LEFT(x, n)                           -> substr(x, 1, n)
+#   CONVERT(VARCHAR(n), x, style)        -> substr(CAST(x AS TEXT), 1, n)
+#   GETDATE()/NOW()/CURDATE()            -> datetime('now', 'localtime') / date(...)
+#   ISNULL(a, b)                         -> IFNULL(a, b);  AS UNSIGNED/SIGNED -> AS INTEGER
+# cùng vài truy vấn catalog (information_schema, sys.*) mà service dùng: cột PeriodKey, khoá
+# UNIQUE theo kỳ, số dòng ước lượng và danh sách bảng con có khoá ngoại tới một bảng.
+# Những cấu trúc khác được giữ nguyên; SQLite sẽ báo lỗi cú pháp nếu không hỗ trợ.
+
+_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_MASK = re.compile(r"\x00(\d+)\x00")
+
+
+def _mask_literals(sql: str) -> Tuple[str, List[str]]:
+    """Thay literal chuỗi bằng \\x00i\\x00 để các phép dịch không đụng vào nội dung chuỗi"""
+    literals: List[str] = []
+
+    def keep(match: re.Match) -> str:
+        text = match.group(0)
+        literals.append(text[1:] if text[0] in "Nn" else text)
+        return f"\x00{len(literals) - 1}\x00"
+
+    return _LITERAL.sub(keep, sql), literals
+
+
+def _unmask(sql: str, literals: List[str]) -> str:
+    return _MASK.sub(lambda match: literals[int(match.group(1))], sql)
+
+
+def _literal_value(token: str, literals: List[str]) -> Optional[str]:
+    """Nội dung của literal đã mask (không gồm dấu nháy), None nếu token không phải literal"""
+    match = _MASK.fullmatch(token.strip())
+    if match is None:
+        return None
+    return literals[int(match.group(1))][1:-1].replace("''", "'")
+
+
+def _matching_paren(sql: str, open_index: int) -> int:
+    depth = 0
+    for index in range(open_index, len(sql)):
+        if sql[index] == "(":
+            depth += 1
+        elif sql[index] == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError("Thiếu dấu ')' trong câu SQL")
+
+
+def _split_args(text: str) -> List[str]:
+    args, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            args.append(text[start:index].strip())
+            start = index + 1
+    args.append(text[start:].strip())
+    return args
+
+
+def _rewrite_calls(sql: str, name: str, build: Callable[[List[str]], Optional[str]]) -> str:
+    """
+    Viết lại mọi lời gọi NAME(...) bằng build(args). Duyệt từ phải sang trái để lời gọi
+    lồng nhau cùng tên được xử lý từ trong ra; build trả None thì giữ nguyên.
+    """
+    pattern = re.compile(rf"\b{name}\(", re.IGNORECASE)
+    matches = list(pattern.finditer(sql))
+    for match in reversed(matches):
+        open_index = match.end() - 1
+        close_index = _matching_paren(sql, open_index)
+        replacement = build(_split_args(sql[open_index + 1:close_index]))
+        if replacement is not None:
+            sql = sql[:match.start()] + replacement + sql[close_index + 1:]
+    return sql
+
+
+# ------------------- Hàm ngày tháng / chuỗi -------------------
+
+_DOTNET_DATE_FORMAT = (("yyyy", "%Y"), ("MM", "%m"), ("dd", "%d"), ("HH", "%H"), ("mm", "%M"), ("ss", "%S"))
+_MYSQL_DATE_FORMAT = {"%Y": "%Y", "%m": "%m", "%d": "%d", "%H": "%H", "%i": "%M", "%s": "%S", "%S": "%S", "%%": "%%"}
+
+
+def _translate_functions(sql: str, literals: List[str]) -> str:
+    def literal(text: str) -> str:
+        literals.append("'" + text.replace("'", "''") + "'")
+        return f"\x00{len(literals) - 1}\x00"
+
+    def end_of_month(args: List[str]) -> str:
+        return f"date({args[0]}, 'start of month', '+1 month', '-1 day')"
+
+    def date_part(fmt: str) -> Callable[[List[str]], str]:
+        return lambda args: f"CAST(strftime('{fmt}', {args[0]}) AS INTEGER)"
+
+    def dotnet_format(args: List[str]) -> Optional[str]:
+        pattern = _literal_value(args[1], literals) if len(args) == 2 else None
+        # Chỉ dịch FORMAT theo mẫu ngày (FORMAT(số, 'N2') giữ nguyên)
+        if pattern is None or not any(token in pattern for token, _ in _DOTNET_DATE_FORMAT):
+            return None
+        for token, replacement in _DOTNET_DATE_FORMAT:
+            pattern = pattern.replace(token, replacement)
+        return f"strftime({literal(pattern)}, {args[0]})"
+
+    def mysql_date_format(args: List[str]) -> Optional[str]:
+        pattern = _literal_value(args[1], literals) if len(args) == 2 else None
+        if pattern is None:
+            return None
+        pattern = re.sub(r"%.", lambda match: _MYSQL_DATE_FORMAT.get(match.group(0), match.group(0)), pattern)
+        return f"strftime({literal(pattern)}, {args[0]})"
+
+    def convert(args: List[str]) -> Optional[str]:
+        type_match = re.fullmatch(r"N?(?:VAR)?CHAR\s*\(\s*(\d+)\s*\)", args[0], re.IGNORECASE)
+        if type_match:
+            return f"substr(CAST({args[1]} AS TEXT), 1, {type_match.group(1)})"
+        return f"CAST({args[1]} AS {args[0]})"
+
+    sql = _rewrite_calls(sql, "CONVERT", convert)
+    sql = _rewrite_calls(sql, "EOMONTH", end_of_month)
+    sql = _rewrite_calls(sql, "LAST_DAY", end_of_month)
+    sql = _rewrite_calls(sql, "DATE_FORMAT", mysql_date_format)
+    sql = _rewrite_calls(sql, "FORMAT", dotnet_format)
+    sql = _rewrite_calls(sql, "YEAR", date_part("%Y"))
+    sql = _rewrite_calls(sql, "MONTH", date_part("%m"))
+    sql = _rewrite_calls(sql, "DAY", date_part("%d"))
+    sql = _rewrite_calls(sql, "LEFT", lambda args: f"substr({args[0]}, 1, {args[1]})")
+    sql = _rewrite_calls(sql, "ISNULL", lambda args: f"IFNULL({', '.join(args)})")
+    sql = re.sub(r"\b(?:GETDATE|SYSDATETIME|NOW)\(\s*\)", "datetime('now', 'localtime')", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bCURDATE\(\s*\)", "date('now', 'localtime')", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bAS\s+(?:UNSIGNED|SIGNED)(?:\s+INTEGER)?\b", "AS INTEGER", sql, flags=re.IGNORECASE)
+    return sql
+
+
+# ------------------- TOP / OFFSET FETCH / OUTPUT / upsert -------------------
+
+_TOP = re.compile(r"\bTOP\s*(?:\(\s*(\d+)\s*\)|(\d+))\s*", re.IGNORECASE)
+_OFFSET_FETCH = re.compile(
+    r"\bOFFSET\s+(\S+)\s+ROWS?\s+FETCH\s+(?:NEXT|FIRST)\s+(\S+)\s+ROWS?\s+ONLY\b", re.IGNORECASE
+)
+_OUTPUT = re.compile(r"\bOUTPUT\s+(.+?)(?=\bVALUES\b|\bSELECT\b|\bFROM\b|\bWHERE\b|\bDEFAULT\s+VALUES\b|$)",
+                     re.IGNORECASE | re.DOTALL)
+
+
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+
+
+def _translate_upsert(sql: str) -> str:
+    """MySQL ON DUPLICATE KEY UPDATE col = VALUES(col) -> ON CONFLICT DO UPDATE SET col = excluded.col"""
+    match = _ON_DUPLICATE_KEY.search(sql)
+    if match is None:
+        return sql
+    assignments = re.sub(r"\bVALUES\(\s*(\w+)\s*\)", r"excluded.\1", sql[match.end():], flags=re.IGNORECASE)
+    return sql[:match.start()] + "ON CONFLICT DO UPDATE SET" + assignments
+
+
+_MERGE = re.compile(
+    r"^MERGE\s+(?:INTO\s+)?(\w+)(?:\s+WITH\s*\([^)]*\))?\s+(?:AS\s+)?(\w+)\s+"
+    r"USING\s*\(\s*(VALUES\s*.+?)\)\s*(?:AS\s+)?(\w+)\s*\(([^)]*)\)\s+"
+    r"ON\s+.+?\s+WHEN\s+MATCHED\s+THEN\s+UPDATE\s+SET\s+(.+?)\s+"
+    r"WHEN\s+NOT\s+MATCHED(?:\s+BY\s+TARGET)?\s+THEN\s+INSERT\s*\(([^)]*)\)\s*VALUES\s*\((.+)\)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _translate_merge(sql: str) -> str:
+    """
+    MERGE t USING (VALUES ...) AS s (cols) ... -> WITH s(cols) AS (VALUES ...) INSERT ... ON CONFLICT DO UPDATE.
+    Điều kiện ON bị bỏ qua: SQLite dựa vào unique index trên bảng đích (phải khớp với khóa trong ON),
+    s.x trong phần UPDATE thành excluded.<cột nhận s.x>, t.x thành cột hiện có của bảng.
+    """
+    match = _MERGE.match(sql)
+    if match is None:
+        return sql
+    table, target, values, source, source_columns, assignments, insert_columns, insert_values = match.groups()
+    columns = _split_args(insert_columns)
+    expressions = _split_args(insert_values)
+    # Cột nguồn -> cột đích nhận giá trị đó trong nhánh INSERT
+    excluded = {}
+    for column, expression in zip(columns, expressions):
+        source_match = re.fullmatch(rf"{source}\.(\w+)", expression, re.IGNORECASE)
+        if source_match:
+            excluded[source_match.group(1).lower()] = column
+    assignments = re.sub(rf"\b{source}\.(\w+)",
+                         lambda m: "excluded." + excluded.get(m.group(1).lower(), m.group(1)),
+                         assignments, flags=re.IGNORECASE)
+    assignments = re.sub(rf"\b{target}\.(\w+)", rf"{table}.\1", assignments, flags=re.IGNORECASE)
+    return (
+        f"WITH {source}({source_columns.strip()}) AS ({values.strip()}) "
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(expressions)} FROM {source} WHERE true "
+        f"ON CONFLICT DO UPDATE SET {assignments}"
+    )
+
+
+def _enclosing_close(sql: str, index: int) -> int:
+    """Vị trí ')' đóng khối ngoặc chứa index (hoặc len(sql) nếu ở mức ngoài cùng)"""
+    depth = 0
+    for position in range(index - 1, -1, -1):
+        if sql[position] == ")":
+            depth += 1
+        elif sql[position] == "(":
+            if depth == 0:
+                return _matching_paren(sql, position)
+            depth -= 1
+    return len(sql)
+
+
+def _translate_top(sql: str) -> str:
+    while True:
+        match = _TOP.search(sql)
+        if match is None:
+            return sql
+        limit = match.group(1) or match.group(2)
+        close_index = _enclosing_close(sql, match.start())
+        sql = sql[:match.start()] + sql[match.end():close_index].rstrip() + f" LIMIT {limit}" + sql[close_index:]
+
+
+def _translate_output(sql: str) -> str:
+    match = _OUTPUT.search(sql)
+    if match is None:
+        return sql
+    columns = re.sub(r"\b(?:INSERTED|DELETED)\.", "", match.group(1).strip(), flags=re.IGNORECASE)
+    sql = (sql[:match.start()] + sql[match.end():]).rstrip()
+    return f"{sql} RETURNING {columns}"
+
+
+# ------------------- Catalog -------------------
+
+_FOREIGN_KEY_CHILDREN = (
+    "SELECT m.name FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f "
+    "WHERE m.type = 'table' AND f.\"table\" = {table} AND f.\"to\" = {column}"
+)
+
+# (regex trên câu đã mask literal, hàm dựng câu SQLite tương đương)
+_CATALOG_QUERIES: List[Tuple[re.Pattern, Callable[[re.Match], str]]] = [
+    (
+        re.compile(r"SELECT\s+COUNT\(\*\)\s+FROM\s+information_schema\.COLUMNS\s+WHERE\s+TABLE_NAME\s*=\s*(\S+)\s+"
+                   r"AND\s+COLUMN_NAME\s*=\s*(\S+)", re.IGNORECASE),
+        lambda m: f"SELECT COUNT(*) FROM pragma_table_xinfo({m.group(1)}) WHERE name = {m.group(2)}",
+    ),
+    (
+        # Khoá UNIQUE theo kỳ: trên SQLite là unique index biểu thức (EmployeeID, substr(tháng, 1, 7))
+        re.compile(r"SELECT\s+COUNT\(\*\)\s+FROM\s+information_schema\.STATISTICS\s+WHERE\s+.*?TABLE_NAME\s*=\s*(\S+)",
+                   re.IGNORECASE | re.DOTALL),
+        lambda m: f"SELECT COUNT(*) FROM pragma_index_list({m.group(1)}) WHERE \"unique\" = 1 AND origin <> 'pk'",
+    ),
+    (
+        re.compile(r"SELECT\s+TABLE_ROWS\s+FROM\s+information_schema\.TABLES\s+WHERE\s+.*?TABLE_NAME\s*=\s*(\S+)",
+                   re.IGNORECASE | re.DOTALL),
+        lambda m: f"SELECT COUNT(*) FROM {{table:{m.group(1)}}}",
+    ),
+    (
+        re.compile(r"SELECT\s+SUM\(p\.rows\)\s+FROM\s+sys\.partitions\s+p\s+WHERE\s+.*?OBJECT_ID\((\S+?)\)",
+                   re.IGNORECASE | re.DOTALL),
+        lambda m: f"SELECT COUNT(*) FROM {{table:{m.group(1)}}}",
+    ),
+    (
+        re.compile(r"SELECT\s+TABLE_NAME\s+FROM\s+information_schema\.KEY_COLUMN_USAGE\s+WHERE\s+"
+                   r"REFERENCED_TABLE_NAME\s*=\s*(\S+)\s+AND\s+REFERENCED_COLUMN_NAME\s*=\s*(\S+)", re.IGNORECASE),
+        lambda m: _FOREIGN_KEY_CHILDREN.format(table=m.group(1), column=m.group(2)),
+    ),
+    (
+        re.compile(r"SELECT\s+OBJECT_NAME\(fk\.parent_object_id\)\s+FROM\s+sys\.foreign_keys\s+fk\s+.*?"
+                   r"referenced_object_id\s*=\s*OBJECT_ID\((\S+?)\)\s+AND\s+c\.name\s*=\s*(\S+?);?\s*$",
+                   re.IGNORECASE | re.DOTALL),
+        lambda m: _FOREIGN_KEY_CHILDREN.format(table=m.group(1), column=m.group(2)),
+    ),
+]
+
+
+def _translate_catalog(sql: str, literals: List[str]) -> Optional[str]:
+    for pattern, build in _CATALOG_QUERIES:
+        match = pattern.search(sql)
+        if match is not None:
+            translated = build(match)
+            # {table:<literal>} -> tên bảng (không nháy) để dùng trong FROM
+            return re.sub(r"\{table:(\S+?)\}", lambda t: _literal_value(t.group(1), literals) or t.group(1), translated)
+    return None
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Dịch một câu lệnh T-SQL/MySQL sang SQLite (kết quả được cache theo chuỗi SQL)"""
+    masked, literals = _mask_literals(sql.strip().rstrip(";").rstrip())
+    masked = masked.replace("%s", "?")
+    catalog = _translate_catalog(masked, literals)
+    if catalog is not None:
+        masked = catalog
+    else:
+        masked = _translate_functions(masked, literals)
+        masked = _OFFSET_FETCH.sub(lambda m: f"LIMIT {m.group(2)} OFFSET {m.group(1)}", masked)
+        masked = _translate_top(masked)
+        masked = _translate_output(masked)
+        masked = _translate_upsert(masked)
+        masked = _translate_merge(masked)
+    return _unmask(masked, literals)
@@ -0,0 +1,13 @@
+-- Mỗi nhân viên một bản ghi chấm công mỗi tháng (MySQL, chạy sau period_key_mysql.sql)
+-- import_attendances upsert bằng INSERT ... ON DUPLICATE KEY UPDATE dựa trên khoá này;
+-- create_attendance báo lỗi thay vì tạo bản ghi trùng.
+-- Bản ghi trùng sẵn có được xoá trước, giữ bản ghi có AttendanceID lớn nhất.
+
+DELETE a FROM attendance a
+JOIN attendance newer
+    ON newer.EmployeeID = a.EmployeeID
+   AND newer.PeriodKey = a.PeriodKey
+   AND newer.AttendanceID > a.AttendanceID;
+
+ALTER TABLE attendance
+    ADD UNIQUE INDEX uq_attendance_employee_period (EmployeeID, PeriodKey);
@@ -0,0 +1,12 @@
+-- Mỗi nhân viên một bản ghi chấm công mỗi tháng (SQL Server, chạy sau period_key_sqlserver.sql)
+-- import_attendances upsert bằng MERGE ... WITH (HOLDLOCK); khoá này chặn bản ghi trùng
+-- từ mọi đường ghi (create_attendance, import chạy song song).
+-- Bản ghi trùng sẵn có được xoá trước, giữ bản ghi có AttendanceID lớn nhất.
+
+WITH ranked AS (
+    SELECT ROW_NUMBER() OVER (PARTITION BY EmployeeID, PeriodKey ORDER BY AttendanceID DESC) AS rn
+    FROM attendance
+)
+DELETE FROM ranked WHERE rn > 1;
+
+CREATE UNIQUE INDEX UX_attendance_EmployeeID_PeriodKey ON attendance (EmployeeID, PeriodKey);
@@ -0,0 +1,15 @@
+-- Khóa kỳ YYYYMM cho các bảng theo tháng (MySQL 5.7+)
+-- PeriodKey là generated column STORED nên tự cập nhật khi ghi SalaryMonth/AttendanceMonth,
+-- không cần sửa code ghi. Bỏ qua các bảng không có trên database này.
+-- Sau khi chạy, restart app để config.db.has_period_key nhận cột mới.
+
+ALTER TABLE salaries
+    ADD COLUMN PeriodKey INT UNSIGNED
+        AS (CAST(REPLACE(LEFT(SalaryMonth, 7), '-', '') AS UNSIGNED)) STORED,
+    ADD INDEX idx_salaries_period_employee (PeriodKey, EmployeeID),
+    ADD INDEX idx_salaries_employee_period (EmployeeID, PeriodKey);
+
+ALTER TABLE attendance
+    ADD COLUMN PeriodKey INT UNSIGNED
+        AS (CAST(REPLACE(LEFT(AttendanceMonth, 7), '-', '') AS UNSIGNED)) STORED,
+    ADD INDEX idx_attendance_period_employee (PeriodKey, EmployeeID);
@@ -0,0 +1,20 @@
+-- Khóa kỳ YYYYMM cho các bảng theo tháng (SQL Server)
+-- PeriodKey là computed column PERSISTED nên tự cập nhật khi ghi SalaryMonth/AttendanceMonth/DividendDate,
+-- không cần sửa code ghi. Bỏ qua các bảng không có trên database này.
+-- Sau khi chạy, restart app để config.db.has_period_key nhận cột mới.
+
+ALTER TABLE salaries
+    ADD PeriodKey AS CAST(REPLACE(LEFT(CONVERT(VARCHAR(10), SalaryMonth, 120), 7), '-', '') AS INT) PERSISTED;
+CREATE INDEX IX_salaries_PeriodKey_EmployeeID ON salaries (PeriodKey, EmployeeID)
+    INCLUDE (BaseSalary, Bonus, Deductions, NetSalary);
+CREATE INDEX IX_salaries_EmployeeID_PeriodKey ON salaries (EmployeeID, PeriodKey);
+
+ALTER TABLE attendance
+    ADD PeriodKey AS CAST(REPLACE(LEFT(CONVERT(VARCHAR(10), AttendanceMonth, 120), 7), '-', '') AS INT) PERSISTED;
+CREATE INDEX IX_attendance_PeriodKey_EmployeeID ON attendance (PeriodKey, EmployeeID)
+    INCLUDE (WorkDays, AbsentDays, LeaveDays);
+
+ALTER TABLE dividends
+    ADD PeriodKey AS CAST(REPLACE(LEFT(CONVERT(VARCHAR(10), DividendDate, 120), 7), '-', '') AS INT) PERSISTED;
+CREATE INDEX IX_dividends_PeriodKey_EmployeeID ON dividends (PeriodKey, EmployeeID)
+    INCLUDE (DividendAmount);
@@ -0,0 +1,13 @@
+-- Mỗi nhân viên một bản ghi lương mỗi tháng (MySQL, chạy sau period_key_mysql.sql)
+-- run_payroll upsert bằng INSERT ... ON DUPLICATE KEY UPDATE dựa trên khoá này, nên hai lượt
+-- chạy lương cùng kỳ không tạo bản ghi trùng.
+-- Bản ghi trùng sẵn có được xoá trước, giữ bản ghi có SalaryID lớn nhất.
+
+DELETE s FROM salaries s
+JOIN salaries newer
+    ON newer.EmployeeID = s.EmployeeID
+   AND newer.PeriodKey = s.PeriodKey
+   AND newer.SalaryID > s.SalaryID;
+
+ALTER TABLE salaries
+    ADD UNIQUE INDEX uq_salaries_employee_period (EmployeeID, PeriodKey);
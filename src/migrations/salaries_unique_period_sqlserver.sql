@@ -0,0 +1,12 @@
+-- Mỗi nhân viên một bản ghi lương mỗi tháng (SQL Server, chạy sau period_key_sqlserver.sql)
+-- run_payroll upsert bằng MERGE ... WITH (HOLDLOCK); khoá này chặn bản ghi trùng
+-- từ mọi đường ghi (generate_salary, hai lượt chạy lương song song).
+-- Bản ghi trùng sẵn có được xoá trước, giữ bản ghi có SalaryID lớn nhất.
+
+WITH ranked AS (
+    SELECT ROW_NUMBER() OVER (PARTITION BY EmployeeID, PeriodKey ORDER BY SalaryID DESC) AS rn
+    FROM salaries
+)
+DELETE FROM ranked WHERE rn > 1;
+
+CREATE UNIQUE INDEX UX_salaries_EmployeeID_PeriodKey ON salaries (EmployeeID, PeriodKey);
@@ -1,9 +1,12 @@
+import io
+import csv
 from flask import Blueprint, request, jsonify, g
 from services.attendance_service import (
-    get_attendances, create_attendance, get_attendance_by_id,
+    get_attendances, get_attendances_columnar, stream_attendances, create_attendance, import_attendances, get_attendance_by_id,
     update_attendance, delete_attendance, get_attendance_statistics
 )
 from utils.response import wrap_success, wrap_error
+from utils.export import EXPORT_FORMATS, export_response
 
 attendance_bp = Blueprint('attendance', __name__)
 
@@ -13,11 +16,13 @@ def list_attendances():
     GET /attendance
     Lấy dữ liệu chấm công. (Hỗ trợ filter theo EmployeeID, AttendanceMonth)
     Chỉ xử lý khi có query params (API call), còn lại để route HTML xử lý
+    ?format=csv|ndjson: export toàn bộ kết quả dạng stream (không giữ cả danh sách trong bộ nhớ)
+    ?format=columnar: data dạng cột {"columns": [...], "rows": [[...]]} (không lặp tên cột mỗi dòng)
     """
     # Kiểm tra nếu là browser request (có Accept: text/html) và không có query params
     # thì render HTML trực tiếp
     accept_header = request.headers.get('Accept', '')
-    has_query_params = request.args.get('employee_id') or request.args.get('year')
+    has_query_params = request.args.get('employee_id') or request.args.get('year') or request.args.get('format')
     
     if 'text/html' in accept_header and 'application/json' not in accept_header and not has_query_params:
         from flask import render_template
@@ -26,6 +31,23 @@ def list_attendances():
     try:
         employee_id = request.args.get('employee_id', type=int)
         year = request.args.get('year', type=int)
+        export_format = request.args.get('format')
+        
+        if export_format == 'columnar':
+            result = get_attendances_columnar(employee_id, year=year)
+            return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
+        
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return jsonify(wrap_error(
+                    code='BAD_REQUEST',
+                    message=f"format phải là một trong: {', '.join(EXPORT_FORMATS)}",
+                    domain='attendance',
+                    details={},
+                    trace_id=getattr(g, 'trace_id', None)
+                )), 400
+            filename = f"attendance_{year}" if year else "attendance"
+            return export_response(stream_attendances(employee_id, year=year), export_format, filename)
         
         result = get_attendances(employee_id, year=year)
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
@@ -86,6 +108,44 @@ def create_attendance_record():
             trace_id=getattr(g, 'trace_id', None)
         )), 500
 
+@attendance_bp.route('/attendance/import', methods=['POST'])
+def import_attendance_records():
+    """
+    POST /attendance/import
+    Import hàng loạt chấm công từ máy chấm công:
+    - JSON array (hoặc {"records": [...]})
+    - CSV (Content-Type: text/csv, hoặc file upload field "file") với header EmployeeID,AttendanceMonth,WorkDays,AbsentDays,LeaveDays
+    Dòng lỗi được trả về trong errors, các dòng hợp lệ vẫn được ghi.
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            records = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'))
+        elif request.mimetype == 'text/csv':
+            records = csv.DictReader(io.StringIO(request.get_data(as_text=True).lstrip('\ufeff')))
+        else:
+            data = request.get_json(silent=True)
+            records = data.get('records') if isinstance(data, dict) else data
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                return jsonify(wrap_error(
+                    code='BAD_REQUEST',
+                    message='Dữ liệu import phải là JSON array các bản ghi hoặc file CSV.',
+                    domain='attendance',
+                    details={},
+                    trace_id=getattr(g, 'trace_id', None)
+                )), 400
+
+        result = import_attendances(records)
+        return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
+    except Exception as e:
+        return jsonify(wrap_error(
+            code='INTERNAL_SERVER',
+            message='Lỗi khi import chấm công.',
+            domain='attendance',
+            details={"error": str(e)},
+            trace_id=getattr(g, 'trace_id', None)
+        )), 500
+
 @attendance_bp.route('/attendance/<int:attendance_id>', methods=['GET'])
 def get_attendance(attendance_id):
     """
@@ -1,12 +1,16 @@
 from flask import Blueprint, request, jsonify, g
+from datetime import datetime
 from services.dashboard_service import (
     get_dashboard_overview,
     get_dashboard_comparison,
     get_top_employees,
     get_top_departments,
-    get_dashboard_trends
+    get_dashboard_trends,
+    get_dashboard_bundle,
+    BUNDLE_SECTIONS
 )
 from utils.response import wrap_success, wrap_error
+from utils.cache import get_cache_stats
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -96,8 +100,8 @@ def get_trends():
     """
     try:
         months = request.args.get('months', default=6, type=int)
-        if months > 12:
-            months = 12  # Giới hạn tối đa 12 tháng
+        if months > 36:
+            months = 36  # Giới hạn tối đa 36 tháng
         if months < 1:
             months = 1
         result = get_dashboard_trends(months)
@@ -111,6 +115,46 @@ def get_trends():
             trace_id=getattr(g, 'trace_id', None)
         )), 500
 
+@dashboard_bp.route('/dashboard/bundle', methods=['GET'])
+def get_bundle():
+    """
+    API Endpoint: GET /dashboard/bundle?role=ADMIN&year=2025
+    Trả về toàn bộ dữ liệu trang dashboard của một vai trò trong một request.
+    role: ADMIN | HR_MANAGER | PAYROLL_MANAGER (mặc định ADMIN), year mặc định năm hiện tại.
+    Lỗi của từng section được trả về riêng trong sections.<tên>.error.
+    """
+    role = (request.args.get('role') or 'ADMIN').strip().upper()
+    if role in ('HR', 'PAYROLL'):
+        role = f"{role}_MANAGER"
+    if role not in BUNDLE_SECTIONS:
+        return jsonify(wrap_error(
+            code='BAD_REQUEST',
+            message='Tham số role không hợp lệ.',
+            domain='dashboard',
+            details={"role": role, "allowed": list(BUNDLE_SECTIONS)},
+            trace_id=getattr(g, 'trace_id', None)
+        )), 400
+    year = request.args.get('year', default=datetime.now().year, type=int)
+    try:
+        result = get_dashboard_bundle(role, year)
+        return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
+    except Exception as e:
+        return jsonify(wrap_error(
+            code='INTERNAL_SERVER',
+            message='Lỗi khi lấy dữ liệu dashboard.',
+            domain='dashboard',
+            details={"error": str(e)},
+            trace_id=getattr(g, 'trace_id', None)
+        )), 500
+
+@dashboard_bp.route('/dashboard/cache-stats', methods=['GET'])
+def get_cache_stats_endpoint():
+    """
+    API Endpoint: GET /dashboard/cache-stats
+    Thống kê cache dashboard (hits, misses, hit_ratio, entries) để tinh chỉnh TTL.
+    """
+    return jsonify(wrap_success(get_cache_stats(), trace_id=getattr(g, 'trace_id', None))), 200
+
 @dashboard_bp.route('/dashboard/debug-data', methods=['GET'])
 def debug_data():
     """
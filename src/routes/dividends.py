@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, g
 from services.dividend_service import (
-    get_dividends, create_dividend, get_dividend_by_id, delete_dividend,update_dividend_record
+    get_dividends, get_dividends_columnar, create_dividend, get_dividend_by_id, delete_dividend,update_dividend_record
 )
 from utils.response import wrap_success, wrap_error
 
@@ -12,6 +12,7 @@ def list_dividends():
     GET /dividends
     Lấy danh sách các đợt chi cổ tức
     Chỉ xử lý khi có query params (API call), còn lại để route HTML xử lý
+    ?format=columnar: data dạng cột {"columns": [...], "rows": [[...]]}
     """
     # Kiểm tra nếu là browser request (có Accept: text/html) và không có query params
     # thì render HTML trực tiếp
@@ -23,7 +24,10 @@ def list_dividends():
         return render_template('dividends.html'), 200
     
     try:
-        result = get_dividends()
+        if request.args.get('format') == 'columnar':
+            result = get_dividends_columnar()
+        else:
+            result = get_dividends()
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
     except Exception as e:
         return jsonify(wrap_error(
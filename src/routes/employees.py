@@ -12,6 +12,7 @@ def list_employees():
     """
     API Endpoint: GET /employees
     Lấy danh sách nhân viên có lọc và phân trang.
+    ?format=columnar: employees dạng cột {"columns": [...], "rows": [[...]]}
     """
     # Kiểm tra nếu là browser request (có Accept: text/html) thì render HTML trực tiếp
     # Bất kể có query params hay không (query params sẽ được xử lý bởi JavaScript)
@@ -29,6 +30,10 @@ def list_employees():
         keyword = request.args.get('keyword', type=str)
         page = request.args.get('page', default=1, type=int)
         size = request.args.get('size', default=10, type=int)
+        # Phân trang keyset: ?cursor= (rỗng cho trang đầu) rồi truyền next_cursor của trang trước
+        cursor = request.args.get('cursor', type=str)
+        # count=exact|estimated|none; ở chế độ cursor mặc định không đếm tổng
+        count_mode = request.args.get('count', default='none' if cursor is not None else 'exact', type=str).lower()
         
         # Gọi Service để lấy dữ liệu
         result = get_all_employees(
@@ -37,12 +42,19 @@ def list_employees():
             status=status,
             keyword=keyword,
             page=page, 
-            size=size
+            size=size,
+            cursor=cursor,
+            count_mode=count_mode,
+            columnar=request.args.get('format') == 'columnar'
         )
         
         # Trả về kết quả theo định dạng Success của Java
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
 
+    except ValueError as e:
+        # Cursor hoặc count không hợp lệ (InvalidCursorError là ValueError)
+        return jsonify(wrap_error(code='BAD_REQUEST', message='Tham số phân trang không hợp lệ.', domain='employees', details={"error": str(e)}, trace_id=getattr(g, 'trace_id', None))), 400
+
     except Exception as e:
         # Trả về lỗi thống nhất theo định dạng Error của Java
         return jsonify(wrap_error(code='INTERNAL_SERVER', message='Lỗi khi truy vấn danh sách nhân viên.', domain='employees', details={"error": str(e)}, trace_id=getattr(g, 'trace_id', None))), 500
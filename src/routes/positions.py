@@ -159,12 +159,22 @@ def get_position_employees(position_id):
         # Lấy tham số query cho pagination
         page = request.args.get('page', default=1, type=int)
         size = request.args.get('size', default=10, type=int)
+        cursor = request.args.get('cursor', type=str)
+        count_mode = request.args.get('count', default='none' if cursor is not None else 'exact', type=str).lower()
         
         # Gọi service để lấy danh sách nhân viên theo position
-        result = get_employees_by_position(position_id, page=page, size=size)
+        result = get_employees_by_position(position_id, page=page, size=size, cursor=cursor, count_mode=count_mode)
         
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
         
+    except ValueError as e:
+        return jsonify(wrap_error(
+            code='BAD_REQUEST',
+            message='Tham số phân trang không hợp lệ.',
+            domain='positions',
+            details={"error": str(e)},
+            trace_id=getattr(g, 'trace_id', None)
+        )), 400
     except Exception as e:
         return jsonify(wrap_error(
             code='INTERNAL_SERVER',
@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify, g
 from services.salarie_service import (
-    get_salaries, generate_salary, get_salary_by_id, 
+    get_salaries, get_salaries_columnar, stream_salaries, generate_salary, run_payroll, get_salary_by_id, 
     update_salary, delete_salary, get_my_salaries, get_salary_statistics
 )
 from utils.response import wrap_success, wrap_error
+from utils.export import EXPORT_FORMATS, export_response
 
 salaries_bp = Blueprint('salaries', __name__)
 
@@ -13,11 +14,13 @@ def list_salaries():
     GET /salaries
     Lấy danh sách các bản ghi lương (Hỗ trợ filter theo EmployeeID, SalaryMonth)
     Chỉ xử lý khi có query params (API call), còn lại để route HTML xử lý
+    ?format=csv|ndjson: export toàn bộ kết quả dạng stream (không giữ cả danh sách trong bộ nhớ)
+    ?format=columnar: data dạng cột {"columns": [...], "rows": [[...]]} (không lặp tên cột mỗi dòng)
     """
     # Kiểm tra nếu là browser request (có Accept: text/html) và không có query params
     # thì render HTML trực tiếp
     accept_header = request.headers.get('Accept', '')
-    has_query_params = request.args.get('employee_id') or request.args.get('year')
+    has_query_params = request.args.get('employee_id') or request.args.get('year') or request.args.get('format')
     
     if 'text/html' in accept_header and 'application/json' not in accept_header and not has_query_params:
         from flask import render_template
@@ -26,6 +29,23 @@ def list_salaries():
     try:
         employee_id = request.args.get('employee_id', type=int)
         year = request.args.get('year', type=int)
+        export_format = request.args.get('format')
+        
+        if export_format == 'columnar':
+            result = get_salaries_columnar(employee_id, year=year)
+            return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
+        
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return jsonify(wrap_error(
+                    code='BAD_REQUEST',
+                    message=f"format phải là một trong: {', '.join(EXPORT_FORMATS)}",
+                    domain='salaries',
+                    details={},
+                    trace_id=getattr(g, 'trace_id', None)
+                )), 400
+            filename = f"salaries_{year}" if year else "salaries"
+            return export_response(stream_salaries(employee_id, year=year), export_format, filename)
         
         result = get_salaries(employee_id, year=year)
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
@@ -43,11 +63,25 @@ def generate_salary_record():
     """
     POST /salaries/generate
     Tạo/Tính lương cho một tháng từ dữ liệu attendance và employees
+    Không có EmployeeID -> chạy lương cho toàn bộ nhân viên của SalaryMonth (trả về bản tóm tắt)
+    Chạy lại cùng kỳ không tạo bản ghi trùng và giữ Bonus/Deductions đã chỉnh tay;
+    gửi RecalculateDeductions=true để tính lại Deductions theo chấm công.
     """
     try:
-        data = request.json
+        data = request.json or {}
+        if data.get("EmployeeID") is None:
+            result = run_payroll(data)
+            return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 200
         result = generate_salary(data)
         return jsonify(wrap_success(result, trace_id=getattr(g, 'trace_id', None))), 201
+    except ValueError as e:
+        return jsonify(wrap_error(
+            code='BAD_REQUEST',
+            message=str(e),
+            domain='salaries',
+            details={},
+            trace_id=getattr(g, 'trace_id', None)
+        )), 400
     except Exception as e:
         return jsonify(wrap_error(
             code='INTERNAL_SERVER',
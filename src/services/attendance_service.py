@@ -1,56 +1,13 @@
-import os
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import calendar
-from config.mysql_connection import get_mysql_connection
-from config.sqlserver_connection import get_sqlserver_connection
-
-def get_attendance_db_vendor() -> str:
-    """Trả về vendor cho database attendance"""
-    return os.environ.get("ATTENDANCE_DB_VENDOR", "mysql").strip().lower()
-
-def _placeholder(vendor: str) -> str:
-    return "?" if vendor == "sqlserver" else "%s"
-
-def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str) -> List[Dict[str, Any]]:
-    """Lấy danh sách records từ DB"""
-    conn = None
-    try:
-        if vendor == "mysql":
-            conn = get_mysql_connection()
-        else:
-            conn = get_sqlserver_connection()
-            
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    except Exception as e:
-        raise Exception(f"Lỗi DB: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def execute_db(sql_query: str, params: Tuple[Any, ...], vendor: str) -> int:
-    """Thực thi query và trả về rowcount"""
-    conn = None
-    try:
-        if vendor == "mysql":
-            conn = get_mysql_connection()
-        else:
-            conn = get_sqlserver_connection()
-            
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        conn.commit()
-        return cursor.rowcount
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise Exception(f"Lỗi DB: {e}")
-    finally:
-        if conn:
-            conn.close()
+from config.db import (
+    get_attendance_db_vendor, get_placeholder, period_key, format_period_key, period_key_expr, period_range,
+    has_unique_period_key, fetch_data_from_db, fetch_columnar_from_db, stream_rows,
+    execute_db, transaction
+)
+from utils.cache import mark_tables_changed
+from services.rollup_service import get_monthly_summary, get_month_totals, refresh_month
 
 def get_total_days_in_month(attendance_month: str) -> int:
     """Tính tổng số ngày trong tháng từ AttendanceMonth (format: YYYY-MM-DD)"""
@@ -60,12 +17,13 @@ def get_total_days_in_month(attendance_month: str) -> int:
     except:
         return 30  # Default fallback
 
-def get_attendances(employee_id: Optional[int] = None, attendance_month: Optional[str] = None, year: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Lấy danh sách bản ghi chấm công với filter"""
+def _attendances_query(employee_id: Optional[int], attendance_month: Optional[str], year: Optional[int]) -> Tuple[str, Tuple[Any, ...], str]:
+    """Query danh sách chấm công theo filter: (query, params, vendor)"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
-    # Join với employees để lấy FullName
+    # Join với employees để lấy FullName; TotalDaysInMonth tính trong SQL (30 nếu thiếu tháng,
+    # giống get_total_days_in_month) nên kết quả dạng cột không cần điền lại trong Python
     if vendor == "sqlserver":
         query = """
         SELECT 
@@ -77,7 +35,7 @@ def get_attendances(employee_id: Optional[int] = None, attendance_month: Optiona
             a.AbsentDays,
             a.LeaveDays,
             a.CreatedAt,
-            DAY(EOMONTH(a.AttendanceMonth)) as TotalDaysInMonth
+            COALESCE(DAY(EOMONTH(a.AttendanceMonth)), 30) as TotalDaysInMonth
         FROM attendance a
         LEFT JOIN employees e ON a.EmployeeID = e.EmployeeID
         WHERE 1=1
@@ -94,7 +52,7 @@ def get_attendances(employee_id: Optional[int] = None, attendance_month: Optiona
             a.AbsentDays,
             a.LeaveDays,
             a.CreatedAt,
-            DAY(LAST_DAY(a.AttendanceMonth)) as TotalDaysInMonth
+            COALESCE(DAY(LAST_DAY(a.AttendanceMonth)), 30) as TotalDaysInMonth
         FROM attendance a
         LEFT JOIN employees e ON a.EmployeeID = e.EmployeeID
         WHERE 1=1
@@ -110,20 +68,35 @@ def get_attendances(employee_id: Optional[int] = None, attendance_month: Optiona
         query += f" AND a.AttendanceMonth = {placeholder}"
         params.append(attendance_month)
     elif year:
-        # Filter theo năm: AttendanceMonth LIKE 'YYYY-%'
-        query += f" AND a.AttendanceMonth LIKE {placeholder}"
-        params.append(f"{year}-%")
+        # Filter theo năm bằng khoảng khóa kỳ YYYY01..YYYY12 (dùng được index)
+        period_sql, period_params = period_range(vendor, "attendance", "a.AttendanceMonth", f"{year}-01", f"{year}-12")
+        query += f" AND {period_sql}"
+        params.extend(period_params)
         
     query += " ORDER BY a.AttendanceMonth DESC, a.EmployeeID"
     
-    result = fetch_data_from_db(query, tuple(params), vendor)
-    
-    # Đảm bảo TotalDaysInMonth được tính nếu SQL không trả về
-    for record in result:
-        if not record.get("TotalDaysInMonth"):
-            record["TotalDaysInMonth"] = get_total_days_in_month(str(record.get("AttendanceMonth", "")))
-    
-    return result
+    return query, tuple(params), vendor
+
+def _fill_total_days(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Đảm bảo TotalDaysInMonth được tính nếu SQL không trả về"""
+    if not record.get("TotalDaysInMonth"):
+        record["TotalDaysInMonth"] = get_total_days_in_month(str(record.get("AttendanceMonth", "")))
+    return record
+
+def get_attendances(employee_id: Optional[int] = None, attendance_month: Optional[str] = None, year: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Lấy danh sách bản ghi chấm công với filter"""
+    query, params, vendor = _attendances_query(employee_id, attendance_month, year)
+    return [_fill_total_days(record) for record in fetch_data_from_db(query, params, vendor)]
+
+def get_attendances_columnar(employee_id: Optional[int] = None, attendance_month: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
+    """Giống get_attendances nhưng trả về dạng cột {columns, rows}"""
+    query, params, vendor = _attendances_query(employee_id, attendance_month, year)
+    return fetch_columnar_from_db(query, params, vendor)
+
+def stream_attendances(employee_id: Optional[int] = None, attendance_month: Optional[str] = None, year: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Giống get_attendances nhưng đọc dần từng lô (dùng cho export)"""
+    query, params, vendor = _attendances_query(employee_id, attendance_month, year)
+    return (_fill_total_days(record) for record in stream_rows(query, params, vendor))
 
 from typing import Dict, Any
 from datetime import datetime
@@ -153,18 +126,25 @@ def normalize_attendance_month(attendance_month: str) -> str:
         raise ValueError(f"AttendanceMonth phải có format YYYY-MM hoặc YYYY-MM-DD. Received: {attendance_month}")
 
 
+def _read_attendance_fields(data: Dict[str, Any]) -> Tuple[Any, Any, Any, Any, Any]:
+    """Hỗ trợ nhiều format field names: (EmployeeID, AttendanceMonth, WorkDays, AbsentDays, LeaveDays)"""
+    return (
+        data.get("EmployeeID") or data.get("employee_id"),
+        data.get("AttendanceMonth") or data.get("attendance_month") or data.get("Month") or data.get("month"),
+        data.get("WorkDays") or data.get("work_days") or data.get("WorkingDays") or data.get("working_days") or 0,
+        data.get("AbsentDays") or data.get("absent_days") or 0,
+        data.get("LeaveDays") or data.get("leave_days") or 0,
+    )
+
+
 def create_attendance(data: Dict[str, Any]) -> Dict[str, Any]:
     """Tạo một bản ghi Timesheet (bảng chấm công) cho nhân viên/tháng"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     try:
         # Hỗ trợ nhiều format field names
-        employee_id = data.get("EmployeeID") or data.get("employee_id")
-        attendance_month = data.get("AttendanceMonth") or data.get("attendance_month") or data.get("Month") or data.get("month")
-        work_days = data.get("WorkDays") or data.get("work_days") or data.get("WorkingDays") or data.get("working_days") or 0
-        absent_days = data.get("AbsentDays") or data.get("absent_days") or 0
-        leave_days = data.get("LeaveDays") or data.get("leave_days") or 0
+        employee_id, attendance_month, work_days, absent_days, leave_days = _read_attendance_fields(data)
         
         # Convert sang int
         try:
@@ -218,16 +198,18 @@ def create_attendance(data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if vendor == "sqlserver":
                 query += " OUTPUT INSERTED.AttendanceID, INSERTED.EmployeeID, INSERTED.AttendanceMonth, INSERTED.WorkDays, INSERTED.AbsentDays, INSERTED.LeaveDays, INSERTED.CreatedAt"
-                print(f"Executing SQL Server query: {query}")
                 result = fetch_data_from_db(query, (employee_id, attendance_month, work_days, absent_days, leave_days), vendor)
+                mark_tables_changed("attendance")
+                refresh_month("attendance", attendance_month)
                 if result:
                     result[0]["message"] = "Timesheet created successfully"
                     return result[0]
                 raise Exception("Không thể tạo bản ghi chấm công (SQL Server) - không có kết quả trả về")
             else:
                 # MySQL
-                print(f"Executing MySQL query: {query}")
                 execute_db(query, (employee_id, attendance_month, work_days, absent_days, leave_days), vendor)
+                mark_tables_changed("attendance")
+                refresh_month("attendance", attendance_month)
                 # Lấy bản ghi vừa tạo
                 get_query = f"""
                 SELECT AttendanceID, EmployeeID, AttendanceMonth, WorkDays, AbsentDays, LeaveDays, CreatedAt
@@ -255,10 +237,160 @@ def create_attendance(data: Dict[str, Any]) -> Dict[str, Any]:
         raise Exception(f"Lỗi khi tạo chấm công: {str(e)}")
 
 
+# ------------------- Import hàng loạt -------------------
+
+# Số dòng mỗi câu upsert nhiều dòng (MERGE trên SQL Server dùng 6 tham số/dòng,
+# dưới giới hạn 2100 tham số mỗi câu lệnh)
+IMPORT_UPSERT_BATCH = 300
+# Số EmployeeID mỗi câu kiểm tra nhân viên tồn tại
+IMPORT_LOOKUP_BATCH = 1000
+
+
+def _parse_import_row(data: Dict[str, Any]) -> Tuple[int, str, int, int, int]:
+    """Kiểm tra và chuẩn hoá một dòng import; dữ liệu sai thì raise ValueError"""
+    employee_id, attendance_month, work_days, absent_days, leave_days = _read_attendance_fields(data)
+    if not employee_id or not attendance_month:
+        raise ValueError("Thiếu EmployeeID hoặc AttendanceMonth")
+    try:
+        employee_id = int(employee_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"EmployeeID không hợp lệ: {employee_id}")
+    days = []
+    for name, value in (("WorkDays", work_days), ("AbsentDays", absent_days), ("LeaveDays", leave_days)):
+        try:
+            number = int(str(value).strip() or 0)
+        except (ValueError, TypeError):
+            raise ValueError(f"{name} không hợp lệ: {value}")
+        if number < 0:
+            raise ValueError(f"{name} không được âm: {value}")
+        days.append(number)
+    return (employee_id, normalize_attendance_month(attendance_month), *days)
+
+
+def _existing_employee_ids(employee_ids: Iterable[int], vendor: str) -> set:
+    """Các EmployeeID trong danh sách có trong bảng employees (chỉ tra các ID của lô import)"""
+    placeholder = get_placeholder(vendor)
+    ids = sorted(set(employee_ids))
+    known = set()
+    for start in range(0, len(ids), IMPORT_LOOKUP_BATCH):
+        batch = ids[start:start + IMPORT_LOOKUP_BATCH]
+        query = f"SELECT EmployeeID FROM employees WHERE EmployeeID IN ({', '.join([placeholder] * len(batch))})"
+        known.update(row["EmployeeID"] for row in fetch_data_from_db(query, tuple(batch), vendor))
+    return known
+
+
+def _attendance_upsert(vendor: str, rows: List[Tuple[int, str, int, int, int]]) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Câu upsert nhiều dòng theo khoá (EmployeeID, PeriodKey): MERGE ... WITH (HOLDLOCK) trên SQL Server,
+    INSERT ... ON DUPLICATE KEY UPDATE trên MySQL (dựa trên khoá UNIQUE của
+    migrations/attendance_unique_period_mysql.sql)
+    """
+    placeholder = get_placeholder(vendor)
+    if vendor == "sqlserver":
+        period_expr = period_key_expr(vendor, "attendance", "t.AttendanceMonth")
+        values = ", ".join(["(" + ", ".join([placeholder] * 6) + ")"] * len(rows))
+        query = f"""
+        MERGE attendance WITH (HOLDLOCK) AS t
+        USING (VALUES {values}) AS s (EmployeeID, PeriodKey, AttendanceMonth, WorkDays, AbsentDays, LeaveDays)
+        ON t.EmployeeID = s.EmployeeID AND {period_expr} = s.PeriodKey
+        WHEN MATCHED THEN
+            UPDATE SET WorkDays = s.WorkDays, AbsentDays = s.AbsentDays, LeaveDays = s.LeaveDays
+        WHEN NOT MATCHED THEN
+            INSERT (EmployeeID, AttendanceMonth, WorkDays, AbsentDays, LeaveDays)
+            VALUES (s.EmployeeID, s.AttendanceMonth, s.WorkDays, s.AbsentDays, s.LeaveDays);
+        """
+        params = tuple(value for row in rows for value in (row[0], period_key(row[1]), *row[1:]))
+        return query, params
+
+    values = ", ".join(["(" + ", ".join([placeholder] * 5) + ")"] * len(rows))
+    query = f"""
+    INSERT INTO attendance (EmployeeID, AttendanceMonth, WorkDays, AbsentDays, LeaveDays)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        WorkDays = VALUES(WorkDays), AbsentDays = VALUES(AbsentDays), LeaveDays = VALUES(LeaveDays)
+    """
+    return query, tuple(value for row in rows for value in row)
+
+
+def _require_unique_period_key(vendor: str) -> None:
+    """ON DUPLICATE KEY UPDATE chỉ upsert được khi có khoá UNIQUE, thiếu khoá thì từ chối thay vì ghi trùng"""
+    if vendor != "sqlserver" and not has_unique_period_key(vendor, "attendance"):
+        raise RuntimeError(
+            "Bảng attendance chưa có khoá UNIQUE (EmployeeID, PeriodKey): "
+            "chạy migrations/attendance_unique_period_mysql.sql trước khi import"
+        )
+
+
+def import_attendances(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Import nhiều bản ghi chấm công (từ JSON array hoặc CSV) trong một transaction.
+    - Mỗi dòng được kiểm tra/chuẩn hoá tháng; dòng lỗi được trả về trong errors, không làm hỏng cả lô
+    - Upsert nhiều dòng theo (EmployeeID, tháng YYYY-MM của AttendanceMonth) bằng MERGE / ON DUPLICATE KEY,
+      nên import chạy song song (hoặc cùng lúc với create_attendance) không tạo bản ghi trùng
+      (cần migrations/attendance_unique_period_<vendor>.sql; MySQL thiếu khoá thì từ chối import)
+    - Trùng key trong cùng lô thì dòng sau ghi đè dòng trước
+    - inserted/updated đếm theo dữ liệu đọc trong transaction trước khi upsert
+    """
+    vendor = get_attendance_db_vendor()
+    placeholder = get_placeholder(vendor)
+
+    errors: List[Dict[str, Any]] = []
+    rows: Dict[Tuple[int, str], Tuple[int, Tuple[int, str, int, int, int]]] = {}
+    received = 0
+    for index, data in enumerate(records, start=1):
+        received = index
+        try:
+            row = _parse_import_row(data)
+        except ValueError as e:
+            errors.append({"row": index, "error": str(e)})
+            continue
+        rows[(row[0], row[1][:7])] = (index, row)
+
+    # Loại dòng có EmployeeID không tồn tại (tránh lỗi khoá ngoại làm rollback cả lô)
+    known_employees = _existing_employee_ids((key[0] for key in rows), vendor) if rows else set()
+    for key in [key for key in rows if key[0] not in known_employees]:
+        errors.append({"row": rows[key][0], "error": f"Không tìm thấy nhân viên {key[0]}"})
+        del rows[key]
+
+    months = sorted({key[1] for key in rows})
+    updated = 0
+    if rows:
+        _require_unique_period_key(vendor)
+        period_expr = period_key_expr(vendor, "attendance", "AttendanceMonth")
+        upserts = [row for _, row in rows.values()]
+        with transaction(vendor) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT EmployeeID, {period_expr} AS PeriodKey
+                    FROM attendance
+                    WHERE {period_expr} IN ({", ".join([placeholder] * len(months))})
+                """, tuple(period_key(month) for month in months))
+                existing = {(record[0], format_period_key(record[1])) for record in cursor.fetchall()}
+                updated = sum(1 for key in rows if key in existing)
+                for start in range(0, len(upserts), IMPORT_UPSERT_BATCH):
+                    cursor.execute(*_attendance_upsert(vendor, upserts[start:start + IMPORT_UPSERT_BATCH]))
+            finally:
+                cursor.close()
+
+        mark_tables_changed("attendance")
+        for month in months:
+            refresh_month("attendance", month)
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "received": received,
+        "inserted": len(rows) - updated,
+        "updated": updated,
+        "failed": len(errors),
+        "errors": errors,
+    }
+
+
 def get_attendance_by_id(attendance_id: int) -> Optional[Dict[str, Any]]:
     """Lấy chi tiết bản ghi chấm công theo ID"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     if vendor == "sqlserver":
         query = f"""
@@ -306,7 +438,7 @@ def get_attendance_by_id(attendance_id: int) -> Optional[Dict[str, Any]]:
 def update_attendance(attendance_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
     """Cập nhật bản ghi chấm công (ví dụ: điều chỉnh ngày nghỉ phép, ngày vắng mặt)"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Lấy thông tin hiện tại
     current_attendance = get_attendance_by_id(attendance_id)
@@ -333,6 +465,8 @@ def update_attendance(attendance_id: int, data: Dict[str, Any]) -> Dict[str, Any
     """
     
     execute_db(query, (new_work_days, new_absent_days, new_leave_days, attendance_id), vendor)
+    mark_tables_changed("attendance")
+    refresh_month("attendance", current_attendance.get("AttendanceMonth"))
     
     # Trả về bản ghi đã cập nhật
     updated = get_attendance_by_id(attendance_id)
@@ -343,7 +477,7 @@ def update_attendance(attendance_id: int, data: Dict[str, Any]) -> Dict[str, Any
 def delete_attendance(attendance_id: int) -> Dict[str, Any]:
     """Xóa bản ghi chấm công"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Lấy thông tin trước khi xóa
     attendance_record = get_attendance_by_id(attendance_id)
@@ -355,6 +489,8 @@ def delete_attendance(attendance_id: int) -> Dict[str, Any]:
     
     if rowcount == 0:
         raise Exception("Không tìm thấy bản ghi chấm công để xóa")
+    mark_tables_changed("attendance")
+    refresh_month("attendance", attendance_record.get("AttendanceMonth"))
     
     return {
         "message": f"Attendance record with ID {attendance_id} deleted successfully"
@@ -363,27 +499,15 @@ def delete_attendance(attendance_id: int) -> Dict[str, Any]:
 def get_attendance_statistics(attendance_month: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
     """Thống kê tổng số ngày công, vắng mặt theo tháng/quý"""
     vendor = get_attendance_db_vendor()
-    placeholder = _placeholder(vendor)
     
     if attendance_month:
-        # Thống kê theo tháng cụ thể
-        query = f"""
-        SELECT 
-            COUNT(*) as total_records,
-            SUM(WorkDays) as total_work_days,
-            SUM(AbsentDays) as total_absent_days,
-            SUM(LeaveDays) as total_leave_days
-        FROM attendance 
-        WHERE AttendanceMonth = {placeholder}
-        """
-        params = (attendance_month,)
-        result = fetch_data_from_db(query, params, vendor)
-        stats = result[0] if result else {}
+        # Thống kê theo tháng cụ thể (đọc từ rollup theo tháng)
+        stats = get_month_totals("attendance", attendance_month)
         
-        total_work_days = int(stats.get("total_work_days", 0) or 0)
-        total_absent_days = int(stats.get("total_absent_days", 0) or 0)
-        total_leave_days = int(stats.get("total_leave_days", 0) or 0)
-        total_records = int(stats.get("total_records", 0) or 0)
+        total_work_days = int(stats["WorkDays"]["sum"])
+        total_absent_days = int(stats["AbsentDays"]["sum"])
+        total_leave_days = int(stats["LeaveDays"]["sum"])
+        total_records = stats["count"]
         
         # Tính attendance_rate
         total_days = total_work_days + total_absent_days
@@ -403,59 +527,29 @@ def get_attendance_statistics(attendance_month: Optional[str] = None, year: Opti
         }
     elif year:
         # Thống kê theo năm - trả về dữ liệu theo tháng cho dashboard
-        monthly_query = f"""
-        SELECT 
-            AttendanceMonth as month,
-            COUNT(*) as employee_count,
-            SUM(WorkDays) as total_work_days,
-            SUM(AbsentDays) as total_absent_days,
-            SUM(LeaveDays) as total_leave_days
-        FROM attendance 
-        WHERE AttendanceMonth LIKE {placeholder}
-        GROUP BY AttendanceMonth
-        ORDER BY AttendanceMonth
-        """
-        monthly_params = (f"{year}-%",)
-        
+        # Đọc từ rollup theo tháng (tối đa 12 dòng) thay vì quét bảng attendance
         try:
-            monthly_data = fetch_data_from_db(monthly_query, monthly_params, vendor)
+            monthly_data = get_monthly_summary("attendance", year)
         except Exception as e:
             print(f"Error fetching monthly attendance data: {e}")
             monthly_data = []
         
-        # Tính tổng hợp cả năm
-        total_query = f"""
-        SELECT 
-            COUNT(*) as total_records,
-            SUM(WorkDays) as total_work_days,
-            SUM(AbsentDays) as total_absent_days,
-            SUM(LeaveDays) as total_leave_days
-        FROM attendance 
-        WHERE AttendanceMonth LIKE {placeholder}
-        """
-        try:
-            total_result = fetch_data_from_db(total_query, monthly_params, vendor)
-            total_stats = total_result[0] if total_result else {}
-        except Exception as e:
-            print(f"Error fetching total attendance stats: {e}")
-            total_stats = {}
-        
         # Format monthly_data để phù hợp với dashboard
         formatted_monthly_data = []
         for month_row in monthly_data:
             formatted_monthly_data.append({
-                "month": month_row.get("month", ""),
-                "employee_count": int(month_row.get("employee_count", 0)),
-                "total_work_days": int(month_row.get("total_work_days", 0) or 0),
-                "total_absent_days": int(month_row.get("total_absent_days", 0) or 0),
-                "total_leave_days": int(month_row.get("total_leave_days", 0) or 0)
+                "month": month_row["month"],
+                "employee_count": month_row["count"],
+                "total_work_days": int(month_row["WorkDays"]["sum"]),
+                "total_absent_days": int(month_row["AbsentDays"]["sum"]),
+                "total_leave_days": int(month_row["LeaveDays"]["sum"])
             })
         
-        # Tính tổng hợp
-        total_work_days = int(total_stats.get("total_work_days", 0) or 0)
-        total_absent_days = int(total_stats.get("total_absent_days", 0) or 0)
-        total_leave_days = int(total_stats.get("total_leave_days", 0) or 0)
-        total_records = int(total_stats.get("total_records", 0) or 0)
+        # Tổng hợp cả năm = cộng các tháng
+        total_work_days = sum(row["total_work_days"] for row in formatted_monthly_data)
+        total_absent_days = sum(row["total_absent_days"] for row in formatted_monthly_data)
+        total_leave_days = sum(row["total_leave_days"] for row in formatted_monthly_data)
+        total_records = sum(row["employee_count"] for row in formatted_monthly_data)
         
         # Tính attendance_rate
         total_days = total_work_days + total_absent_days
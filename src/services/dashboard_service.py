@@ -1,29 +1,18 @@
 from typing import Dict, Any, List
-from config.sqlserver_connection import get_sqlserver_connection
-from config.mysql_connection import get_mysql_connection
-import os
+from config.db import (
+	get_db_vendor, get_salary_db_vendor, get_attendance_db_vendor, get_placeholder,
+	month_key_expr, period_key_expr, period_range, format_period_key, limit_clause,
+	fetch_data_from_db, fetch_scalar_from_db
+)
+from utils.concurrency import run_concurrently
+from utils.cache import dashboard_cache, cached
+from services.reference_service import departments, positions
+from services.rollup_service import get_month_totals, get_year_totals
 import logging
 import calendar
 from datetime import datetime, timedelta
 
-def get_db_vendor() -> str:
-	return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
-
-def get_salary_db_vendor() -> str:
-	"""Trả về vendor cho database salary"""
-	return os.environ.get("SALARY_DB_VENDOR", "mysql").strip().lower()
-
-def get_attendance_db_vendor() -> str:
-	"""Trả về vendor cho database attendance"""
-	return os.environ.get("ATTENDANCE_DB_VENDOR", "mysql").strip().lower()
-
-def _get_connection(vendor: str):
-	if vendor == "mysql":
-		return get_mysql_connection()
-	return get_sqlserver_connection()
-
-def _placeholder(vendor: str) -> str:
-	return "?" if vendor == "sqlserver" else "%s"
+logger = logging.getLogger(__name__)
 
 def _get_previous_month(date: datetime) -> datetime:
 	"""Tính tháng trước của một ngày, không cần dateutil"""
@@ -56,153 +45,59 @@ def _get_last_day_of_month(year_month: str) -> str:
 		# Fallback: trả về ngày 28 (an toàn cho mọi tháng)
 		return f"{year_month}-28"
 
-def fetch_scalar_from_db(sql_query: str, params: tuple, vendor: str | None = None, return_float: bool = False) -> int | float:
-	conn = None
-	actual_vendor = vendor or get_db_vendor()
-	try:
-		conn = _get_connection(actual_vendor)
-		db_cursor = conn.cursor()
-		db_cursor.execute(sql_query, params)
-		row = db_cursor.fetchone()
-		if return_float:
-			return float(row[0]) if row and row[0] is not None else 0.0
-		return int(row[0]) if row and row[0] is not None else 0
-	except Exception as e:
-		print(f"Error in fetch_scalar_from_db: {e}, Query: {sql_query}, Params: {params}")
-		raise
-	finally:
-		if conn:
-			conn.close()
-
-def fetch_data_from_db(sql_query: str, params: tuple, vendor: str | None = None) -> List[Dict[str, Any]]:
-	"""Fetch multiple rows from database"""
-	conn = None
-	actual_vendor = vendor or get_db_vendor()
-	try:
-		conn = _get_connection(actual_vendor)
-		db_cursor = conn.cursor()
-		db_cursor.execute(sql_query, params)
-		columns = [column[0] for column in db_cursor.description]
-		return [dict(zip(columns, row)) for row in db_cursor.fetchall()]
-	except Exception as e:
-		print(f"Error in fetch_data_from_db: {e}, Query: {sql_query}, Params: {params}")
-		raise
-	finally:
-		if conn:
-			conn.close()
-
+@cached(dashboard_cache, tags=("employees", "departments", "positions", "salaries", "attendance", "dividends"))
 def get_dashboard_overview() -> Dict[str, Any]:
 	"""
-	Lấy thống kê tổng hợp cho dashboard
+	Lấy thống kê tổng hợp cho dashboard.
+	Các query độc lập (trải trên database chính, salary và attendance) được chạy
+	song song, nên thời gian phản hồi xấp xỉ query chậm nhất thay vì tổng các query.
+	Query nào lỗi thì trường tương ứng trả về 0.
 	"""
 	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
+	placeholder = get_placeholder(vendor)
 	
-	try:
-		# Tổng số nhân viên
-		total_employees_query = "SELECT COUNT(*) FROM employees"
-		total_employees = fetch_scalar_from_db(total_employees_query, (), vendor)
-	except Exception as e:
-		print(f"Error fetching total employees: {e}")
-		total_employees = 0
-	
-	try:
-		# Tổng số phòng ban
-		total_departments_query = "SELECT COUNT(*) FROM departments"
-		total_departments = fetch_scalar_from_db(total_departments_query, (), vendor)
-	except Exception as e:
-		print(f"Error fetching total departments: {e}")
-		total_departments = 0
-	
-	try:
-		# Tổng số chức vụ
-		total_positions_query = "SELECT COUNT(*) FROM positions"
-		total_positions = fetch_scalar_from_db(total_positions_query, (), vendor)
-	except Exception as e:
-		print(f"Error fetching total positions: {e}")
-		total_positions = 0
-	
-	# Tổng lương tháng hiện tại
-	# SalaryMonth là STRING (YYYY-MM), dùng LIKE
-	# Dùng salary_db_vendor vì salaries có thể ở database khác
-	salary_vendor = get_salary_db_vendor()
-	salary_placeholder = _placeholder(salary_vendor)
 	current_month = datetime.now().strftime("%Y-%m")
-	current_month_pattern = f"{current_month}-%"
-	total_salary_query = f"""
-		SELECT COALESCE(SUM(NetSalary), 0) 
-		FROM salaries 
-		WHERE SalaryMonth LIKE {salary_placeholder}
-	"""
-	try:
-		total_salary = fetch_scalar_from_db(total_salary_query, (current_month_pattern,), salary_vendor, return_float=True)
-	except Exception as e:
-		print(f"Error fetching total salary: {e}")
-		total_salary = 0.0
+	current_year = datetime.now().strftime("%Y")
 	
-	# Tổng số ngày công tháng hiện tại
-	# AttendanceMonth có thể là DATE hoặc STRING, dùng LIKE
-	# Dùng attendance_db_vendor vì attendance có thể ở database khác
-	attendance_vendor = get_attendance_db_vendor()
-	attendance_placeholder = _placeholder(attendance_vendor)
-	total_workdays_query = f"""
-		SELECT COALESCE(SUM(WorkDays), 0) 
-		FROM attendance 
-		WHERE AttendanceMonth LIKE {attendance_placeholder}
-	"""
-	try:
-		total_workdays = fetch_scalar_from_db(total_workdays_query, (current_month_pattern,), attendance_vendor)
-	except Exception as e:
-		print(f"Error fetching total workdays: {e}")
-		total_workdays = 0
+	# field -> (query, params)
+	count_queries = {
+		"total_employees": ("SELECT COUNT(*) FROM employees", ()),
+		"total_departments": ("SELECT COUNT(*) FROM departments", ()),
+		"total_positions": ("SELECT COUNT(*) FROM positions", ()),
+		"active_employees": (f"SELECT COUNT(*) FROM employees WHERE Status = {placeholder}", ("Đang làm việc",)),
+	}
+	tasks = {
+		field: (lambda q=query, p=params: fetch_scalar_from_db(q, p, vendor))
+		for field, (query, params) in count_queries.items()
+	}
+	# Tổng lương / ngày công tháng hiện tại và cổ tức năm hiện tại đọc từ rollup theo tháng
+	tasks["total_salary_current_month"] = lambda: get_month_totals("salaries", current_month)["NetSalary"]["sum"]
+	tasks["total_workdays_current_month"] = lambda: int(get_month_totals("attendance", current_month)["WorkDays"]["sum"])
+	tasks["total_dividends_current_year"] = lambda: get_year_totals("dividends", int(current_year))["DividendAmount"]["sum"]
 	
-	# Tổng số nhân viên đang làm việc
-	active_employees_query = f"SELECT COUNT(*) FROM employees WHERE Status = {placeholder}"
-	try:
-		active_employees = fetch_scalar_from_db(active_employees_query, ("Đang làm việc",), vendor)
-	except Exception as e:
-		print(f"Error fetching active employees: {e}")
-		active_employees = 0
-	
-	# Tổng cổ tức năm hiện tại
-	current_year = datetime.now().strftime("%Y")
-	# Xử lý khác nhau cho SQL Server và MySQL
-	if vendor == "sqlserver":
-		total_dividends_query = f"""
-			SELECT COALESCE(SUM(DividendAmount), 0) 
-			FROM dividends 
-			WHERE YEAR(DividendDate) = {placeholder}
-		"""
-	else:
-		total_dividends_query = f"""
-			SELECT COALESCE(SUM(DividendAmount), 0) 
-			FROM dividends 
-			WHERE YEAR(DividendDate) = {placeholder}
-		"""
-	try:
-		total_dividends = fetch_scalar_from_db(total_dividends_query, (current_year,), vendor, return_float=True)
-	except Exception as e:
-		print(f"Error fetching total dividends: {e}")
-		total_dividends = 0.0
+	results, errors = run_concurrently(tasks)
+	for field, error in errors.items():
+		logger.error(f"Error fetching {field}: {error}")
+		results[field] = 0.0 if field in ("total_salary_current_month", "total_dividends_current_year") else 0
 	
 	return {
-		"total_employees": total_employees,
-		"total_departments": total_departments,
-		"total_positions": total_positions,
-		"active_employees": active_employees,
+		"total_employees": results["total_employees"],
+		"total_departments": results["total_departments"],
+		"total_positions": results["total_positions"],
+		"active_employees": results["active_employees"],
 		"current_month": current_month,
 		"current_year": current_year,
-		"total_salary_current_month": total_salary,
-		"total_workdays_current_month": total_workdays,
-		"total_dividends_current_year": total_dividends
+		"total_salary_current_month": results["total_salary_current_month"],
+		"total_workdays_current_month": results["total_workdays_current_month"],
+		"total_dividends_current_year": results["total_dividends_current_year"]
 	}
 
+@cached(dashboard_cache, tags=("employees", "salaries", "attendance", "dividends"))
 def get_dashboard_comparison() -> Dict[str, Any]:
     """
     So sánh dữ liệu hiện tại với kỳ trước (tháng trước, năm trước)
     """
     vendor = get_db_vendor()
-    placeholder = _placeholder(vendor)
     
     current_month = datetime.now().strftime("%Y-%m")
     current_year = datetime.now().strftime("%Y")
@@ -247,16 +142,9 @@ def get_dashboard_comparison() -> Dict[str, Any]:
 
     # So sánh lương tháng hiện tại vs tháng trước
     try:
-        # SalaryMonth là STRING, dùng LIKE
-        # Dùng salary_db_vendor vì salaries có thể ở database khác
-        salary_vendor = get_salary_db_vendor()
-        salary_placeholder = _placeholder(salary_vendor)
-        current_month_pattern = f"{current_month}-%"
-        prev_month_pattern = f"{prev_month_date}-%"
-        query = f"SELECT COALESCE(SUM(NetSalary), 0) FROM salaries WHERE SalaryMonth LIKE {salary_placeholder}"
-
-        current_salary = fetch_scalar_from_db(query, (current_month_pattern,), salary_vendor, return_float=True)
-        prev_salary = fetch_scalar_from_db(query, (prev_month_pattern,), salary_vendor, return_float=True)
+        # Đọc từ rollup theo tháng
+        current_salary = get_month_totals("salaries", current_month)["NetSalary"]["sum"]
+        prev_salary = get_month_totals("salaries", prev_month_date)["NetSalary"]["sum"]
 
         salary_change = current_salary - prev_salary
         if prev_salary == 0 and current_salary > 0:
@@ -278,16 +166,9 @@ def get_dashboard_comparison() -> Dict[str, Any]:
 
     # So sánh ngày công
     try:
-        # AttendanceMonth có thể là DATE hoặc STRING, dùng LIKE
-        # Dùng attendance_db_vendor vì attendance có thể ở database khác
-        attendance_vendor = get_attendance_db_vendor()
-        attendance_placeholder = _placeholder(attendance_vendor)
-        current_month_pattern = f"{current_month}-%"
-        prev_month_pattern = f"{prev_month_date}-%"
-        query = f"SELECT COALESCE(SUM(WorkDays), 0) FROM attendance WHERE AttendanceMonth LIKE {attendance_placeholder}"
-
-        current_workdays = fetch_scalar_from_db(query, (current_month_pattern,), attendance_vendor)
-        prev_workdays = fetch_scalar_from_db(query, (prev_month_pattern,), attendance_vendor)
+        # Đọc từ rollup theo tháng
+        current_workdays = int(get_month_totals("attendance", current_month)["WorkDays"]["sum"])
+        prev_workdays = int(get_month_totals("attendance", prev_month_date)["WorkDays"]["sum"])
 
         workdays_change = current_workdays - prev_workdays
         if prev_workdays == 0 and current_workdays > 0:
@@ -307,10 +188,9 @@ def get_dashboard_comparison() -> Dict[str, Any]:
 
     # So sánh cổ tức năm hiện tại vs năm trước
     try:
-        query = f"SELECT COALESCE(SUM(DividendAmount), 0) FROM dividends WHERE YEAR(DividendDate) = {placeholder}"
-
-        current_dividends = fetch_scalar_from_db(query, (current_year,), vendor, return_float=True)
-        prev_dividends = fetch_scalar_from_db(query, (prev_year,), vendor, return_float=True)
+        # Đọc từ rollup theo tháng
+        current_dividends = get_year_totals("dividends", int(current_year))["DividendAmount"]["sum"]
+        prev_dividends = get_year_totals("dividends", int(prev_year))["DividendAmount"]["sum"]
 
         dividends_change = current_dividends - prev_dividends
         if prev_dividends == 0 and current_dividends > 0:
@@ -330,48 +210,33 @@ def get_dashboard_comparison() -> Dict[str, Any]:
 
     return result
 
+@cached(dashboard_cache, tags=("employees", "departments", "positions"))
 def get_top_employees(limit: int = 5) -> List[Dict[str, Any]]:
 	"""
 	Lấy top employees mới nhất (sắp xếp theo HireDate)
+	Tên phòng ban/chức vụ ghép từ cache tham chiếu thay vì LEFT JOIN
 	"""
 	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
 	
 	try:
+		top, limit_suffix = limit_clause(vendor, limit)
 		query = f"""
-			SELECT TOP {limit if vendor == "sqlserver" else ""}
+			SELECT {top}
 				e.EmployeeID,
 				e.FullName,
 				e.HireDate,
 				e.Email,
 				e.PhoneNumber,
 				e.Status,
-				COALESCE(d.DepartmentName, '') AS DepartmentName,
-				COALESCE(p.PositionName, '') AS PositionName
+				e.DepartmentID,
+				e.PositionID
 			FROM employees e
-			LEFT JOIN departments d ON e.DepartmentID = d.DepartmentID
-			LEFT JOIN positions p ON e.PositionID = p.PositionID
 			ORDER BY e.HireDate DESC
+			{limit_suffix}
 		"""
-		if vendor == "mysql":
-			query = f"""
-				SELECT 
-					e.EmployeeID,
-					e.FullName,
-					e.HireDate,
-					e.Email,
-					e.PhoneNumber,
-					e.Status,
-					COALESCE(d.DepartmentName, '') AS DepartmentName,
-					COALESCE(p.PositionName, '') AS PositionName
-				FROM employees e
-				LEFT JOIN departments d ON e.DepartmentID = d.DepartmentID
-				LEFT JOIN positions p ON e.PositionID = p.PositionID
-				ORDER BY e.HireDate DESC
-				LIMIT {limit}
-			"""
 		
 		rows = fetch_data_from_db(query, (), vendor)
+		department_names, position_names = departments.names(), positions.names()
 		
 		result = []
 		for row in rows:
@@ -382,8 +247,8 @@ def get_top_employees(limit: int = 5) -> List[Dict[str, Any]]:
 				"Email": row.get("Email"),
 				"PhoneNumber": row.get("PhoneNumber"),
 				"Status": row.get("Status"),
-				"DepartmentName": row.get("DepartmentName"),
-				"PositionName": row.get("PositionName")
+				"DepartmentName": department_names.get(row.get("DepartmentID")) or "",
+				"PositionName": position_names.get(row.get("PositionID")) or ""
 			})
 		
 		return result
@@ -391,58 +256,48 @@ def get_top_employees(limit: int = 5) -> List[Dict[str, Any]]:
 		print(f"Error fetching top employees: {e}")
 		return []
 
+@cached(dashboard_cache, tags=("employees", "departments"))
 def get_top_departments(limit: int = 5) -> List[Dict[str, Any]]:
 	"""
 	Lấy top departments có nhiều nhân viên nhất
 	"""
-	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
-	
 	try:
-		query = f"""
-			SELECT TOP {limit if vendor == "sqlserver" else ""}
-				d.DepartmentID,
-				d.DepartmentName,
-				COUNT(e.EmployeeID) AS EmployeeCount
-			FROM departments d
-			LEFT JOIN employees e ON d.DepartmentID = e.DepartmentID
-			GROUP BY d.DepartmentID, d.DepartmentName
-			ORDER BY EmployeeCount DESC
-		"""
-		if vendor == "mysql":
-			query = f"""
-				SELECT 
-					d.DepartmentID,
-					d.DepartmentName,
-					COUNT(e.EmployeeID) AS EmployeeCount
-				FROM departments d
-				LEFT JOIN employees e ON d.DepartmentID = e.DepartmentID
-				GROUP BY d.DepartmentID, d.DepartmentName
-				ORDER BY EmployeeCount DESC
-				LIMIT {limit}
-			"""
-		
-		rows = fetch_data_from_db(query, (), vendor)
-		
-		result = []
-		for row in rows:
-			result.append({
+		# get_department_statistics đã sắp xếp theo EmployeeCount giảm dần
+		from services.department_service import get_department_statistics
+		return [
+			{
 				"DepartmentID": row.get("DepartmentID"),
 				"DepartmentName": row.get("DepartmentName"),
 				"EmployeeCount": row.get("EmployeeCount") or 0
-			})
-		
-		return result
+			}
+			for row in get_department_statistics()[:limit]
+		]
 	except Exception as e:
 		print(f"Error fetching top departments: {e}")
 		return []
 
+def _calculated_months(months: int) -> List[str]:
+	"""Danh sách N tháng gần nhất tính từ tháng hiện tại (từ cũ đến mới)"""
+	current_date = datetime.now()
+	months_list = [_get_months_ago(current_date, i).strftime("%Y-%m") for i in range(months)]
+	months_list.reverse()
+	return months_list
+
+def _growth_rate(first: float, last: float) -> float | None:
+	if first > 0:
+		return round(((last - first) / first) * 100, 2)
+	return None
+
+@cached(dashboard_cache, tags=("employees", "salaries", "attendance"))
 def get_dashboard_trends(months: int = 6) -> Dict[str, Any]:
 	"""
-	Lấy xu hướng dữ liệu trong N tháng gần đây
+	Lấy xu hướng dữ liệu trong N tháng gần đây.
+	Mỗi chỉ số chỉ tốn một query GROUP BY theo tháng cho cả cửa sổ
+	(thay vì một query cho mỗi tháng), nên số round trip không tăng theo N.
 	"""
 	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
+	salary_vendor = get_salary_db_vendor()
+	attendance_vendor = get_attendance_db_vendor()
 	
 	result = {
 		"employee_trend": [],
@@ -451,180 +306,199 @@ def get_dashboard_trends(months: int = 6) -> Dict[str, Any]:
 	}
 	
 	try:
-		# Lấy các tháng có dữ liệu gần đây nhất từ database
-		# Thay vì tính từ tháng hiện tại, lấy các tháng thực tế có dữ liệu
-		# Dùng salary_db_vendor vì salaries có thể ở database khác
-		salary_vendor = get_salary_db_vendor()
-		months_list = []
+		# Salary trend: lấy luôn N tháng gần nhất có dữ liệu lương kèm tổng lương
+		# SalaryMonth là STRING (YYYY-MM hoặc YYYY-MM-DD) -> gom theo khóa YYYY-MM
+		salary_totals: Dict[str, float] = {}
 		try:
-			if salary_vendor == "sqlserver":
-				# SQL Server: Lấy các tháng có dữ liệu salary, extract YYYY-MM từ YYYY-MM-DD
-				# Thử LEFT trực tiếp (nếu là string) hoặc CONVERT (nếu là DATE)
-				# Nếu lỗi, sẽ fallback về cách tính tháng
-				try:
-					months_query = f"""
-						SELECT DISTINCT TOP {months}
-							LEFT(SalaryMonth, 7) AS MonthKey
-						FROM salaries
-						WHERE SalaryMonth IS NOT NULL
-						ORDER BY MonthKey DESC
-					"""
-					existing_months_data = fetch_data_from_db(months_query, (), salary_vendor)
-				except:
-					# Fallback: thử CONVERT nếu LEFT không work
-					months_query = f"""
-						SELECT DISTINCT TOP {months}
-							LEFT(CONVERT(VARCHAR(10), SalaryMonth, 120), 7) AS MonthKey
-						FROM salaries
-						WHERE SalaryMonth IS NOT NULL
-						ORDER BY MonthKey DESC
-					"""
-					existing_months_data = fetch_data_from_db(months_query, (), salary_vendor)
-			else:
-				# MySQL: Lấy các tháng có dữ liệu salary, extract YYYY-MM từ YYYY-MM-DD
-				months_query = f"""
-					SELECT DISTINCT
-						LEFT(SalaryMonth, 7) AS MonthKey
-					FROM salaries
-					WHERE SalaryMonth IS NOT NULL
-					ORDER BY MonthKey DESC
-					LIMIT {months}
-				"""
-				existing_months_data = fetch_data_from_db(months_query, (), salary_vendor)
-			
-			months_list = [m.get('MonthKey') or m.get('monthkey') for m in existing_months_data if m.get('MonthKey') or m.get('monthkey')]
-			months_list.reverse()  # Từ cũ đến mới
-			logging.info(f"Found {len(months_list)} months with salary data: {months_list}")
+			salary_period = period_key_expr(salary_vendor, "salaries", "SalaryMonth")
+			top, limit = limit_clause(salary_vendor, months)
+			salary_query = f"""
+				SELECT {top}
+					{salary_period} AS PeriodKey,
+					COALESCE(SUM(NetSalary), 0) AS Total
+				FROM salaries
+				WHERE SalaryMonth IS NOT NULL
+				GROUP BY {salary_period}
+				ORDER BY PeriodKey DESC
+				{limit}
+			"""
+			for row in fetch_data_from_db(salary_query, (), salary_vendor):
+				period = row.get("PeriodKey") or row.get("periodkey")
+				if period:
+					salary_totals[format_period_key(period)] = float(row.get("Total") or 0)
+			months_list = sorted(salary_totals)
 		except Exception as e:
-			logging.warning(f"Could not fetch months from database, using calculated months: {e}")
-			# Fallback: Tính các tháng gần đây từ tháng hiện tại
-			current_date = datetime.now()
-			logging.info(f"Current date: {current_date.strftime('%Y-%m-%d')}")
-			for i in range(months):
-				month_date = _get_months_ago(current_date, i)
-				month_str = month_date.strftime("%Y-%m")
-				months_list.append(month_str)
-			months_list.reverse()
-			logging.info(f"Using calculated months (oldest to newest): {months_list}")
+			logging.warning(f"Could not fetch salary months from database, using calculated months: {e}")
+			months_list = []
 		
-		# Employee trend - đếm số nhân viên đến cuối mỗi tháng
-		employee_trend = []
-		for month in months_list:
-			try:
-				# Tính ngày cuối cùng của tháng (không phải cố định -31)
-				month_end = _get_last_day_of_month(month)
-				query = f"SELECT COUNT(*) FROM employees WHERE HireDate <= {placeholder}"
-				if vendor == "mysql":
-					query = f"SELECT COUNT(*) FROM employees WHERE HireDate <= %s"
-				count = fetch_scalar_from_db(query, (month_end,), vendor)
-				logging.info(f"Employee trend for {month} (end date: {month_end}): {count}")
-				employee_trend.append({
-					"month": month,
-					"count": count
-				})
-			except Exception as e:
-				logging.error(f"Error fetching employee trend for {month}: {e}", exc_info=True)
-				employee_trend.append({
-					"month": month,
-					"count": 0
-				})
-		result["employee_trend"] = employee_trend
+		if not months_list:
+			months_list = _calculated_months(months)
+		
+		first_month, last_month = months_list[0], months_list[-1]
 		
-		# Debug: Lấy danh sách các SalaryMonth có trong database
+		result["salary_trend"] = [
+			{"month": month, "total": round(salary_totals.get(month, 0.0), 2)}
+			for month in months_list
+		]
+		
+		# Employee trend: số nhân viên tích lũy đến cuối mỗi tháng
+		# Một query đếm số người được tuyển theo tháng, cộng dồn trong một lượt
 		try:
-			if salary_vendor == "sqlserver":
-				debug_query = "SELECT DISTINCT TOP 20 SalaryMonth FROM salaries ORDER BY SalaryMonth DESC"
-			else:
-				debug_query = "SELECT DISTINCT SalaryMonth FROM salaries ORDER BY SalaryMonth DESC LIMIT 20"
-			existing_months = fetch_data_from_db(debug_query, (), salary_vendor)
-			logging.info(f"Existing SalaryMonth values in database: {[m.get('SalaryMonth') for m in existing_months]}")
+			hire_key = month_key_expr(vendor, "HireDate")
+			hires_query = f"""
+				SELECT {hire_key} AS MonthKey, COUNT(*) AS Hires
+				FROM employees
+				WHERE HireDate <= {get_placeholder(vendor)}
+				GROUP BY {hire_key}
+			"""
+			hires_rows = fetch_data_from_db(hires_query, (_get_last_day_of_month(last_month),), vendor)
+			hires = sorted(
+				(str(row.get("MonthKey")), int(row.get("Hires") or 0))
+				for row in hires_rows if row.get("MonthKey")
+			)
+			employee_trend = []
+			running_total = 0
+			index = 0
+			for month in months_list:
+				while index < len(hires) and hires[index][0] <= month:
+					running_total += hires[index][1]
+					index += 1
+				employee_trend.append({"month": month, "count": running_total})
 		except Exception as e:
-			logging.warning(f"Could not fetch existing SalaryMonth values: {e}")
-		
-		# Salary trend - tổng lương mỗi tháng
-		# SalaryMonth là STRING (YYYY-MM hoặc YYYY-MM-DD), không phải DATE, nên dùng LIKE
-		salary_placeholder = _placeholder(salary_vendor)
-		salary_trend = []
-		for month in months_list:
-			try:
-				# Dùng LIKE để match cả YYYY-MM và YYYY-MM-DD
-				month_pattern = f"{month}-%"
-				query = f"SELECT COALESCE(SUM(NetSalary), 0) FROM salaries WHERE SalaryMonth LIKE {salary_placeholder}"
-				total = fetch_scalar_from_db(query, (month_pattern,), salary_vendor, return_float=True)
-				logging.info(f"Salary trend for {month} (pattern: {month_pattern}): {total}")
-				salary_trend.append({
-					"month": month,
-					"total": round(total, 2)
-				})
-			except Exception as e:
-				logging.error(f"Error fetching salary trend for {month}: {e}", exc_info=True)
-				salary_trend.append({
-					"month": month,
-					"total": 0.0
-				})
-		result["salary_trend"] = salary_trend
+			logging.error(f"Error fetching employee trend: {e}", exc_info=True)
+			employee_trend = [{"month": month, "count": 0} for month in months_list]
+		result["employee_trend"] = employee_trend
 		
-		# Workdays trend - tổng ngày công mỗi tháng
-		# AttendanceMonth có thể là DATE hoặc STRING, thử cả hai cách
-		# Dùng attendance_db_vendor vì attendance có thể ở database khác
-		attendance_vendor = get_attendance_db_vendor()
-		attendance_placeholder = _placeholder(attendance_vendor)
-		workdays_trend = []
-		for month in months_list:
-			try:
-				# Thử dùng LIKE trước (nếu là string)
-				month_pattern = f"{month}-%"
-				query = f"SELECT COALESCE(SUM(WorkDays), 0) FROM attendance WHERE AttendanceMonth LIKE {attendance_placeholder}"
-				total = fetch_scalar_from_db(query, (month_pattern,), attendance_vendor)
-				logging.info(f"Workdays trend for {month} (LIKE pattern: {month_pattern}): {total}")
-				workdays_trend.append({
-					"month": month,
-					"total": total
-				})
-			except Exception as e:
-				logging.error(f"Error fetching workdays trend for {month} with LIKE: {e}")
-				# Fallback: thử dùng YEAR và MONTH (nếu là DATE)
-				try:
-					year, month_num = month.split("-")
-					year_int = int(year)
-					month_int = int(month_num)
-					query = f"SELECT COALESCE(SUM(WorkDays), 0) FROM attendance WHERE YEAR(AttendanceMonth) = {attendance_placeholder} AND MONTH(AttendanceMonth) = {attendance_placeholder}"
-					total = fetch_scalar_from_db(query, (year_int, month_int), attendance_vendor)
-					logging.info(f"Workdays trend for {month} (YEAR/MONTH fallback): {total}")
-					workdays_trend.append({
-						"month": month,
-						"total": total
-					})
-				except Exception as e2:
-					logging.error(f"Error in fallback query for {month}: {e2}")
-					workdays_trend.append({
-						"month": month,
-						"total": 0
-					})
+		# Workdays trend: tổng ngày công theo tháng trong cửa sổ
+		# AttendanceMonth có thể là DATE hoặc STRING -> gom theo khóa YYYY-MM
+		try:
+			attendance_period = period_key_expr(attendance_vendor, "attendance", "AttendanceMonth")
+			attendance_range, attendance_params = period_range(
+				attendance_vendor, "attendance", "AttendanceMonth", first_month, last_month
+			)
+			workdays_query = f"""
+				SELECT {attendance_period} AS PeriodKey, COALESCE(SUM(WorkDays), 0) AS Total
+				FROM attendance
+				WHERE {attendance_range}
+				GROUP BY {attendance_period}
+			"""
+			workdays_totals = {
+				format_period_key(row.get("PeriodKey")): int(row.get("Total") or 0)
+				for row in fetch_data_from_db(workdays_query, attendance_params, attendance_vendor)
+				if row.get("PeriodKey")
+			}
+			workdays_trend = [{"month": month, "total": workdays_totals.get(month, 0)} for month in months_list]
+		except Exception as e:
+			logging.error(f"Error fetching workdays trend: {e}", exc_info=True)
+			workdays_trend = [{"month": month, "total": 0} for month in months_list]
 		result["workdays_trend"] = workdays_trend
 		
 		# Tính growth rate
 		if len(employee_trend) >= 2:
-			first_count = employee_trend[0]["count"]
-			last_count = employee_trend[-1]["count"]
-			if first_count > 0:
-				growth_rate = ((last_count - first_count) / first_count) * 100
-				result["employee_growth_rate"] = round(growth_rate, 2)
+			growth_rate = _growth_rate(employee_trend[0]["count"], employee_trend[-1]["count"])
+			if growth_rate is not None:
+				result["employee_growth_rate"] = growth_rate
 		
+		salary_trend = result["salary_trend"]
 		if len(salary_trend) >= 2:
-			first_total = salary_trend[0]["total"]
-			last_total = salary_trend[-1]["total"]
-			if first_total > 0:
-				growth_rate = ((last_total - first_total) / first_total) * 100
-				result["salary_growth_rate"] = round(growth_rate, 2)
-		
-		logging.info(f"Trends result: employee={len(employee_trend)}, salary={len(salary_trend)}, workdays={len(workdays_trend)}")
+			growth_rate = _growth_rate(salary_trend[0]["total"], salary_trend[-1]["total"])
+			if growth_rate is not None:
+				result["salary_growth_rate"] = growth_rate
 		
 	except Exception as e:
 		logging.error(f"Error fetching trends: {e}", exc_info=True)
-		print(f"Error fetching trends: {e}")
-		import traceback
-		traceback.print_exc()
 	
 	return result
 
+# ------------------- Dashboard bundle -------------------
+
+# Các section dashboard.js cần cho từng vai trò
+BUNDLE_SECTIONS = {
+	"HR_MANAGER": [
+		"overview", "attendance_stats", "department_stats", "employees", "positions",
+		"employee_stats", "comparison", "top_employees", "top_departments", "trends"
+	],
+	"PAYROLL_MANAGER": [
+		"overview", "salary_stats", "dividends", "financial_report", "comparison", "trends"
+	],
+	"ADMIN": [
+		"overview", "salary_stats", "attendance_stats", "department_stats", "employees",
+		"dividends", "financial_report", "comparison", "top_employees", "top_departments", "trends"
+	],
+}
+
+def _bundle_section_loaders(role: str, year: int) -> Dict[str, Any]:
+	"""section -> hàm không tham số trả về dữ liệu giống endpoint riêng lẻ tương ứng"""
+	# Import tại đây để các service khác không phải nạp khi chỉ dùng dashboard đơn lẻ
+	from services.salarie_service import get_salary_statistics
+	from services.attendance_service import get_attendance_statistics
+	from services.department_service import get_department_statistics
+	from services.employee_service import get_all_employees, get_employee_statistics
+	from services.position_service import get_positions
+	from services.dividend_service import get_dividends
+	from services.report_service import get_financial_report
+	
+	return {
+		"overview": get_dashboard_overview,
+		"salary_stats": lambda: get_salary_statistics(year=year),
+		"attendance_stats": lambda: get_attendance_statistics(year=year),
+		"department_stats": get_department_statistics,
+		"employees": lambda: get_all_employees(page=1, size=10 if role == "HR_MANAGER" else 5),
+		"positions": get_positions,
+		"employee_stats": get_employee_statistics,
+		"dividends": get_dividends,
+		"financial_report": lambda: get_financial_report(str(year)),
+		"comparison": get_dashboard_comparison,
+		"top_employees": lambda: get_top_employees(5),
+		"top_departments": lambda: get_top_departments(5),
+		"trends": lambda: get_dashboard_trends(6),
+	}
+
+def get_dashboard_bundle(role: str, year: int) -> Dict[str, Any]:
+	"""
+	Tính tất cả section dashboard của một vai trò trong một request.
+	Các section chạy song song trên worker pool dùng chung (dùng chung pool kết nối),
+	top_departments được cắt từ department_stats khi cả hai cùng có mặt.
+	Mỗi section trả về {"success": True, "data": ...} hoặc {"success": False, "error": ...}
+	để một section lỗi không làm hỏng cả bundle.
+	"""
+	sections = BUNDLE_SECTIONS[role]
+	loaders = _bundle_section_loaders(role, year)
+	
+	derive_top_departments = "top_departments" in sections and "department_stats" in sections
+	tasks = {
+		name: loaders[name]
+		for name in sections
+		if not (derive_top_departments and name == "top_departments")
+	}
+	results, errors = run_concurrently(tasks)
+	
+	if derive_top_departments:
+		if "department_stats" in results:
+			results["top_departments"] = [
+				{
+					"DepartmentID": row.get("DepartmentID"),
+					"DepartmentName": row.get("DepartmentName"),
+					"EmployeeCount": row.get("EmployeeCount") or 0
+				}
+				for row in results["department_stats"][:5]
+			]
+		else:
+			results["top_departments"] = get_top_departments(5)
+	
+	payload: Dict[str, Any] = {}
+	for name in sections:
+		if name in errors:
+			logging.error(f"Error building dashboard bundle section {name}: {errors[name]}")
+			payload[name] = {
+				"success": False,
+				"error": {"code": "INTERNAL_SERVER", "message": str(errors[name])}
+			}
+		else:
+			payload[name] = {"success": True, "data": results[name]}
+	
+	return {
+		"role": role,
+		"year": year,
+		"sections": payload
+	}
@@ -1,74 +1,23 @@
 # src/services/department_service.py
 
-import os
-from typing import Any, Dict, List, Tuple
-from config.sqlserver_connection import get_sqlserver_connection
-from config.mysql_connection import get_mysql_connection
-
-# ------------------- Helper functions -------------------
-
-def get_db_vendor() -> str:
-    """Trả về vendor hiện tại: sqlserver hoặc mysql"""
-    return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
-
-def _get_connection(vendor: str):
-    """Tạo connection dựa theo vendor"""
-    if vendor == "mysql":
-        return get_mysql_connection()
-    return get_sqlserver_connection()
-
-def _placeholder(vendor: str) -> str:
-    """Trả về ký tự placeholder cho query"""
-    return "?" if vendor == "sqlserver" else "%s"
-
-def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str | None = None) -> List[Dict[str, Any]]:
-    """Lấy danh sách records từ DB"""
-    conn = None
-    actual_vendor = vendor or get_db_vendor()
-    try:
-        conn = _get_connection(actual_vendor)
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    except Exception as e:
-        raise Exception(f"Lỗi DB: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def fetch_scalar_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str | None = None) -> int:
-    """Lấy giá trị scalar từ DB"""
-    conn = None
-    actual_vendor = vendor or get_db_vendor()
-    try:
-        conn = _get_connection(actual_vendor)
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        row = cursor.fetchone()
-        return int(row[0]) if row else 0
-    finally:
-        if conn:
-            conn.close()
+from typing import Any, Dict, List
+from config.db import get_db_vendor, get_connection, fetch_data_from_db
+from utils.cache import mark_tables_changed
+from services.reference_service import departments
 
 # ------------------- Department Service -------------------
 
 def get_departments() -> List[Dict[str, Any]]:
-    """Lấy danh sách phòng ban"""
-    vendor = get_db_vendor()
-    query = "SELECT DepartmentID, DepartmentName FROM departments"
-    return fetch_data_from_db(query, (), vendor)
+    """Lấy danh sách phòng ban (từ cache tham chiếu trong bộ nhớ)"""
+    return departments.all()
 
 def get_department_by_id(department_id: int) -> Dict[str, Any] | None:
     """Xem chi tiết phòng ban"""
-    vendor = get_db_vendor()
-    query = "SELECT DepartmentID, DepartmentName FROM departments WHERE DepartmentID = " + _placeholder(vendor)
-    rows = fetch_data_from_db(query, (department_id,), vendor)
-    return rows[0] if rows else None
+    return departments.get(department_id)
 
 def create_department(name: str) -> int:
-    conn_sqlserver = get_sqlserver_connection()  # autocommit=False mặc định
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")  # autocommit=False mặc định
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -89,6 +38,7 @@ def create_department(name: str) -> int:
         # Commit cả 2 DB
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("departments")
         return int(new_id)
     except Exception as e:
         conn_sqlserver.rollback()
@@ -102,8 +52,8 @@ def create_department(name: str) -> int:
 
 
 def update_department(department_id: int, name: str) -> int:
-    conn_sqlserver = get_sqlserver_connection()
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -123,6 +73,7 @@ def update_department(department_id: int, name: str) -> int:
         # Commit cả 2 DB
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("departments")
         return 1
     except Exception as e:
         conn_sqlserver.rollback()
@@ -135,8 +86,8 @@ def update_department(department_id: int, name: str) -> int:
         conn_mysql.close()
 
 def delete_department(department_id: int) -> int:
-    conn_sqlserver = get_sqlserver_connection()
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -163,6 +114,7 @@ def delete_department(department_id: int) -> int:
 
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("departments")
         return cursor_sql.rowcount
 
     except Exception as e:
@@ -182,29 +134,27 @@ def get_department_statistics() -> List[Dict[str, Any]]:
     vendor = get_db_vendor()
     
     try:
-        # Query đếm số nhân viên theo từng phòng ban
+        # Query đếm số nhân viên theo từng phòng ban, tên phòng ban ghép từ cache tham chiếu
         query = """
-        SELECT 
-            d.DepartmentID,
-            d.DepartmentName,
-            COUNT(e.EmployeeID) AS EmployeeCount
-        FROM departments d
-        LEFT JOIN employees e ON d.DepartmentID = e.DepartmentID
-        GROUP BY d.DepartmentID, d.DepartmentName
-        ORDER BY EmployeeCount DESC, d.DepartmentName
+        SELECT DepartmentID, COUNT(*) AS EmployeeCount
+        FROM employees
+        WHERE DepartmentID IS NOT NULL
+        GROUP BY DepartmentID
         """
         
-        results = fetch_data_from_db(query, (), vendor)
+        counts = {row["DepartmentID"]: row.get("EmployeeCount") or 0 for row in fetch_data_from_db(query, (), vendor)}
         
-        # Format kết quả
-        return [
+        # Format kết quả (phòng ban chưa có nhân viên vẫn có mặt với EmployeeCount = 0)
+        results = [
             {
-                "DepartmentID": row.get("DepartmentID"),
-                "DepartmentName": row.get("DepartmentName"),
-                "EmployeeCount": row.get("EmployeeCount", 0),
+                "DepartmentID": department["DepartmentID"],
+                "DepartmentName": department["DepartmentName"],
+                "EmployeeCount": counts.get(department["DepartmentID"], 0),
                 "Date": None  # Có thể thêm ngày nếu cần
             }
-            for row in results
+            for department in departments.all()
         ]
+        results.sort(key=lambda row: (-row["EmployeeCount"], row["DepartmentName"] or ""))
+        return results
     except Exception as e:
         raise Exception(f"Lỗi khi lấy thống kê phòng ban: {e}")
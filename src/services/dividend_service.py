@@ -1,40 +1,43 @@
 import datetime
 from typing import Any, Dict, List, Optional
-from config.sqlserver_connection import get_sqlserver_connection
+from config.db import (
+    get_dividend_db_vendor, get_placeholder, get_connection, fetch_columnar_from_db, fetch_data_from_db as _fetch_data_from_db
+)
+from utils.cache import mark_tables_changed
+from services.rollup_service import refresh_month
 
 # ------------------- Helper -------------------
 
+# Dividends chỉ nằm trên SQL Server
+DIVIDEND_DB_VENDOR = get_dividend_db_vendor()
+
 def _placeholder() -> str:
     """Placeholder cho SQL Server"""
-    return "?"
+    return get_placeholder(DIVIDEND_DB_VENDOR)
 
 def fetch_data_from_db(sql_query: str, params: tuple = ()) -> List[Dict[str, Any]]:
     """Lấy danh sách dữ liệu từ SQL Server"""
-    conn = None
-    try:
-        conn = get_sqlserver_connection()
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    finally:
-        if conn:
-            conn.close()
+    return _fetch_data_from_db(sql_query, params, DIVIDEND_DB_VENDOR)
 
 # ------------------- Dividend Service -------------------
 
-def get_dividends() -> List[Dict[str, Any]]:
-    """Lấy danh sách các đợt chi cổ tức từ SQL Server"""
-    query = """
+_DIVIDENDS_QUERY = """
     SELECT DividendID, EmployeeID, DividendAmount, DividendDate, CreatedAt
     FROM dividends 
     ORDER BY DividendDate DESC, DividendID
     """
-    return fetch_data_from_db(query)
+
+def get_dividends() -> List[Dict[str, Any]]:
+    """Lấy danh sách các đợt chi cổ tức từ SQL Server"""
+    return fetch_data_from_db(_DIVIDENDS_QUERY)
+
+def get_dividends_columnar() -> Dict[str, Any]:
+    """Giống get_dividends nhưng trả về dạng cột {columns, rows}"""
+    return fetch_columnar_from_db(_DIVIDENDS_QUERY, (), DIVIDEND_DB_VENDOR)
 
 def create_dividend(data: Dict[str, Any]) -> Dict[str, Any]:
     """Thêm mới một đợt chi cổ tức vào SQL Server"""
-    conn = get_sqlserver_connection()
+    conn = get_connection(DIVIDEND_DB_VENDOR)
     try:
         cursor = conn.cursor()
         conn.autocommit = False
@@ -56,6 +59,8 @@ def create_dividend(data: Dict[str, Any]) -> Dict[str, Any]:
 
         columns = [col[0] for col in cursor.description]
         conn.commit()
+        mark_tables_changed("dividends")
+        refresh_month("dividends", dividend_date)
         return {**dict(zip(columns, result)), "message": "Dividend record created"}
 
     except Exception as e:
@@ -77,7 +82,7 @@ def get_dividend_by_id(dividend_id: int) -> Optional[Dict[str, Any]]:
 
 def delete_dividend(dividend_id: int) -> Dict[str, Any]:
     """Xóa đợt chi cổ tức trên SQL Server"""
-    conn = get_sqlserver_connection()
+    conn = get_connection(DIVIDEND_DB_VENDOR)
     try:
         cursor = conn.cursor()
         conn.autocommit = False
@@ -90,6 +95,8 @@ def delete_dividend(dividend_id: int) -> Dict[str, Any]:
         cursor.execute(query, (dividend_id,))
 
         conn.commit()
+        mark_tables_changed("dividends")
+        refresh_month("dividends", dividend_record.get("DividendDate"))
         return {
             "message": f"Dividend record with ID {dividend_id} deleted successfully",
             "deleted_record": dividend_record
@@ -103,7 +110,7 @@ def delete_dividend(dividend_id: int) -> Dict[str, Any]:
         conn.close()
 def update_dividend_record(dividend_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
     """Cập nhật thông tin một đợt chi cổ tức trong SQL Server"""
-    conn = get_sqlserver_connection()
+    conn = get_connection(DIVIDEND_DB_VENDOR)
     try:
         cursor = conn.cursor()
         conn.autocommit = False
@@ -142,6 +149,10 @@ def update_dividend_record(dividend_id: int, data: Dict[str, Any]) -> Dict[str,
 
         columns = [col[0] for col in cursor.description]
         conn.commit()
+        mark_tables_changed("dividends")
+        refresh_month("dividends", existing.get("DividendDate"))
+        if str(dividend_date)[:7] != str(existing.get("DividendDate"))[:7]:
+            refresh_month("dividends", dividend_date)
         return {**dict(zip(columns, result)), "message": "Dividend record updated successfully"}
 
     except Exception as e:
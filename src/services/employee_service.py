@@ -1,107 +1,100 @@
-import os
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List
+import base64
 import datetime
-from config.sqlserver_connection import get_sqlserver_connection
-from config.mysql_connection import get_mysql_connection
-
-def get_db_vendor() -> str:
-	return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
-
-
-def get_salary_db_vendor() -> str:
-	return os.environ.get("SALARY_DB_VENDOR", get_db_vendor()).strip().lower()
-
-
-def _get_connection(vendor: str):
-	if vendor == "mysql":
-		return get_mysql_connection()
-	return get_sqlserver_connection()
-
-
-def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str | None = None):
-	conn = None
-	actual_vendor = vendor or get_db_vendor()
+import functools
+import json
+import logging
+import os
+from config.db import (
+	get_db_vendor, get_salary_db_vendor, get_placeholder, get_connection,
+	period_key_expr, fetch_data_from_db, fetch_columnar_from_db, fetch_scalar_from_db
+)
+from utils.concurrency import run_concurrently
+from utils.cache import mark_tables_changed, employee_count_cache
+from services.rollup_service import invalidate_rollups
+from services.reference_service import departments, positions
+
+logger = logging.getLogger(__name__)
+
+def _latest_salary_chunk_size() -> int:
 	try:
-		conn = _get_connection(actual_vendor)
-		db_cursor = conn.cursor()
-		db_cursor.execute(sql_query, params)
-		columns = [column[0] for column in db_cursor.description]
-		return [dict(zip(columns, row)) for row in db_cursor.fetchall()]
-	except Exception as e:
-		raise Exception(f"Lỗi DTB: {e}")
-	finally:
-		if conn:
-			conn.close()
+		return max(1, int(os.environ.get("LATEST_SALARY_CHUNK_SIZE", "512")))
+	except ValueError:
+		return 512
 
 
-def fetch_scalar_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str | None = None) -> int:
-	conn = None
-	actual_vendor = vendor or get_db_vendor()
-	try:
-		conn = _get_connection(actual_vendor)
-		db_cursor = conn.cursor()
-		db_cursor.execute(sql_query, params)
-		row = db_cursor.fetchone()
-		return int(row[0]) if row else 0
-	finally:
-		if conn:
-			conn.close()
+def _chunk_bucket(count: int, max_size: int) -> int:
+	"""
+	Kích thước chunk cố định (lũy thừa của 2: 1, 2, 4, ... 512, tối đa max_size) để câu lệnh
+	được dùng lại mà phần ID lặp để đủ kích thước luôn dưới một nửa chunk
+	"""
+	size = 1
+	while size < count and size < max_size:
+		size *= 2
+	return min(size, max_size)
 
 
-def _placeholder(vendor: str) -> str:
-	return "?" if vendor == "sqlserver" else "%s"
+def _latest_salary_query(vendor: str, chunk_size: int) -> str:
+	"""
+	Câu lệnh lấy bản ghi lương mới nhất cho chunk_size nhân viên.
+	Một text SQL cho mỗi (vendor, chunk_size) nên DB tái sử dụng được plan/prepared statement.
+	Biểu thức tháng được xác định mỗi lần gọi (không bị cache theo lần kiểm tra PeriodKey đầu tiên).
+	"""
+	# Xử lý cả format YYYY-MM và YYYY-MM-DD
+	return _build_latest_salary_query(vendor, chunk_size, period_key_expr(vendor, "salaries", "s.SalaryMonth"))
+
+
+@functools.lru_cache(maxsize=256)
+def _build_latest_salary_query(vendor: str, chunk_size: int, period_expr: str) -> str:
+	"""ROW_NUMBER() với SalaryID làm tie-break đảm bảo đúng một dòng cho mỗi nhân viên"""
+	placeholder = get_placeholder(vendor)
+	in_clause = ", ".join([placeholder] * chunk_size)
+	return f"""
+	SELECT EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary
+	FROM (
+		SELECT s.EmployeeID,
+		       s.SalaryMonth,
+		       s.BaseSalary,
+		       s.Bonus,
+		       s.Deductions,
+		       s.NetSalary,
+		       ROW_NUMBER() OVER (PARTITION BY s.EmployeeID ORDER BY {period_expr} DESC, s.SalaryID DESC) AS rn
+		FROM salaries s
+		WHERE s.EmployeeID IN ({in_clause})
+	) ranked
+	WHERE rn = 1
+	"""
 
 
 def fetch_latest_salaries(employee_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-	if not employee_ids:
+	"""
+	Lương mới nhất của từng nhân viên: {EmployeeID: {...}}.
+	Danh sách ID được chia thành các chunk tối đa LATEST_SALARY_CHUNK_SIZE; mỗi chunk được lặp ID cuối
+	cho đủ kích thước bucket gần nhất (_chunk_bucket) và các chunk chạy song song, tránh giới hạn
+	2100 tham số của SQL Server.
+	"""
+	unique_ids = list(dict.fromkeys(employee_id for employee_id in employee_ids if employee_id is not None))
+	if not unique_ids:
 		return {}
 
 	vendor = get_salary_db_vendor()
-	placeholder = _placeholder(vendor)
-	in_clause = ", ".join([placeholder] * len(employee_ids))
+	max_size = _latest_salary_chunk_size()
+
+	tasks = {}
+	for index, start in enumerate(range(0, len(unique_ids), max_size)):
+		chunk = unique_ids[start:start + max_size]
+		chunk_size = _chunk_bucket(len(chunk), max_size)
+		chunk += [chunk[-1]] * (chunk_size - len(chunk))
+		query = _latest_salary_query(vendor, chunk_size)
+		tasks[index] = lambda query=query, params=tuple(chunk): fetch_data_from_db(query, params, vendor=vendor)
+
+	chunk_rows, errors = run_concurrently(tasks)
+	for index, error in errors.items():
+		# Log lỗi nhưng không throw để không chặn toàn bộ API
+		logger.error(f"Error fetching latest salaries (chunk {index}): {error}")
 
-	try:
-		# Query để lấy lương mới nhất cho mỗi nhân viên
-		# Sử dụng cách tiếp cận khác: ORDER BY và ROW_NUMBER() hoặc DISTINCT ON
-		# Để xử lý cả format YYYY-MM và YYYY-MM-DD
-		if vendor == "sqlserver":
-			# SQL Server: Sử dụng ROW_NUMBER() để lấy lương mới nhất
-			query = f"""
-			SELECT EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary
-			FROM (
-				SELECT s.EmployeeID,
-				       s.SalaryMonth,
-				       s.BaseSalary,
-				       s.Bonus,
-				       s.Deductions,
-				       s.NetSalary,
-				       ROW_NUMBER() OVER (PARTITION BY s.EmployeeID ORDER BY s.SalaryMonth DESC, s.SalaryID DESC) AS rn
-				FROM salaries s
-				WHERE s.EmployeeID IN ({in_clause})
-			) ranked
-			WHERE rn = 1
-			"""
-		else:
-			# MySQL: Sử dụng subquery với MAX và JOIN
-			query = f"""
-			SELECT s.EmployeeID,
-			       s.SalaryMonth,
-			       s.BaseSalary,
-			       s.Bonus,
-			       s.Deductions,
-			       s.NetSalary
-			FROM salaries s
-			INNER JOIN (
-				SELECT EmployeeID, MAX(SalaryMonth) AS LatestMonth
-				FROM salaries
-				WHERE EmployeeID IN ({in_clause})
-				GROUP BY EmployeeID
-			) latest ON latest.EmployeeID = s.EmployeeID AND latest.LatestMonth = s.SalaryMonth
-			"""
-
-		rows = fetch_data_from_db(query, tuple(employee_ids), vendor=vendor)
-		result: Dict[int, Dict[str, Any]] = {}
-		
+	result: Dict[int, Dict[str, Any]] = {}
+	for rows in chunk_rows.values():
 		for row in rows:
 			employee_id = row.get("EmployeeID")
 			if employee_id:
@@ -112,24 +105,34 @@ def fetch_latest_salaries(employee_ids: List[int]) -> Dict[int, Dict[str, Any]]:
 					"Deduction": float(row.get("Deductions", 0) or 0),
 					"TotalSalary": float(row.get("NetSalary", 0) or 0),
 				}
-		
-		print(f"Fetched latest salaries for {len(result)} employees out of {len(employee_ids)} requested")
-		if len(result) < len(employee_ids):
-			print(f"Warning: Some employees ({len(employee_ids) - len(result)}) don't have salary records")
-		return result
-	except Exception as e:
-		# Log lỗi nhưng không throw để không chặn toàn bộ API
-		print(f"Error fetching latest salaries: {e}")
-		import traceback
-		print(f"Traceback: {traceback.format_exc()}")
-		return {}
 
+	if len(result) < len(unique_ids):
+		logger.warning(f"Some employees ({len(unique_ids) - len(result)}) don't have salary records")
+	return result
+
+
+class InvalidCursorError(ValueError):
+	"""Cursor phân trang không hợp lệ"""
+
+
+def encode_employee_cursor(last_employee_id: int) -> str:
+	"""Token tiếp tục (opaque) cho phân trang keyset"""
+	raw = json.dumps({"after": int(last_employee_id)}, separators=(",", ":")).encode("utf-8")
+	return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-def get_all_employees(department_id=None, position_id=None, status=None, keyword=None, page=1, size=10):
-	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
 
-	base_query = """
+def decode_employee_cursor(cursor: str) -> int | None:
+	"""Giải mã token; chuỗi rỗng nghĩa là trang đầu tiên"""
+	if not cursor:
+		return None
+	try:
+		padded = cursor + "=" * (-len(cursor) % 4)
+		return int(json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"])
+	except Exception as e:
+		raise InvalidCursorError(f"Cursor không hợp lệ: {cursor}") from e
+
+
+_EMPLOYEE_LIST_QUERY = """
 SELECT 
 	e.EmployeeID,
 	e.FullName,
@@ -137,14 +140,16 @@ SELECT
 	e.Email,
 	e.PhoneNumber,
   	e.HireDate,
-	COALESCE(d.DepartmentName, '') AS DepartmentName,
-	COALESCE(p.PositionName, '') AS PositionName
+	e.DepartmentID,
+	e.PositionID
 FROM employees e
-LEFT JOIN departments d ON e.DepartmentID = d.DepartmentID
-LEFT JOIN positions p ON e.PositionID = p.PositionID
 WHERE 1 = 1
 """
 
+
+def _employee_filters(vendor, department_id=None, position_id=None, status=None, keyword=None):
+	"""Điều kiện WHERE (alias e) và tham số tương ứng cho danh sách nhân viên"""
+	placeholder = get_placeholder(vendor)
 	filters: List[str] = []
 	params: List[Any] = []
 
@@ -162,17 +167,125 @@ WHERE 1 = 1
 
 	# Search theo keyword (tìm trong FullName, Email, PhoneNumber)
 	if keyword:
-		if vendor == "mysql":
-			# MySQL sử dụng LIKE với %s
-			filters.append(f"(e.FullName LIKE {placeholder} OR e.Email LIKE {placeholder} OR e.PhoneNumber LIKE {placeholder})")
-			keyword_pattern = f"%{keyword}%"
-			params.extend([keyword_pattern, keyword_pattern, keyword_pattern])
-		else:
-			# SQL Server sử dụng LIKE với ?
-			filters.append(f"(e.FullName LIKE {placeholder} OR e.Email LIKE {placeholder} OR e.PhoneNumber LIKE {placeholder})")
-			keyword_pattern = f"%{keyword}%"
-			params.extend([keyword_pattern, keyword_pattern, keyword_pattern])
+		filters.append(f"(e.FullName LIKE {placeholder} OR e.Email LIKE {placeholder} OR e.PhoneNumber LIKE {placeholder})")
+		keyword_pattern = f"%{keyword}%"
+		params.extend([keyword_pattern, keyword_pattern, keyword_pattern])
+
+	return filters, params
+
+
+# Cột của một nhân viên trong response (dạng dict hoặc dạng cột)
+EMPLOYEE_COLUMNS = ["EmployeeID", "FullName", "DepartmentName", "Email", "PhoneNumber", "PositionName", "Status", "HireDate"]
+
 
+def _employee_values(row, department_names: Dict[Any, str], position_names: Dict[Any, str]) -> List[Any]:
+	"""Tuple theo thứ tự cột của _EMPLOYEE_LIST_QUERY -> giá trị theo EMPLOYEE_COLUMNS (tên ghép từ cache tham chiếu)"""
+	employee_id, full_name, status, email, phone_number, hire_date, department_id, position_id = row
+	return [
+		employee_id,
+		full_name,
+		department_names.get(department_id) or "",
+		email,
+		phone_number,
+		position_names.get(position_id) or "",
+		status,
+		hire_date.strftime("%Y-%m-%d") if hire_date else None
+	]
+
+
+def _employees_payload(rows, columnar: bool):
+	"""List dict theo EMPLOYEE_COLUMNS, hoặc {"columns", "rows"} khi columnar"""
+	department_names, position_names = departments.names(), positions.names()
+	values = [_employee_values(row, department_names, position_names) for row in rows]
+	if columnar:
+		return {"columns": EMPLOYEE_COLUMNS, "rows": values}
+	return [dict(zip(EMPLOYEE_COLUMNS, row)) for row in values]
+
+
+COUNT_MODES = ("exact", "estimated", "none")
+
+
+def _normalize_filter_text(value):
+	"""Bỏ khoảng trắng thừa, coi chuỗi rỗng như không lọc"""
+	return " ".join((value or "").split()) or None
+
+
+def _estimate_employee_rows(vendor) -> int:
+	"""Số dòng ước lượng của bảng employees lấy từ thống kê của DB (không quét bảng)"""
+	if vendor == "sqlserver":
+		query = """
+		SELECT SUM(p.rows)
+		FROM sys.partitions p
+		WHERE p.object_id = OBJECT_ID('employees') AND p.index_id IN (0, 1)
+		"""
+	else:
+		query = """
+		SELECT TABLE_ROWS
+		FROM information_schema.TABLES
+		WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'employees'
+		"""
+	return fetch_scalar_from_db(query, (), vendor=vendor)
+
+
+def _count_employees(vendor, filters: List[str], params: List[Any], cache_key, count_mode: str = "exact"):
+	"""
+	Tổng số nhân viên khớp bộ lọc, trả về (total, is_estimate).
+	- exact: COUNT thật, cache theo bộ lọc đã chuẩn hoá (xoá khi có thêm/sửa/xoá nhân viên)
+	- estimated: dùng số đã cache nếu có; không lọc thì lấy từ thống kê bảng;
+	  có lọc mà chưa có cache thì đếm thật một lần
+	- none: không đếm
+	"""
+	if count_mode == "none":
+		return None, False
+
+	if count_mode == "estimated":
+		cached_total = employee_count_cache.peek(cache_key)
+		if cached_total is not None:
+			return cached_total, False
+		if not filters:
+			try:
+				return _estimate_employee_rows(vendor), True
+			except Exception as e:
+				logger.warning(f"Error estimating employee count, falling back to COUNT: {e}")
+
+	count_query = "SELECT COUNT(e.EmployeeID) FROM employees e WHERE 1 = 1"
+	if filters:
+		count_query += " AND " + " AND ".join(filters)
+	total = employee_count_cache.get_or_compute(
+		cache_key,
+		("employees", "departments", "positions"),
+		lambda: fetch_scalar_from_db(count_query, tuple(params), vendor=vendor)
+	)
+	return total, False
+
+
+def get_all_employees(department_id=None, position_id=None, status=None, keyword=None, page=1, size=10,
+		cursor=None, count_mode="exact", columnar=False):
+	"""
+	Danh sách nhân viên có lọc.
+	- Mặc định phân trang theo page/size (OFFSET).
+	- Truyền cursor (chuỗi rỗng cho trang đầu) để dùng phân trang keyset:
+	  seek theo EmployeeID > last_seen nên chi phí mỗi trang không tăng theo độ sâu,
+	  kết quả có next_cursor để lấy trang tiếp theo.
+	- count_mode: exact | estimated | none (xem _count_employees); total_is_estimate cho biết
+	  total_records là số ước lượng.
+	- columnar=True: employees trả về dạng cột {"columns": [...], "rows": [[...]]}.
+	"""
+	if count_mode not in COUNT_MODES:
+		raise ValueError(f"count_mode không hợp lệ: {count_mode}")
+	vendor = get_db_vendor()
+	status = _normalize_filter_text(status)
+	keyword = _normalize_filter_text(keyword)
+	filters, params = _employee_filters(vendor, department_id, position_id, status, keyword)
+	# Khóa cache tổng số theo bộ lọc đã chuẩn hoá
+	cache_key = ("employees", vendor, department_id, position_id, status, keyword)
+
+	if cursor is not None:
+		result = _get_employees_after(vendor, filters, params, decode_employee_cursor(cursor), size, columnar)
+		result["total_records"], result["total_is_estimate"] = _count_employees(vendor, filters, params, cache_key, count_mode)
+		return result
+
+	base_query = _EMPLOYEE_LIST_QUERY
 	if filters:
 		base_query += " AND " + " AND ".join(filters)
 
@@ -182,50 +295,62 @@ WHERE 1 = 1
 	else:
 		paginated_query = f"{base_query} ORDER BY e.EmployeeID OFFSET {offset} ROWS FETCH NEXT {size} ROWS ONLY"
 
-	employee_rows = fetch_data_from_db(paginated_query, tuple(params), vendor=vendor)
-
-	count_query = "SELECT COUNT(e.EmployeeID) FROM employees e WHERE 1 = 1"
-	if filters:
-		count_query += " AND " + " AND ".join(filters)
+	employee_rows = fetch_columnar_from_db(paginated_query, tuple(params), vendor=vendor)["rows"]
 
-	total_count = fetch_scalar_from_db(count_query, tuple(params), vendor=vendor)
-
-	employees: List[Dict[str, Any]] = []
-	for row in employee_rows:
-		employee_id = row.get("EmployeeID")
-		
-		employee = {
-			"EmployeeID": employee_id,
-			"FullName": row.get("FullName"),
-			"DepartmentName": row.get("DepartmentName"),
-			"Email": row.get("Email"),
-			"PhoneNumber": row.get("PhoneNumber"),
-			"PositionName": row.get("PositionName"),
-			"Status": row.get("Status"),
-      		"HireDate": row.get("HireDate").strftime("%Y-%m-%d") if row.get("HireDate") else None
-		}
-		employees.append(employee)
+	total_count, is_estimate = _count_employees(vendor, filters, params, cache_key, count_mode)
 
 	return {
 		"total_records": total_count,
+		"total_is_estimate": is_estimate,
 		"page": page,
 		"size": size,
-		"employees": employees
+		"employees": _employees_payload(employee_rows, columnar)
+	}
+
+
+def _get_employees_after(vendor, filters: List[str], params: List[Any], last_seen_id, size, columnar=False):
+	"""Một trang keyset: các nhân viên có EmployeeID > last_seen_id theo thứ tự tăng dần"""
+	placeholder = get_placeholder(vendor)
+	page_filters = list(filters)
+	page_params = list(params)
+	if last_seen_id is not None:
+		page_filters.append(f"e.EmployeeID > {placeholder}")
+		page_params.append(last_seen_id)
+
+	base_query = _EMPLOYEE_LIST_QUERY
+	if page_filters:
+		base_query += " AND " + " AND ".join(page_filters)
+
+	# Lấy dư 1 dòng để biết còn trang sau hay không
+	if vendor == "mysql":
+		page_query = f"{base_query} ORDER BY e.EmployeeID LIMIT {size + 1}"
+	else:
+		page_query = f"{base_query} ORDER BY e.EmployeeID OFFSET 0 ROWS FETCH NEXT {size + 1} ROWS ONLY"
+
+	rows = fetch_columnar_from_db(page_query, tuple(page_params), vendor=vendor)["rows"]
+	has_more = len(rows) > size
+	rows = rows[:size]
+
+	return {
+		"size": size,
+		"employees": _employees_payload(rows, columnar),
+		"has_more": has_more,
+		"next_cursor": encode_employee_cursor(rows[-1][0]) if has_more and rows else None
 	}
 
 
-def get_employees_by_department(department_id: int, page=1, size=10) -> Dict[str, Any]:
+def get_employees_by_department(department_id: int, page=1, size=10, cursor=None, count_mode="exact") -> Dict[str, Any]:
 	"""
 	Lấy danh sách nhân viên theo department_id
 	"""
-	return get_all_employees(department_id=department_id, page=page, size=size)
+	return get_all_employees(department_id=department_id, page=page, size=size, cursor=cursor, count_mode=count_mode)
 
 
-def get_employees_by_position(position_id: int, page=1, size=10) -> Dict[str, Any]:
+def get_employees_by_position(position_id: int, page=1, size=10, cursor=None, count_mode="exact") -> Dict[str, Any]:
 	"""
 	Lấy danh sách nhân viên theo position_id
 	"""
-	return get_all_employees(position_id=position_id, page=page, size=size)
+	return get_all_employees(position_id=position_id, page=page, size=size, cursor=cursor, count_mode=count_mode)
  
 def create_employee_transaction(data: Dict[str, Any]) -> Dict[str, Any]:
     vendors = ["sqlserver", "mysql"]
@@ -236,14 +361,14 @@ def create_employee_transaction(data: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # Mở kết nối và bắt đầu transaction
         for v in vendors:
-            conn = _get_connection(v)
+            conn = get_connection(v)
             conn.autocommit = False
             connections[v] = conn
             cursors[v] = conn.cursor()
 
         # --- SQL SERVER INSERT ---
         cursor_sql = cursors["sqlserver"]
-        placeholder_sql = _placeholder("sqlserver")
+        placeholder_sql = get_placeholder("sqlserver")
 
         full_name = data.get("FullName")
         dept_id = data.get("DepartmentID")
@@ -269,7 +394,7 @@ def create_employee_transaction(data: Dict[str, Any]) -> Dict[str, Any]:
 
         # --- MYSQL CHECK EMPLOYEEID ---
         cursor_mysql = cursors["mysql"]
-        placeholder_mysql = _placeholder("mysql")
+        placeholder_mysql = get_placeholder("mysql")
 
         cursor_mysql.execute(f"SELECT COUNT(*) FROM employees WHERE EmployeeID = {placeholder_mysql}", (employee_id,))
         count = cursor_mysql.fetchone()[0]
@@ -286,6 +411,7 @@ def create_employee_transaction(data: Dict[str, Any]) -> Dict[str, Any]:
         # Commit cả 2 DB
         connections["sqlserver"].commit()
         connections["mysql"].commit()
+        mark_tables_changed("employees")
 
         return {
             "EmployeeID": employee_id,
@@ -322,14 +448,14 @@ def delete_employee_service(employee_id: int) -> dict:
     try:
         # Mở kết nối
         for v in vendors:
-            conn = _get_connection(v)
+            conn = get_connection(v)
             conn.autocommit = False
             connections[v] = conn
             cursors[v] = conn.cursor()
 
         # ----------- MYSQL -----------
         cursor_mysql = cursors["mysql"]
-        placeholder_mysql = _placeholder("mysql")
+        placeholder_mysql = get_placeholder("mysql")
 
         # Lấy danh sách bảng con trỏ tới employees
         cursor_mysql.execute("""
@@ -350,7 +476,7 @@ def delete_employee_service(employee_id: int) -> dict:
 
         # ----------- SQL SERVER -----------
         cursor_sql = cursors["sqlserver"]
-        placeholder_sql = _placeholder("sqlserver")
+        placeholder_sql = get_placeholder("sqlserver")
 
         # Lấy danh sách bảng con trỏ tới employees
         cursor_sql.execute("""
@@ -375,6 +501,8 @@ def delete_employee_service(employee_id: int) -> dict:
         # Commit cả 2 DB
         connections["mysql"].commit()
         connections["sqlserver"].commit()
+        mark_tables_changed("employees", "salaries", "attendance", "dividends")
+        invalidate_rollups()
 
         return {"success": True, "message": f"Đã xóa nhân viên {employee_id} trong MySQL + SQL Server"}
 
@@ -400,7 +528,7 @@ def get_employee_statistics() -> Dict[str, Any]:
     Lấy thống kê tổng số nhân viên (KPI)
     """
     vendor = get_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     try:
         # Tổng số nhân viên
@@ -428,11 +556,11 @@ def get_employee_by_id(employee_id: int) -> Dict[str, Any]:
     Lấy thông tin chi tiết nhân viên theo ID
     """
     vendor = get_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
 
     try:
         # Query lấy thông tin chi tiết nhân viên
-        # Sử dụng LEFT JOIN để vẫn trả về nhân viên dù thiếu thông tin phòng ban hoặc chức vụ
+        # Tên phòng ban/chức vụ lấy từ cache tham chiếu (nhân viên thiếu phòng ban/chức vụ vẫn được trả về)
         query = f"""
         SELECT 
             e.EmployeeID,
@@ -443,15 +571,9 @@ def get_employee_by_id(employee_id: int) -> Dict[str, Any]:
             e.DateOfBirth,
             e.HireDate,
             e.DepartmentID,
-            d.DepartmentID as DeptID,
-            d.DepartmentName,
             e.PositionID,
-            p.PositionID as PosID,
-            p.PositionName,
             e.Gender
         FROM employees e
-        LEFT JOIN departments d ON e.DepartmentID = d.DepartmentID
-        LEFT JOIN positions p ON e.PositionID = p.PositionID
         WHERE e.EmployeeID = {placeholder}
         """
 
@@ -468,8 +590,8 @@ def get_employee_by_id(employee_id: int) -> Dict[str, Any]:
 
         # Format kết quả
         # Xử lý Department - có thể null
-        department_id = employee.get('DepartmentID') or employee.get('DeptID')
-        department_name = employee.get('DepartmentName')
+        department_id = employee.get('DepartmentID')
+        department_name = departments.names().get(department_id)
         department = None
         if department_id and department_name:
             department = {
@@ -478,8 +600,8 @@ def get_employee_by_id(employee_id: int) -> Dict[str, Any]:
             }
         
         # Xử lý Position - có thể null
-        position_id = employee.get('PositionID') or employee.get('PosID')
-        position_name = employee.get('PositionName')
+        position_id = employee.get('PositionID')
+        position_name = positions.names().get(position_id)
         position = None
         if position_id and position_name:
             position = {
@@ -520,14 +642,14 @@ def update_employee_service(employee_id: int, data: Dict[str, Any]) -> Dict[str,
     try:
         # Mở kết nối và bắt đầu transaction
         for v in vendors:
-            conn = _get_connection(v)
+            conn = get_connection(v)
             conn.autocommit = False
             connections[v] = conn
             cursors[v] = conn.cursor()
 
         # Kiểm tra nhân viên có tồn tại không
         cursor_sql = cursors["sqlserver"]
-        placeholder_sql = _placeholder("sqlserver")
+        placeholder_sql = get_placeholder("sqlserver")
         
         check_sql = f"SELECT COUNT(*) FROM employees WHERE EmployeeID = {placeholder_sql}"
         cursor_sql.execute(check_sql, (employee_id,))
@@ -587,7 +709,7 @@ def update_employee_service(employee_id: int, data: Dict[str, Any]) -> Dict[str,
 
         # --- CẬP NHẬT MYSQL ---
         cursor_mysql = cursors["mysql"]
-        placeholder_mysql = _placeholder("mysql")
+        placeholder_mysql = get_placeholder("mysql")
 
         # Kiểm tra nhân viên có tồn tại trong MySQL không
         cursor_mysql.execute(f"SELECT COUNT(*) FROM employees WHERE EmployeeID = {placeholder_mysql}", (employee_id,))
@@ -618,6 +740,9 @@ def update_employee_service(employee_id: int, data: Dict[str, Any]) -> Dict[str,
         # Commit cả 2 DB
         connections["sqlserver"].commit()
         connections["mysql"].commit()
+        mark_tables_changed("employees")
+        # Rollup theo phòng ban dựa trên DepartmentID hiện tại của nhân viên
+        invalidate_rollups()
 
         # Lấy thông tin nhân viên sau khi cập nhật
         updated_employee = get_employee_by_id(employee_id)
@@ -1,57 +1,22 @@
-import os
-from typing import Any, Dict, List, Tuple
-from config.sqlserver_connection import get_sqlserver_connection
-from config.mysql_connection import get_mysql_connection
-
-# ------------------- Helper -------------------
-
-def get_db_vendor() -> str:
-    """Trả về vendor hiện tại: sqlserver hoặc mysql"""
-    return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
-
-def _get_connection(vendor: str):
-    """Tạo connection DB"""
-    if vendor == "mysql":
-        return get_mysql_connection()
-    return get_sqlserver_connection()
-
-def _placeholder(vendor: str) -> str:
-    """Placeholder theo vendor"""
-    return "?" if vendor == "sqlserver" else "%s"
-
-def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str | None = None) -> List[Dict[str, Any]]:
-    """Lấy danh sách dữ liệu"""
-    conn = None
-    actual_vendor = vendor or get_db_vendor()
-    try:
-        conn = _get_connection(actual_vendor)
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    finally:
-        if conn:
-            conn.close()
+from typing import Any, Dict, List
+from config.db import get_placeholder, get_connection
+from utils.cache import mark_tables_changed
+from services.reference_service import positions
 
 # ------------------- Position Service -------------------
 
 def get_positions() -> List[Dict[str, Any]]:
-    """Lấy danh sách chức vụ"""
-    vendor = get_db_vendor()
-    query = "SELECT PositionID, PositionName FROM positions"
-    return fetch_data_from_db(query, (), vendor)
+    """Lấy danh sách chức vụ (từ cache tham chiếu trong bộ nhớ)"""
+    return positions.all()
 
 def get_position_by_id(position_id: int) -> Dict[str, Any] | None:
     """Xem chi tiết chức vụ"""
-    vendor = get_db_vendor()
-    query = f"SELECT PositionID, PositionName FROM positions WHERE PositionID = {_placeholder(vendor)}"
-    rows = fetch_data_from_db(query, (position_id,), vendor)
-    return rows[0] if rows else None
+    return positions.get(position_id)
 
 def create_position(name: str) -> int:
     """Thêm chức vụ mới, đồng bộ ID từ SQL Server sang MySQL"""
-    conn_sqlserver = get_sqlserver_connection()
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -61,17 +26,18 @@ def create_position(name: str) -> int:
         conn_mysql.autocommit = False
 
         # Thêm vào SQL Server và lấy ID
-        query_sql = f"INSERT INTO positions (PositionName) OUTPUT INSERTED.PositionID VALUES ({_placeholder('sqlserver')})"
+        query_sql = f"INSERT INTO positions (PositionName) OUTPUT INSERTED.PositionID VALUES ({get_placeholder('sqlserver')})"
         cursor_sql.execute(query_sql, (name,))
         new_id = cursor_sql.fetchone()[0]
 
         # Thêm vào MySQL với ID từ SQL Server
-        query_my = f"INSERT INTO positions (PositionID, PositionName) VALUES ({_placeholder('mysql')}, {_placeholder('mysql')})"
+        query_my = f"INSERT INTO positions (PositionID, PositionName) VALUES ({get_placeholder('mysql')}, {get_placeholder('mysql')})"
         cursor_my.execute(query_my, (new_id, name))
 
         # Commit cả 2 DB
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("positions")
 
         return int(new_id)
     except Exception as e:
@@ -86,8 +52,8 @@ def create_position(name: str) -> int:
 
 def update_position(position_id: int, name: str):
     """Cập nhật tên chức vụ trên cả SQL Server và MySQL"""
-    conn_sqlserver = get_sqlserver_connection()
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -96,16 +62,17 @@ def update_position(position_id: int, name: str):
         conn_mysql.autocommit = False
 
         # SQL Server
-        query_sql = f"UPDATE positions SET PositionName={_placeholder('sqlserver')} WHERE PositionID={_placeholder('sqlserver')}"
+        query_sql = f"UPDATE positions SET PositionName={get_placeholder('sqlserver')} WHERE PositionID={get_placeholder('sqlserver')}"
         cursor_sql.execute(query_sql, (name, position_id))
 
         # MySQL
-        query_my = f"UPDATE positions SET PositionName={_placeholder('mysql')} WHERE PositionID={_placeholder('mysql')}"
+        query_my = f"UPDATE positions SET PositionName={get_placeholder('mysql')} WHERE PositionID={get_placeholder('mysql')}"
         cursor_my.execute(query_my, (name, position_id))
 
         # Commit cả 2 DB
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("positions")
     except Exception as e:
         conn_sqlserver.rollback()
         conn_mysql.rollback()
@@ -118,8 +85,8 @@ def update_position(position_id: int, name: str):
 
 def delete_position(position_id: int) -> int:
     """Xóa chức vụ nhưng không xóa nhân viên — tự cascade bằng code (KHÔNG sửa DB)"""
-    conn_sqlserver = get_sqlserver_connection()
-    conn_mysql = get_mysql_connection()
+    conn_sqlserver = get_connection("sqlserver")
+    conn_mysql = get_connection("mysql")
     try:
         cursor_sql = conn_sqlserver.cursor()
         cursor_my = conn_mysql.cursor()
@@ -149,6 +116,7 @@ def delete_position(position_id: int) -> int:
 
         conn_sqlserver.commit()
         conn_mysql.commit()
+        mark_tables_changed("positions")
         return cursor_sql.rowcount
 
     except Exception as e:
@@ -0,0 +1,83 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from config.db import get_db_vendor, fetch_data_from_db
+from utils.cache import get_table_versions
+
+# ------------------- Dữ liệu tham chiếu trong bộ nhớ -------------------
+# departments và positions chỉ có vài chục dòng và hiếm khi đổi, nên được giữ
+# nguyên bảng trong bộ nhớ. Khi create/update/delete gọi mark_tables_changed(),
+# version của bảng tăng và lần đọc sau sẽ nạp lại. REFERENCE_CACHE_TTL (giây)
+# giới hạn thời gian giữ bản cũ khi bảng bị sửa từ process khác (vd: app Java).
+
+
+def _ttl() -> float:
+    try:
+        return float(os.environ.get("REFERENCE_CACHE_TTL", "300"))
+    except ValueError:
+        return 300.0
+
+
+class ReferenceTable:
+    """Toàn bộ một bảng tham chiếu (ID, tên) giữ trong bộ nhớ, nạp lại theo version của bảng"""
+
+    def __init__(self, table: str, id_column: str, name_column: str) -> None:
+        self.table = table
+        self.id_column = id_column
+        self.name_column = name_column
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+        self._version = -1
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _snapshot(self) -> Dict[Any, Dict[str, Any]]:
+        version = get_table_versions(self.table)[self.table]
+        with self._lock:
+            fresh = (
+                self._rows is not None
+                and self._version == version
+                and time.monotonic() - self._loaded_at < _ttl()
+            )
+            if fresh:
+                return self._by_id
+
+            # Lấy version trước khi query: có ghi xen giữa thì lần đọc sau sẽ nạp lại
+            query = f"SELECT {self.id_column}, {self.name_column} FROM {self.table}"
+            rows = fetch_data_from_db(query, (), get_db_vendor())
+            self._rows = rows
+            self._by_id = {row[self.id_column]: row for row in rows}
+            self._version = version
+            self._loaded_at = time.monotonic()
+            return self._by_id
+
+    def all(self) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._snapshot().values()]
+
+    def get(self, row_id: Any) -> Optional[Dict[str, Any]]:
+        row = self._snapshot().get(row_id)
+        return dict(row) if row is not None else None
+
+    def names(self) -> Dict[Any, str]:
+        """{ID: tên} để join tên trong Python thay vì LEFT JOIN trong SQL"""
+        return {row_id: row[self.name_column] for row_id, row in self._snapshot().items()}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._rows = None
+
+
+departments = ReferenceTable("departments", "DepartmentID", "DepartmentName")
+positions = ReferenceTable("positions", "PositionID", "PositionName")
+
+
+def warm_reference_cache() -> None:
+    """Nạp sẵn khi khởi động app; lỗi DB chỉ log lại, lần đọc đầu tiên sẽ nạp lại"""
+    for reference in (departments, positions):
+        try:
+            reference.all()
+        except Exception as e:
+            logging.warning(f"Could not preload {reference.table}: {e}")
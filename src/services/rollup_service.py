@@ -0,0 +1,232 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.db import (
+    get_dividend_db_vendor, get_salary_db_vendor, get_attendance_db_vendor, get_placeholder,
+    period_key, format_period_key, period_key_expr, fetch_data_from_db
+)
+
+# ------------------- Rollup theo tháng -------------------
+# Tổng hợp sẵn (count, sum, min, max, avg) theo tháng và phòng ban cho
+# salaries, attendance, dividends. Mỗi năm được nạp bằng một query GROUP BY,
+# sau đó các hàm ghi (generate/update/delete salary, attendance, dividend)
+# gọi refresh_month() để tính lại riêng tháng bị ảnh hưởng.
+# Người đọc chỉ duyệt tối đa 12 tháng trong bộ nhớ thay vì quét bảng gốc.
+# Mỗi (source, năm) chỉ một thread nạp tại một thời điểm, các thread khác chờ rồi
+# dùng kết quả đó. Mỗi năm có một generation, tăng khi refresh_month/invalidate_rollups;
+# lần nạp thấy generation đổi trong lúc query thì không lưu kết quả (có thể đã cũ).
+
+# source -> (hàm lấy vendor, bảng, cột tháng, các cột số liệu)
+ROLLUP_SOURCES: Dict[str, Tuple[Callable[[], str], str, str, List[str]]] = {
+    "salaries": (get_salary_db_vendor, "salaries", "SalaryMonth", ["BaseSalary", "Bonus", "Deductions", "NetSalary"]),
+    "attendance": (get_attendance_db_vendor, "attendance", "AttendanceMonth", ["WorkDays", "AbsentDays", "LeaveDays"]),
+    "dividends": (get_dividend_db_vendor, "dividends", "DividendDate", ["DividendAmount"]),
+}
+
+# Cell = số liệu của một (tháng, phòng ban): {"count": n, "measures": {cột: {count, sum, min, max}}}
+_years: Dict[Tuple[str, int], Dict[str, Any]] = {}
+_generations: Dict[Tuple[str, int], int] = {}
+_load_locks: Dict[Tuple[str, int], threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _ttl() -> float:
+    """Thời gian sống của rollup một năm (ROLLUP_TTL giây) - để nhận thay đổi từ process khác"""
+    try:
+        return float(os.environ.get("ROLLUP_TTL", "300"))
+    except ValueError:
+        return 300.0
+
+
+def _to_number(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _query_cells(source: str, first_month: str, last_month: str) -> Dict[Tuple[str, Any], Dict[str, Any]]:
+    """Một query GROUP BY (tháng, phòng ban) cho khoảng tháng [first_month, last_month]"""
+    vendor_getter, table, month_column, measures = ROLLUP_SOURCES[source]
+    vendor = vendor_getter()
+    placeholder = get_placeholder(vendor)
+    period_expr = period_key_expr(vendor, table, f"t.{month_column}")
+
+    measure_columns = ",\n            ".join(
+        f"COUNT(t.{m}) AS {m}_count, SUM(t.{m}) AS {m}_sum, MIN(t.{m}) AS {m}_min, MAX(t.{m}) AS {m}_max"
+        for m in measures
+    )
+    query = f"""
+        SELECT
+            {period_expr} AS PeriodKey,
+            e.DepartmentID AS DepartmentID,
+            COUNT(*) AS RecordCount,
+            {measure_columns}
+        FROM {table} t
+        LEFT JOIN employees e ON t.EmployeeID = e.EmployeeID
+        WHERE {period_expr} BETWEEN {placeholder} AND {placeholder}
+        GROUP BY {period_expr}, e.DepartmentID
+    """
+    rows = fetch_data_from_db(query, (period_key(first_month), period_key(last_month)), vendor)
+
+    cells: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    for row in rows:
+        if not row.get("PeriodKey"):
+            continue
+        cells[(format_period_key(row["PeriodKey"]), row.get("DepartmentID"))] = {
+            "count": int(row.get("RecordCount") or 0),
+            "measures": {
+                m: {
+                    "count": int(row.get(f"{m}_count") or 0),
+                    "sum": float(row.get(f"{m}_sum") or 0),
+                    "min": _to_number(row.get(f"{m}_min")),
+                    "max": _to_number(row.get(f"{m}_max")),
+                }
+                for m in measures
+            },
+        }
+    return cells
+
+
+def _fresh_cells_locked(key: Tuple[str, int]) -> Optional[Dict[Tuple[str, Any], Dict[str, Any]]]:
+    entry = _years.get(key)
+    if entry is not None and time.monotonic() - entry["loaded_at"] < _ttl():
+        return entry["cells"]
+    return None
+
+
+def _bump_generation_locked(key: Tuple[str, int]) -> int:
+    _generations[key] = _generations.get(key, 0) + 1
+    return _generations[key]
+
+
+def _load_year(source: str, year: int) -> Dict[Tuple[str, Any], Dict[str, Any]]:
+    key = (source, int(year))
+    with _lock:
+        cells = _fresh_cells_locked(key)
+        if cells is not None:
+            return cells
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Thread khác có thể vừa nạp xong trong lúc chờ
+        with _lock:
+            cells = _fresh_cells_locked(key)
+            if cells is not None:
+                return cells
+            generation = _generations.get(key, 0)
+        started = time.monotonic()
+        cells = _query_cells(source, f"{int(year):04d}-01", f"{int(year):04d}-12")
+        with _lock:
+            if _generations.get(key, 0) == generation:
+                _years[key] = {"loaded_at": started, "cells": cells}
+    return cells
+
+
+def _merge(cells: List[Dict[str, Any]], measures: List[str]) -> Dict[str, Any]:
+    """Gộp nhiều cell thành một dòng tổng hợp (avg = sum / count của cột)"""
+    merged: Dict[str, Any] = {"count": sum(cell["count"] for cell in cells)}
+    for m in measures:
+        parts = [cell["measures"][m] for cell in cells]
+        count = sum(p["count"] for p in parts)
+        total = sum(p["sum"] for p in parts)
+        mins = [p["min"] for p in parts if p["min"] is not None]
+        maxs = [p["max"] for p in parts if p["max"] is not None]
+        merged[m] = {
+            "sum": total,
+            "min": min(mins) if mins else None,
+            "max": max(maxs) if maxs else None,
+            "avg": total / count if count else None,
+        }
+    return merged
+
+
+# ------------------- Đọc -------------------
+
+def get_monthly_summary(source: str, year: int) -> List[Dict[str, Any]]:
+    """
+    Tổng hợp theo tháng của một năm (chỉ các tháng có dữ liệu, tăng dần):
+    [{"month": "YYYY-MM", "count": n, "<cột>": {"sum", "min", "max", "avg"}}, ...]
+    """
+    measures = ROLLUP_SOURCES[source][3]
+    by_month: Dict[str, List[Dict[str, Any]]] = {}
+    for (month, _department_id), cell in _load_year(source, year).items():
+        by_month.setdefault(month, []).append(cell)
+    return [
+        {"month": month, **_merge(cells, measures)}
+        for month, cells in sorted(by_month.items())
+    ]
+
+
+def get_department_summary(source: str, year: int, month: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Tổng hợp theo phòng ban trong một năm (hoặc một tháng YYYY-MM của năm đó)"""
+    measures = ROLLUP_SOURCES[source][3]
+    by_department: Dict[Any, List[Dict[str, Any]]] = {}
+    for (cell_month, department_id), cell in _load_year(source, year).items():
+        if month is None or cell_month == month:
+            by_department.setdefault(department_id, []).append(cell)
+    return [
+        {"DepartmentID": department_id, **_merge(cells, measures)}
+        for department_id, cells in by_department.items()
+    ]
+
+
+def get_month_totals(source: str, month: str) -> Dict[str, Any]:
+    """Tổng hợp một tháng (YYYY-MM hoặc YYYY-MM-DD); tháng không có dữ liệu trả về count 0"""
+    month = str(month)[:7]
+    measures = ROLLUP_SOURCES[source][3]
+    cells = [cell for (cell_month, _), cell in _load_year(source, int(month[:4])).items() if cell_month == month]
+    return _merge(cells, measures)
+
+
+def get_year_totals(source: str, year: int) -> Dict[str, Any]:
+    """Tổng hợp cả năm"""
+    measures = ROLLUP_SOURCES[source][3]
+    return _merge(list(_load_year(source, year).values()), measures)
+
+
+# ------------------- Cập nhật -------------------
+
+def refresh_month(source: str, month: Any) -> None:
+    """
+    Tính lại rollup của một tháng sau khi ghi. Chỉ làm khi năm đó đang có trong bộ nhớ;
+    tính lại cả tháng (thay vì cộng/trừ delta) để min/max vẫn đúng khi xoá hoặc sửa.
+    Luôn tăng generation của năm để lần nạp đang chạy dở không ghi đè snapshot cũ.
+    """
+    if not month:
+        return
+    month = str(month)[:7]
+    try:
+        key = (source, int(month[:4]))
+    except ValueError:
+        return
+    with _lock:
+        generation = _bump_generation_locked(key)
+        if key not in _years:
+            return
+    try:
+        fresh = _query_cells(source, month, month)
+    except Exception as e:
+        logging.error(f"Error refreshing {source} rollup for {month}: {e}")
+        with _lock:
+            _years.pop(key, None)
+        return
+    with _lock:
+        entry = _years.get(key)
+        if entry is None:
+            return
+        # Có lần ghi khác vào năm này trong lúc query: bỏ cả năm, lần đọc sau nạp lại
+        if _generations.get(key, 0) != generation:
+            del _years[key]
+            return
+        cells = {k: v for k, v in entry["cells"].items() if k[0] != month}
+        cells.update(fresh)
+        entry["cells"] = cells
+
+
+def invalidate_rollups(source: Optional[str] = None) -> None:
+    """Bỏ rollup trong bộ nhớ (vd: khi nhân viên đổi phòng ban), lần đọc sau sẽ nạp lại"""
+    with _lock:
+        for key in [k for k in set(_years) | set(_load_locks) if source is None or k[0] == source]:
+            _bump_generation_locked(key)
+            _years.pop(key, None)
@@ -1,62 +1,17 @@
 import os
-from typing import Any, Dict, List, Tuple, Optional
-from config.mysql_connection import get_mysql_connection
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.db import (
+    get_salary_db_vendor, get_attendance_db_vendor, get_placeholder, period_key, period_key_expr, period_range,
+    has_unique_period_key, fetch_data_from_db, fetch_columnar_from_db, stream_rows, rows_to_dicts, execute_db,
+    transaction
+)
+from utils.cache import mark_tables_changed
+from services.rollup_service import get_monthly_summary, get_month_totals, refresh_month
 
-def get_salary_db_vendor() -> str:
-    """Trả về vendor cho database salary"""
-    return os.environ.get("SALARY_DB_VENDOR", "mysql").strip().lower()
-
-def _placeholder(vendor: str) -> str:
-    return "?" if vendor == "sqlserver" else "%s"
-
-def fetch_data_from_db(sql_query: str, params: Tuple[Any, ...], vendor: str) -> List[Dict[str, Any]]:
-    """Lấy danh sách records từ DB"""
-    conn = None
-    try:
-        if vendor == "mysql":
-            from config.mysql_connection import get_mysql_connection
-            conn = get_mysql_connection()
-        else:
-            from config.sqlserver_connection import get_sqlserver_connection
-            conn = get_sqlserver_connection()
-            
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
-    except Exception as e:
-        raise Exception(f"Lỗi DB: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def execute_db(sql_query: str, params: Tuple[Any, ...], vendor: str) -> int:
-    """Thực thi query và trả về rowcount"""
-    conn = None
-    try:
-        if vendor == "mysql":
-            from config.mysql_connection import get_mysql_connection
-            conn = get_mysql_connection()
-        else:
-            from config.sqlserver_connection import get_sqlserver_connection
-            conn = get_sqlserver_connection()
-            
-        cursor = conn.cursor()
-        cursor.execute(sql_query, params)
-        conn.commit()
-        return cursor.rowcount
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise Exception(f"Lỗi DB: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def get_salaries(employee_id: Optional[int] = None, salary_month: Optional[str] = None, year: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Lấy danh sách bản ghi lương với filter"""
+def _salaries_query(employee_id: Optional[int], salary_month: Optional[str], year: Optional[int]) -> Tuple[str, Tuple[Any, ...], str]:
+    """Query danh sách lương theo filter: (query, params, vendor)"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Join với employees để lấy tên nhân viên
     query = f"""
@@ -84,27 +39,45 @@ def get_salaries(employee_id: Optional[int] = None, salary_month: Optional[str]
         query += f" AND s.SalaryMonth = {placeholder}"
         params.append(salary_month)
     elif year:
-        # Filter theo năm: SalaryMonth LIKE 'YYYY-%'
-        query += f" AND s.SalaryMonth LIKE {placeholder}"
-        params.append(f"{year}-%")
+        # Filter theo năm bằng khoảng khóa kỳ YYYY01..YYYY12 (dùng được index)
+        period_sql, period_params = period_range(vendor, "salaries", "s.SalaryMonth", f"{year}-01", f"{year}-12")
+        query += f" AND {period_sql}"
+        params.extend(period_params)
         
     query += " ORDER BY s.SalaryMonth DESC, s.EmployeeID"
     
-    return fetch_data_from_db(query, tuple(params), vendor)
+    return query, tuple(params), vendor
+
+def get_salaries(employee_id: Optional[int] = None, salary_month: Optional[str] = None, year: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Lấy danh sách bản ghi lương với filter"""
+    query, params, vendor = _salaries_query(employee_id, salary_month, year)
+    return fetch_data_from_db(query, params, vendor)
+
+def get_salaries_columnar(employee_id: Optional[int] = None, salary_month: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
+    """Giống get_salaries nhưng trả về dạng cột {columns, rows}"""
+    query, params, vendor = _salaries_query(employee_id, salary_month, year)
+    return fetch_columnar_from_db(query, params, vendor)
+
+def stream_salaries(employee_id: Optional[int] = None, salary_month: Optional[str] = None, year: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Giống get_salaries nhưng đọc dần từng lô (dùng cho export)"""
+    query, params, vendor = _salaries_query(employee_id, salary_month, year)
+    return stream_rows(query, params, vendor)
 
 def generate_salary(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Tạo/Tính lương cho một tháng"""
+    """
+    Tạo một bản ghi lương từ giá trị nhận trực tiếp trong request
+    (tính lương theo chấm công cho cả kỳ: xem run_payroll)
+    """
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
-    # TODO: Implement logic tính lương từ attendance và employees
-    # Hiện tại nhận dữ liệu trực tiếp từ request
     employee_id = data.get("EmployeeID")
     salary_month = data.get("SalaryMonth")
     base_salary = data.get("BaseSalary", 0.0)
     bonus = data.get("Bonus", 0.0)
     deductions = data.get("Deductions", 0.0)
     net_salary = base_salary + bonus - deductions
+    params = (employee_id, salary_month, base_salary, bonus, deductions, net_salary)
     
     query = f"""
     INSERT INTO salaries (EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary)
@@ -113,25 +86,257 @@ def generate_salary(data: Dict[str, Any]) -> Dict[str, Any]:
     
     if vendor == "sqlserver":
         query += " OUTPUT INSERTED.SalaryID, INSERTED.EmployeeID, INSERTED.SalaryMonth, INSERTED.BaseSalary, INSERTED.Bonus, INSERTED.Deductions, INSERTED.NetSalary, INSERTED.CreatedAt"
-        result = fetch_data_from_db(query, (employee_id, salary_month, base_salary, bonus, deductions, net_salary), vendor)
-        return result[0] if result else {}
+        result = fetch_data_from_db(query, params, vendor)
     else:
-        # MySQL
-        execute_db(query, (employee_id, salary_month, base_salary, bonus, deductions, net_salary), vendor)
-        # Lấy bản ghi vừa tạo
-        get_query = """
-        SELECT SalaryID, EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary, CreatedAt
-        FROM salaries 
-        WHERE EmployeeID = %s AND SalaryMonth = %s
-        ORDER BY SalaryID DESC LIMIT 1
+        # MySQL: đọc lại đúng bản ghi vừa tạo theo lastrowid, trong cùng transaction
+        with transaction(vendor) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                cursor.execute(f"""
+                SELECT SalaryID, EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary, CreatedAt
+                FROM salaries
+                WHERE SalaryID = {placeholder}
+                """, (cursor.lastrowid,))
+                result = rows_to_dicts(cursor)
+            finally:
+                cursor.close()
+
+    mark_tables_changed("salaries")
+    refresh_month("salaries", salary_month)
+    return result[0] if result else {}
+
+# ------------------- Chạy lương hàng loạt -------------------
+
+# Số dòng mỗi câu upsert nhiều dòng (MERGE trên SQL Server dùng 7 tham số/dòng,
+# dưới giới hạn 2100 tham số mỗi câu lệnh)
+PAYROLL_UPSERT_BATCH = 250
+
+
+def _standard_work_days() -> float:
+    """Số ngày công chuẩn của một tháng (PAYROLL_STANDARD_WORK_DAYS, mặc định 22)"""
+    try:
+        return float(os.environ.get("PAYROLL_STANDARD_WORK_DAYS", "22"))
+    except ValueError:
+        return 22.0
+
+
+def _normalize_salary_month(salary_month: Any) -> str:
+    """Chấp nhận YYYY-MM hoặc YYYY-MM-DD, trả về YYYY-MM-01 (giống dữ liệu frontend gửi lên)"""
+    month = str(salary_month or "").strip()[:7]
+    if len(month) != 7 or month[4] != "-" or not (month[:4] + month[5:]).isdigit() or not 1 <= int(month[5:]) <= 12:
+        raise ValueError(f"SalaryMonth phải có format YYYY-MM hoặc YYYY-MM-DD. Received: {salary_month}")
+    return f"{month}-01"
+
+
+def _load_payroll_inputs(month: str) -> Dict[str, Any]:
+    """
+    Nạp toàn bộ dữ liệu đầu vào của một kỳ lương bằng 3 query:
+    nhân viên + lương cơ bản gần nhất trước kỳ, bản ghi lương đã có trong kỳ, chấm công của kỳ.
+    """
+    vendor = get_salary_db_vendor()
+    placeholder = get_placeholder(vendor)
+    period = period_key(month)
+    period_expr = period_key_expr(vendor, "salaries", "s.SalaryMonth")
+
+    # Lương cơ bản = BaseSalary của bản ghi lương gần nhất trước kỳ này
+    employees = fetch_data_from_db(f"""
+        SELECT e.EmployeeID, prev.BaseSalary
+        FROM employees e
+        LEFT JOIN (
+            SELECT s.EmployeeID,
+                   s.BaseSalary,
+                   ROW_NUMBER() OVER (PARTITION BY s.EmployeeID ORDER BY {period_expr} DESC, s.SalaryID DESC) AS rn
+            FROM salaries s
+            WHERE {period_expr} < {placeholder}
+        ) prev ON prev.EmployeeID = e.EmployeeID AND prev.rn = 1
+        WHERE e.Status IS NULL OR e.Status <> {placeholder}
+    """, (period, "Nghỉ việc"), vendor)
+
+    existing = fetch_data_from_db(f"""
+        SELECT s.SalaryID, s.EmployeeID, s.Bonus, s.Deductions
+        FROM salaries s
+        WHERE {period_expr} = {placeholder}
+        ORDER BY s.SalaryID
+    """, (period,), vendor)
+
+    attendance_vendor = get_attendance_db_vendor()
+    attendance_period_expr = period_key_expr(attendance_vendor, "attendance", "a.AttendanceMonth")
+    attendance = fetch_data_from_db(f"""
+        SELECT a.EmployeeID, SUM(a.WorkDays) AS WorkDays, SUM(a.AbsentDays) AS AbsentDays, SUM(a.LeaveDays) AS LeaveDays
+        FROM attendance a
+        WHERE {attendance_period_expr} = {get_placeholder(attendance_vendor)}
+        GROUP BY a.EmployeeID
+    """, (period,), attendance_vendor)
+
+    return {
+        "employees": employees,
+        # Nếu một nhân viên có nhiều bản ghi trong kỳ thì giữ bản ghi mới nhất (SalaryID lớn nhất)
+        "existing": {row["EmployeeID"]: row for row in existing},
+        "attendance": {row["EmployeeID"]: row for row in attendance},
+    }
+
+
+def _compute_payroll(inputs: Dict[str, Any], base_overrides: Dict[int, float], default_base: float,
+                     standard_days: float, recalculate_deductions: bool = False) -> Dict[str, Any]:
+    """
+    Tính lương cho tất cả nhân viên trong một lượt:
+    Deductions = BaseSalary / ngày công chuẩn * AbsentDays (tối đa bằng BaseSalary),
+    Bonus giữ nguyên giá trị đã điều chỉnh trong kỳ (nếu có); Deductions cũng giữ nguyên với bản ghi
+    đã có, trừ khi recalculate_deductions. NetSalary = Base + Bonus - Deductions.
+    """
+    rows = []
+    skipped = []
+    missing_attendance = 0
+    for employee in inputs["employees"]:
+        employee_id = employee["EmployeeID"]
+        base = base_overrides.get(employee_id)
+        if base is None:
+            base = float(employee.get("BaseSalary") or 0) or default_base
+        if base <= 0:
+            skipped.append(employee_id)
+            continue
+
+        attendance = inputs["attendance"].get(employee_id)
+        if attendance is None:
+            missing_attendance += 1
+        absent_days = float((attendance or {}).get("AbsentDays") or 0)
+        deductions = round(min(base, base / standard_days * absent_days), 2) if standard_days > 0 else 0.0
+
+        current = inputs["existing"].get(employee_id)
+        bonus = float((current or {}).get("Bonus") or 0)
+        if current and not recalculate_deductions:
+            deductions = float(current.get("Deductions") or 0)
+        rows.append({
+            "SalaryID": current["SalaryID"] if current else None,
+            "EmployeeID": employee_id,
+            "BaseSalary": round(base, 2),
+            "Bonus": bonus,
+            "Deductions": deductions,
+            "NetSalary": round(base + bonus - deductions, 2),
+        })
+    return {"rows": rows, "skipped": skipped, "missing_attendance": missing_attendance}
+
+
+def _payroll_upsert(vendor: str, month: str, rows: List[Dict[str, Any]], recalculate_deductions: bool) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Câu upsert nhiều dòng theo khoá (EmployeeID, PeriodKey): MERGE ... WITH (HOLDLOCK) trên SQL Server,
+    INSERT ... ON DUPLICATE KEY UPDATE trên MySQL (dựa trên khoá UNIQUE của
+    migrations/salaries_unique_period_mysql.sql).
+    Bản ghi đã có: chỉ ghi BaseSalary (và Deductions nếu recalculate_deductions); NetSalary tính lại
+    trong câu lệnh từ Bonus/Deductions đang có trong database lúc ghi.
+    """
+    placeholder = get_placeholder(vendor)
+    if vendor == "sqlserver":
+        period_expr = period_key_expr(vendor, "salaries", "t.SalaryMonth")
+        deductions = "s.Deductions" if recalculate_deductions else "COALESCE(t.Deductions, 0)"
+        values = ", ".join(["(" + ", ".join([placeholder] * 7) + ")"] * len(rows))
+        query = f"""
+        MERGE salaries WITH (HOLDLOCK) AS t
+        USING (VALUES {values}) AS s (EmployeeID, PeriodKey, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary)
+        ON t.EmployeeID = s.EmployeeID AND {period_expr} = s.PeriodKey
+        WHEN MATCHED THEN
+            UPDATE SET BaseSalary = s.BaseSalary,{" Deductions = s.Deductions," if recalculate_deductions else ""}
+                       NetSalary = s.BaseSalary + COALESCE(t.Bonus, 0) - {deductions}
+        WHEN NOT MATCHED THEN
+            INSERT (EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary)
+            VALUES (s.EmployeeID, s.SalaryMonth, s.BaseSalary, s.Bonus, s.Deductions, s.NetSalary);
         """
-        result = fetch_data_from_db(get_query, (employee_id, salary_month), vendor)
-        return result[0] if result else {}
+        params = tuple(
+            value for row in rows
+            for value in (row["EmployeeID"], period_key(month), month, row["BaseSalary"], row["Bonus"],
+                          row["Deductions"], row["NetSalary"])
+        )
+        return query, params
+
+    deductions = "VALUES(Deductions)" if recalculate_deductions else "COALESCE(Deductions, 0)"
+    deductions_assignment = "\n        Deductions = VALUES(Deductions)," if recalculate_deductions else ""
+    values = ", ".join(["(" + ", ".join([placeholder] * 6) + ")"] * len(rows))
+    # NetSalary gán trước để mọi tham chiếu cột đều là giá trị cũ (MySQL dùng giá trị mới nếu cột đã gán trước đó)
+    query = f"""
+    INSERT INTO salaries (EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        NetSalary = VALUES(BaseSalary) + COALESCE(Bonus, 0) - {deductions},{deductions_assignment}
+        BaseSalary = VALUES(BaseSalary)
+    """
+    params = tuple(
+        value for row in rows
+        for value in (row["EmployeeID"], month, row["BaseSalary"], row["Bonus"], row["Deductions"], row["NetSalary"])
+    )
+    return query, params
+
+
+def _require_unique_period_key(vendor: str) -> None:
+    """ON DUPLICATE KEY UPDATE chỉ upsert được khi có khoá UNIQUE, thiếu khoá thì từ chối thay vì ghi trùng"""
+    if vendor != "sqlserver" and not has_unique_period_key(vendor, "salaries"):
+        raise RuntimeError(
+            "Bảng salaries chưa có khoá UNIQUE (EmployeeID, PeriodKey): "
+            "chạy migrations/salaries_unique_period_mysql.sql trước khi chạy lương"
+        )
+
+
+def run_payroll(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Chạy lương cho toàn bộ nhân viên đang làm việc trong một SalaryMonth.
+    Ghi bằng upsert nhiều dòng theo (EmployeeID, tháng) trong một transaction, nên chạy lại
+    (kể cả hai lượt chạy song song) cùng một kỳ không tạo bản ghi trùng
+    (cần migrations/salaries_unique_period_<vendor>.sql; MySQL thiếu khoá thì từ chối chạy lương).
+    Chạy lại giữ nguyên Bonus và Deductions đã chỉnh tay của bản ghi đã có, chỉ cập nhật
+    BaseSalary và NetSalary; RecalculateDeductions=true để tính lại Deductions theo chấm công.
+
+    data:
+        SalaryMonth: YYYY-MM hoặc YYYY-MM-DD (bắt buộc)
+        BaseSalaries: {EmployeeID: BaseSalary} - ghi đè lương cơ bản (tuỳ chọn)
+        DefaultBaseSalary: lương cơ bản cho nhân viên chưa có bản ghi lương nào (tuỳ chọn)
+        StandardWorkDays: số ngày công chuẩn (mặc định PAYROLL_STANDARD_WORK_DAYS)
+        RecalculateDeductions: ghi đè Deductions của bản ghi đã có (mặc định false)
+    """
+    month = _normalize_salary_month(data.get("SalaryMonth"))
+    base_overrides = {int(k): float(v) for k, v in (data.get("BaseSalaries") or {}).items()}
+    default_base = float(data.get("DefaultBaseSalary") or 0)
+    standard_days = float(data.get("StandardWorkDays") or _standard_work_days())
+    recalculate_deductions = bool(data.get("RecalculateDeductions"))
+
+    inputs = _load_payroll_inputs(month)
+    payroll = _compute_payroll(inputs, base_overrides, default_base, standard_days, recalculate_deductions)
+    rows = payroll["rows"]
+    updated = sum(1 for row in rows if row["SalaryID"] is not None)
+
+    vendor = get_salary_db_vendor()
+    if rows:
+        _require_unique_period_key(vendor)
+        with transaction(vendor) as conn:
+            cursor = conn.cursor()
+            try:
+                for start in range(0, len(rows), PAYROLL_UPSERT_BATCH):
+                    batch = rows[start:start + PAYROLL_UPSERT_BATCH]
+                    cursor.execute(*_payroll_upsert(vendor, month, batch, recalculate_deductions))
+            finally:
+                cursor.close()
+
+        mark_tables_changed("salaries")
+        refresh_month("salaries", month)
+
+    return {
+        "salary_month": month,
+        "employees_processed": len(rows),
+        "inserted": len(rows) - updated,
+        "updated": updated,
+        "deductions_recalculated": recalculate_deductions,
+        "skipped_without_base_salary": payroll["skipped"],
+        "missing_attendance": payroll["missing_attendance"],
+        "total_base_salary": round(sum(row["BaseSalary"] for row in rows), 2),
+        "total_bonus": round(sum(row["Bonus"] for row in rows), 2),
+        "total_deductions": round(sum(row["Deductions"] for row in rows), 2),
+        "total_net_salary": round(sum(row["NetSalary"] for row in rows), 2),
+    }
+
 
 def get_salary_by_id(salary_id: int) -> Optional[Dict[str, Any]]:
     """Lấy chi tiết bản ghi lương theo ID"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Join với employees để lấy tên nhân viên
     query = f"""
@@ -156,7 +361,7 @@ def get_salary_by_id(salary_id: int) -> Optional[Dict[str, Any]]:
 def update_salary(salary_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
     """Cập nhật bản ghi lương (Bonus/Deductions)"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Chỉ cho phép cập nhật Bonus và Deductions
     bonus = data.get("Bonus")
@@ -187,6 +392,8 @@ def update_salary(salary_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
     """
     
     execute_db(query, (new_bonus, new_deductions, new_net_salary, salary_id), vendor)
+    mark_tables_changed("salaries")
+    refresh_month("salaries", current_salary.get("SalaryMonth"))
     
     # Trả về bản ghi đã cập nhật
     return get_salary_by_id(salary_id)
@@ -194,7 +401,7 @@ def update_salary(salary_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
 def delete_salary(salary_id: int) -> Dict[str, Any]:
     """Xóa bản ghi lương"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     # Lấy thông tin trước khi xóa
     salary_record = get_salary_by_id(salary_id)
@@ -206,6 +413,8 @@ def delete_salary(salary_id: int) -> Dict[str, Any]:
     
     if rowcount == 0:
         raise Exception("Không tìm thấy bản ghi lương để xóa")
+    mark_tables_changed("salaries")
+    refresh_month("salaries", salary_record.get("SalaryMonth"))
     
     return {
         "message": f"Salary record with ID {salary_id} deleted successfully",
@@ -215,7 +424,7 @@ def delete_salary(salary_id: int) -> Dict[str, Any]:
 def get_my_salaries(employee_id: int) -> List[Dict[str, Any]]:
     """Lấy lịch sử lương của nhân viên"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
+    placeholder = get_placeholder(vendor)
     
     query = f"""
     SELECT SalaryID, EmployeeID, SalaryMonth, BaseSalary, Bonus, Deductions, NetSalary, CreatedAt
@@ -229,117 +438,58 @@ def get_my_salaries(employee_id: int) -> List[Dict[str, Any]]:
 def get_salary_statistics(salary_month: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
     """Thống kê tổng chi phí lương theo tháng hoặc năm"""
     vendor = get_salary_db_vendor()
-    placeholder = _placeholder(vendor)
     
     if salary_month:
-        # Thống kê theo tháng cụ thể
-        query = f"""
-        SELECT 
-            COUNT(*) as total_records,
-            SUM(BaseSalary) as total_base_salary,
-            SUM(Bonus) as total_bonus,
-            SUM(Deductions) as total_deductions,
-            SUM(NetSalary) as total_amount
-        FROM salaries 
-        WHERE SalaryMonth = {placeholder}
-        """
-        params = (salary_month,)
-        result = fetch_data_from_db(query, params, vendor)
-        stats = result[0] if result else {}
+        # Thống kê theo tháng cụ thể (đọc từ rollup theo tháng)
+        stats = get_month_totals("salaries", salary_month)
         
         return {
             "year": year,
             "month": salary_month,
-            "total_records": int(stats.get("total_records", 0)),
-            "total_base_salary": float(stats.get("total_base_salary", 0) or 0),
-            "total_bonus": float(stats.get("total_bonus", 0) or 0),
-            "total_deductions": float(stats.get("total_deductions", 0) or 0),
-            "total_amount": float(stats.get("total_amount", 0) or 0)
+            "total_records": stats["count"],
+            "total_base_salary": stats["BaseSalary"]["sum"],
+            "total_bonus": stats["Bonus"]["sum"],
+            "total_deductions": stats["Deductions"]["sum"],
+            "total_amount": stats["NetSalary"]["sum"]
         }
     elif year:
         # Thống kê theo năm - trả về dữ liệu theo tháng cho dashboard
-        monthly_query = f"""
-        SELECT 
-            SalaryMonth as month,
-            COUNT(*) as employee_count,
-            SUM(BaseSalary) as total_base_salary,
-            SUM(Bonus) as total_bonus,
-            SUM(Deductions) as total_deductions,
-            SUM(NetSalary) as total_net_salary,
-            SUM(BaseSalary + Bonus) as total_gross_salary
-        FROM salaries 
-        WHERE SalaryMonth LIKE {placeholder}
-        GROUP BY SalaryMonth
-        ORDER BY SalaryMonth
-        """
-        monthly_params = (f"{year}-%",)
-        
+        # Đọc từ rollup theo tháng (tối đa 12 dòng) thay vì quét bảng salaries
         try:
-            monthly_data = fetch_data_from_db(monthly_query, monthly_params, vendor)
+            monthly_data = get_monthly_summary("salaries", year)
         except Exception as e:
             print(f"Error fetching monthly salary data: {e}")
             monthly_data = []
         
-        # Tính tổng hợp cả năm
-        total_query = f"""
-        SELECT 
-            COUNT(*) as total_records,
-            SUM(BaseSalary) as total_base_salary,
-            SUM(Bonus) as total_bonus,
-            SUM(Deductions) as total_deductions,
-            SUM(NetSalary) as total_amount,
-            SUM(BaseSalary + Bonus) as total_gross_salary
-        FROM salaries 
-        WHERE SalaryMonth LIKE {placeholder}
-        """
-        try:
-            total_result = fetch_data_from_db(total_query, monthly_params, vendor)
-            total_stats = total_result[0] if total_result else {}
-        except Exception as e:
-            print(f"Error fetching total salary stats: {e}")
-            total_stats = {}
-        
         # Format monthly_data để phù hợp với dashboard
         formatted_monthly_data = []
         for month_row in monthly_data:
-            base_salary = float(month_row.get("total_base_salary", 0) or 0)
-            bonus = float(month_row.get("total_bonus", 0) or 0)
-            # Tính total_gross_salary = BaseSalary + Bonus (nếu SQL không tính được thì tính lại)
-            total_gross = month_row.get("total_gross_salary")
-            if total_gross is None:
-                total_gross = base_salary + bonus
-            else:
-                total_gross = float(total_gross or 0)
-            
+            base_salary = month_row["BaseSalary"]["sum"]
+            bonus = month_row["Bonus"]["sum"]
             formatted_monthly_data.append({
-                "month": month_row.get("month", ""),
-                "employee_count": int(month_row.get("employee_count", 0)),
-                "total_gross_salary": total_gross,
-                "total_net_salary": float(month_row.get("total_net_salary", 0) or 0),
+                "month": month_row["month"],
+                "employee_count": month_row["count"],
+                "total_gross_salary": base_salary + bonus,
+                "total_net_salary": month_row["NetSalary"]["sum"],
                 "total_base_salary": base_salary,
                 "total_bonus": bonus,
-                "total_deductions": float(month_row.get("total_deductions", 0) or 0)
+                "total_deductions": month_row["Deductions"]["sum"]
             })
         
-        # Tính total_gross_salary từ total_stats (nếu SQL không tính được thì tính lại)
-        total_base = float(total_stats.get("total_base_salary", 0) or 0)
-        total_bonus = float(total_stats.get("total_bonus", 0) or 0)
-        total_gross_from_stats = total_stats.get("total_gross_salary")
-        if total_gross_from_stats is None:
-            total_gross_salary = total_base + total_bonus
-        else:
-            total_gross_salary = float(total_gross_from_stats or 0)
+        # Tổng hợp cả năm = cộng các tháng
+        total_base = sum(row["total_base_salary"] for row in formatted_monthly_data)
+        total_bonus = sum(row["total_bonus"] for row in formatted_monthly_data)
         
         return {
             "year": year,
             "month": None,
             "monthly_data": formatted_monthly_data,
-            "total_records": int(total_stats.get("total_records", 0)),
+            "total_records": sum(row["employee_count"] for row in formatted_monthly_data),
             "total_base_salary": total_base,
             "total_bonus": total_bonus,
-            "total_deductions": float(total_stats.get("total_deductions", 0) or 0),
-            "total_amount": float(total_stats.get("total_amount", 0) or 0),
-            "total_gross_salary": total_gross_salary
+            "total_deductions": sum(row["total_deductions"] for row in formatted_monthly_data),
+            "total_amount": sum(row["total_net_salary"] for row in formatted_monthly_data),
+            "total_gross_salary": total_base + total_bonus
         }
     else:
         # Thống kê tổng quát
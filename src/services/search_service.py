@@ -1,40 +1,12 @@
-from typing import Dict, Any, List
-from config.sqlserver_connection import get_sqlserver_connection
-from config.mysql_connection import get_mysql_connection
-import os
-
-def get_db_vendor() -> str:
-	return os.environ.get("DB_VENDOR", "sqlserver").strip().lower()
-
-def _get_connection(vendor: str):
-	if vendor == "mysql":
-		return get_mysql_connection()
-	return get_sqlserver_connection()
-
-def _placeholder(vendor: str) -> str:
-	return "?" if vendor == "sqlserver" else "%s"
-
-def fetch_data_from_db(sql_query: str, params: tuple, vendor: str | None = None) -> List[Dict[str, Any]]:
-	conn = None
-	actual_vendor = vendor or get_db_vendor()
-	try:
-		conn = _get_connection(actual_vendor)
-		db_cursor = conn.cursor()
-		db_cursor.execute(sql_query, params)
-		columns = [column[0] for column in db_cursor.description]
-		return [dict(zip(columns, row)) for row in db_cursor.fetchall()]
-	except Exception as e:
-		raise Exception(f"Lỗi DTB: {e}")
-	finally:
-		if conn:
-			conn.close()
+from typing import Dict, Any
+from config.db import get_db_vendor, get_placeholder, fetch_data_from_db
 
 def search_all(keyword: str) -> Dict[str, Any]:
 	"""
 	Tìm kiếm toàn hệ thống
 	"""
 	vendor = get_db_vendor()
-	placeholder = _placeholder(vendor)
+	placeholder = get_placeholder(vendor)
 	keyword_pattern = f"%{keyword}%"
 	
 	results = {
@@ -99,6 +99,7 @@ const EmployeesAPI = {
         if (params.keyword) queryParams.append('keyword', params.keyword);
         if (params.page) queryParams.append('page', params.page);
         if (params.size) queryParams.append('size', params.size);
+        if (params.format) queryParams.append('format', params.format);
 
         const queryString = queryParams.toString();
         return await apiCallPython(`/employees${queryString ? '?' + queryString : ''}`);
@@ -207,6 +208,7 @@ const SalariesAPI = {
         const queryParams = new URLSearchParams();
         if (params.employee_id) queryParams.append('employee_id', params.employee_id);
         if (params.year) queryParams.append('year', params.year);
+        if (params.format) queryParams.append('format', params.format);
         const queryString = queryParams.toString();
         return await apiCallPython(`/salaries${queryString ? '?' + queryString : ''}`);
     },
@@ -246,6 +248,7 @@ const AttendanceAPI = {
         const queryParams = new URLSearchParams();
         if (params.employee_id) queryParams.append('employee_id', params.employee_id);
         if (params.year) queryParams.append('year', params.year);
+        if (params.format) queryParams.append('format', params.format);
         const queryString = queryParams.toString();
         return await apiCallPython(`/attendance${queryString ? '?' + queryString : ''}`);
     },
@@ -277,8 +280,8 @@ const AttendanceAPI = {
 
 // ========== PYTHON API - Dividends (PAYROLL_MANAGER hoặc ADMIN) ==========
 const DividendsAPI = {
-    getAll: async () => {
-        return await apiCallPython('/dividends');
+    getAll: async (params = {}) => {
+        return await apiCallPython(`/dividends${params.format ? '?format=' + params.format : ''}`);
     },
 
     getById: async (id) => {
@@ -323,6 +326,11 @@ const DashboardAPI = {
     // Lấy xu hướng dữ liệu trong N tháng gần đây
     getTrends: async (months = 6) => {
         return await apiCallPython(`/dashboard/trends?months=${months}`);
+    },
+
+    // Lấy toàn bộ dữ liệu dashboard của một vai trò trong một request
+    getBundle: async (role, year) => {
+        return await apiCallPython(`/dashboard/bundle?role=${encodeURIComponent(role)}&year=${year}`);
     }
 };
 
@@ -399,6 +407,30 @@ function showAlert(message, type = 'info') {
     }, 5000);
 }
 
+// ========== Dữ liệu dạng cột (format=columnar) ==========
+// Server trả về {columns: [...], rows: [[...], ...]} thay vì mảng object lặp lại tên cột
+
+function isColumnar(data) {
+    return !!data && Array.isArray(data.columns) && Array.isArray(data.rows);
+}
+
+// Lấy toàn bộ giá trị của một cột (dùng trực tiếp làm labels/data cho chart)
+function columnValues(data, name) {
+    const index = data.columns.indexOf(name);
+    return index < 0 ? [] : data.rows.map(row => row[index]);
+}
+
+// Chuyển về mảng object cho các bảng đang render theo tên field
+function columnarToRecords(data) {
+    if (!isColumnar(data)) return data;
+    const columns = data.columns;
+    return data.rows.map(row => {
+        const record = {};
+        for (let i = 0; i < columns.length; i++) record[columns[i]] = row[i];
+        return record;
+    });
+}
+
 function formatDate(dateString) {
     if (!dateString) return '-';
     const date = new Date(dateString);
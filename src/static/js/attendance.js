@@ -49,6 +49,8 @@ async function loadAttendances() {
     if (employeeId) params.employee_id = parseInt(employeeId);
     if (year) params.year = parseInt(year);
 
+    // Dạng cột: payload nhỏ hơn, không lặp tên field ở mỗi dòng
+    params.format = 'columnar';
     const result = await AttendanceAPI.getAll(params);
     
     console.log('Attendance API Response:', result); // Debug
@@ -62,7 +64,10 @@ async function loadAttendances() {
             data = data.data;
         } else if (data && !Array.isArray(data) && Array.isArray(data.data)) {
             data = data.data;
+        } else if (data && !isColumnar(data) && isColumnar(data.data)) {
+            data = data.data;
         }
+        data = columnarToRecords(data);
         
         const attendances = Array.isArray(data) ? data : [];
 
@@ -244,100 +244,100 @@ function setupRoleBasedVisibility() {
     }
 }
 
+// Load all dashboard sections for the current role in one request
+async function loadDashboardBundle(year, isHR, isPayroll) {
+    const role = isHR ? 'HR_MANAGER' : isPayroll ? 'PAYROLL_MANAGER' : 'ADMIN';
+    const bundleRes = await DashboardAPI.getBundle(role, year).catch(() => ({ success: false }));
+    if (!bundleRes.success || !bundleRes.data || !bundleRes.data.sections) {
+        return null;
+    }
+    // Mỗi section có dạng { success, data } giống response của API riêng lẻ
+    const sections = bundleRes.data.sections;
+    const section = (name) => sections[name] || null;
+    return {
+        overviewRes: section('overview') || { success: false },
+        salaryStatsRes: section('salary_stats'),
+        attendanceStatsRes: section('attendance_stats'),
+        deptStatsRes: section('department_stats'),
+        employeesRes: section('employees'),
+        positionsRes: section('positions'),
+        employeeStatsRes: section('employee_stats'),
+        dividendsRes: section('dividends'),
+        financialReportRes: section('financial_report'),
+        comparisonRes: section('comparison'),
+        topEmployeesRes: section('top_employees'),
+        topDepartmentsRes: section('top_departments'),
+        trendsRes: section('trends')
+    };
+}
+
+// Fallback: load each section with its own request
+async function loadDashboardSections(year, isHR, isPayroll) {
+    const res = {};
+    if (isHR) {
+        // HR_MANAGER: Load only HR-related data
+        [res.overviewRes, res.attendanceStatsRes, res.deptStatsRes, res.employeesRes, res.positionsRes, res.employeeStatsRes,
+         res.comparisonRes, res.topEmployeesRes, res.topDepartmentsRes, res.trendsRes] = await Promise.all([
+            DashboardAPI.getOverview().catch(() => ({ success: false })),
+            StatisticsAPI.getAttendanceStatistics(year).catch(() => ({ success: false })),
+            StatisticsAPI.getDepartmentStatistics().catch(() => ({ success: false })),
+            EmployeesAPI.getAll({ size: 10, page: 1 }).catch(() => ({ success: false })),
+            PositionsAPI.getAll().catch(() => ({ success: false })),
+            StatisticsAPI.getEmployeeStatistics().catch(() => ({ success: false })),
+            DashboardAPI.getComparison().catch(() => ({ success: false })),
+            DashboardAPI.getTopEmployees(5).catch(() => ({ success: false })),
+            DashboardAPI.getTopDepartments(5).catch(() => ({ success: false })),
+            DashboardAPI.getTrends(6).catch(() => ({ success: false }))
+        ]);
+    } else if (isPayroll) {
+        // PAYROLL_MANAGER: Load only payroll-related data
+        [res.overviewRes, res.salaryStatsRes, res.dividendsRes, res.financialReportRes,
+         res.comparisonRes, res.trendsRes] = await Promise.all([
+            DashboardAPI.getOverview().catch(() => ({ success: false })),
+            StatisticsAPI.getSalaryStatistics(year).catch(() => ({ success: false })),
+            DividendsAPI.getAll().catch(() => ({ success: false })),
+            ReportsAPI.getFinancialReport(year).catch(() => ({ success: false })),
+            DashboardAPI.getComparison().catch(() => ({ success: false })),
+            DashboardAPI.getTrends(6).catch(() => ({ success: false }))
+        ]);
+    } else {
+        // ADMIN: Load all data
+        [res.overviewRes, res.salaryStatsRes, res.attendanceStatsRes, res.deptStatsRes, res.employeesRes, res.dividendsRes, res.financialReportRes,
+         res.comparisonRes, res.topEmployeesRes, res.topDepartmentsRes, res.trendsRes] = await Promise.all([
+            DashboardAPI.getOverview(),
+            StatisticsAPI.getSalaryStatistics(year),
+            StatisticsAPI.getAttendanceStatistics(year),
+            StatisticsAPI.getDepartmentStatistics().catch(() => ({ success: false })),
+            EmployeesAPI.getAll({ size: 5, page: 1 }).catch(() => ({ success: false })),
+            DividendsAPI.getAll().catch(() => ({ success: false })),
+            ReportsAPI.getFinancialReport(year).catch(() => ({ success: false })),
+            DashboardAPI.getComparison().catch(() => ({ success: false })),
+            DashboardAPI.getTopEmployees(5).catch(() => ({ success: false })),
+            DashboardAPI.getTopDepartments(5).catch(() => ({ success: false })),
+            DashboardAPI.getTrends(6).catch(() => ({ success: false }))
+        ]);
+    }
+    return res;
+}
+
 async function loadDashboardData(year) {
     try {
         const isHR = isHRManager();
         const isPayroll = isPayrollManager();
         
-        // Load data based on role
-        let overviewRes, salaryStatsRes, attendanceStatsRes, deptStatsRes, employeesRes;
-        let positionsRes, employeeStatsRes, dividendsRes, financialReportRes;
-        let comparisonRes, topEmployeesRes, topDepartmentsRes, trendsRes;
+        // Load data based on role: one bundle request, falling back to separate requests
+        const res = (await loadDashboardBundle(year, isHR, isPayroll)) || (await loadDashboardSections(year, isHR, isPayroll));
+        const {
+            overviewRes, attendanceStatsRes, deptStatsRes, employeesRes, positionsRes, employeeStatsRes,
+            dividendsRes, financialReportRes, comparisonRes, topEmployeesRes, topDepartmentsRes, trendsRes
+        } = res;
+        // HR_MANAGER không xem dữ liệu lương
+        const salaryStatsRes = isHR ? null : res.salaryStatsRes;
         
-        if (isHR) {
-            // HR_MANAGER: Load only HR-related data
-            [overviewRes, attendanceStatsRes, deptStatsRes, employeesRes, positionsRes, employeeStatsRes,
-             comparisonRes, topEmployeesRes, topDepartmentsRes, trendsRes] = await Promise.all([
-                DashboardAPI.getOverview().catch(() => ({ success: false })),
-                StatisticsAPI.getAttendanceStatistics(year).catch(() => ({ success: false })),
-                StatisticsAPI.getDepartmentStatistics().catch(() => ({ success: false })),
-                EmployeesAPI.getAll({ size: 10, page: 1 }).catch(() => ({ success: false })),
-                PositionsAPI.getAll().catch(() => ({ success: false })),
-                StatisticsAPI.getEmployeeStatistics().catch(() => ({ success: false })),
-                DashboardAPI.getComparison().catch(() => ({ success: false })),
-                DashboardAPI.getTopEmployees(5).catch(() => ({ success: false })),
-                DashboardAPI.getTopDepartments(5).catch(() => ({ success: false })),
-                DashboardAPI.getTrends(6).catch(() => ({ success: false }))
-            ]);
-            
-            // Initialize salaryStatsRes as null for HR
-            salaryStatsRes = null;
-        } else if (isPayroll) {
-            // PAYROLL_MANAGER: Load only payroll-related data
-            [overviewRes, salaryStatsRes, dividendsRes, financialReportRes,
-             comparisonRes, trendsRes] = await Promise.all([
-                DashboardAPI.getOverview().catch(() => ({ success: false })),
-                StatisticsAPI.getSalaryStatistics(year).catch(() => ({ success: false })),
-                DividendsAPI.getAll().catch(() => ({ success: false })),
-                ReportsAPI.getFinancialReport(year).catch(() => ({ success: false })),
-                DashboardAPI.getComparison().catch(() => ({ success: false })),
-                DashboardAPI.getTrends(6).catch(() => ({ success: false }))
-            ]);
-            
-            // Update salary-related data
-            if (salaryStatsRes.success) {
+        if (!isHR) {
+            // Update salary-related data (PAYROLL_MANAGER and ADMIN)
+            if (salaryStatsRes && salaryStatsRes.success) {
                 updateSalaryCharts(salaryStatsRes.data);
-            }
-            
-            if (salaryStatsRes.success) {
-                updateSalarySummaryTable(salaryStatsRes.data);
-            }
-            
-            updateFinancialReports(overviewRes, dividendsRes, financialReportRes, salaryStatsRes, year);
-            
-            // Initialize other as null for Payroll
-            attendanceStatsRes = null;
-            deptStatsRes = null;
-            employeesRes = null;
-            positionsRes = null;
-            employeeStatsRes = null;
-        } else {
-            // ADMIN: Load all data
-            const [overviewResAll, salaryStatsResAll, attendanceStatsResAll, deptStatsResAll, employeesResAll, salariesRes, attendanceRes, dividendsResAll, financialReportResAll,
-                   comparisonResAll, topEmployeesResAll, topDepartmentsResAll, trendsResAll] = await Promise.all([
-                DashboardAPI.getOverview(),
-                StatisticsAPI.getSalaryStatistics(year),
-                StatisticsAPI.getAttendanceStatistics(year),
-                StatisticsAPI.getDepartmentStatistics().catch(() => ({ success: false })),
-                EmployeesAPI.getAll({ size: 5, page: 1 }).catch(() => ({ success: false })),
-                SalariesAPI.getAll({ year: year }).catch(() => ({ success: false })),
-                AttendanceAPI.getAll({ year: year }).catch(() => ({ success: false })),
-                DividendsAPI.getAll().catch(() => ({ success: false })),
-                ReportsAPI.getFinancialReport(year).catch(() => ({ success: false })),
-                DashboardAPI.getComparison().catch(() => ({ success: false })),
-                DashboardAPI.getTopEmployees(5).catch(() => ({ success: false })),
-                DashboardAPI.getTopDepartments(5).catch(() => ({ success: false })),
-                DashboardAPI.getTrends(6).catch(() => ({ success: false }))
-            ]);
-            
-            overviewRes = overviewResAll;
-            salaryStatsRes = salaryStatsResAll;
-            attendanceStatsRes = attendanceStatsResAll;
-            deptStatsRes = deptStatsResAll;
-            employeesRes = employeesResAll;
-            dividendsRes = dividendsResAll;
-            financialReportRes = financialReportResAll;
-            comparisonRes = comparisonResAll;
-            topEmployeesRes = topEmployeesResAll;
-            topDepartmentsRes = topDepartmentsResAll;
-            trendsRes = trendsResAll;
-            
-            // Update salary-related data
-            if (salaryStatsRes.success) {
-                updateSalaryCharts(salaryStatsRes.data);
-            }
-            
-            if (salaryStatsRes.success) {
                 updateSalarySummaryTable(salaryStatsRes.data);
             }
             
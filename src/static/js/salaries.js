@@ -49,6 +49,8 @@ async function loadSalaries() {
     if (employeeId) params.employee_id = parseInt(employeeId);
     if (year) params.year = parseInt(year);
 
+    // Dạng cột: payload nhỏ hơn, không lặp tên field ở mỗi dòng
+    params.format = 'columnar';
     const result = await SalariesAPI.getAll(params);
     
     console.log('Salaries API Response:', result); // Debug
@@ -62,7 +64,10 @@ async function loadSalaries() {
             data = data.data;
         } else if (data && !Array.isArray(data) && Array.isArray(data.data)) {
             data = data.data;
+        } else if (data && !isColumnar(data) && isColumnar(data.data)) {
+            data = data.data;
         }
+        data = columnarToRecords(data);
         
         const salaries = Array.isArray(data) ? data : [];
 
@@ -0,0 +1,155 @@
+import os
+import copy
+import time
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ------------------- Phiên bản dữ liệu theo bảng -------------------
+# Mỗi lần ghi vào một bảng thì version của bảng đó tăng lên, đồng thời các
+# cache có gắn tag là tên bảng sẽ bị xoá entry liên quan.
+
+_table_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+_caches: List["TTLCache"] = []
+
+
+def mark_tables_changed(*tables: str) -> None:
+	"""Gọi sau khi ghi thành công vào các bảng (employees, salaries, ...)"""
+	with _versions_lock:
+		for table in tables:
+			_table_versions[table] = _table_versions.get(table, 0) + 1
+	for cache in list(_caches):
+		cache.invalidate(*tables)
+
+
+def get_table_versions(*tables: str) -> Dict[str, int]:
+	with _versions_lock:
+		return {table: _table_versions.get(table, 0) for table in tables}
+
+
+# ------------------- TTL cache -------------------
+
+class TTLCache:
+	"""
+	Cache trong process, mỗi entry hết hạn sau ttl giây và gắn với một tập tag
+	(tên bảng) để có thể xoá khi dữ liệu nguồn thay đổi. ttl <= 0 thì tắt cache.
+	Giá trị trả ra là bản sao (deepcopy) nên người gọi sửa kết quả không làm hỏng cache.
+	"""
+
+	def __init__(self, name: str, ttl: float, max_entries: int = 512) -> None:
+		self.name = name
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self._entries: Dict[Hashable, Tuple[float, Any, frozenset]] = {}
+		self._lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+		self._invalidations = 0
+		self._clears = 0
+		_caches.append(self)
+
+	def get_or_compute(self, key: Hashable, tags: Iterable[str], compute: Callable[[], Any]) -> Any:
+		if self.ttl <= 0:
+			return compute()
+
+		tags = frozenset(tags)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry[0] > now:
+				self._hits += 1
+				return copy.deepcopy(entry[1])
+			self._misses += 1
+			clears = self._clears
+		# Chụp version trước khi tính: nếu có ghi vào bảng trong lúc compute thì
+		# kết quả có thể là dữ liệu trước khi ghi -> trả về nhưng không lưu
+		versions = get_table_versions(*tags)
+
+		value = compute()
+
+		with self._lock:
+			if clears == self._clears and get_table_versions(*tags) == versions:
+				if len(self._entries) >= self.max_entries:
+					self._evict_locked(time.monotonic())
+				self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value), tags)
+		return value
+
+	def _evict_locked(self, now: float) -> None:
+		"""Bỏ entry hết hạn; nếu vẫn đầy thì bỏ entry sắp hết hạn nhất"""
+		for key in [k for k, entry in self._entries.items() if entry[0] <= now]:
+			del self._entries[key]
+		if len(self._entries) >= self.max_entries:
+			oldest = min(self._entries, key=lambda k: self._entries[k][0])
+			del self._entries[oldest]
+
+	def invalidate(self, *tags: str) -> int:
+		"""Xoá các entry có gắn ít nhất một tag trong danh sách"""
+		wanted = set(tags)
+		with self._lock:
+			keys = [key for key, entry in self._entries.items() if entry[2] & wanted]
+			for key in keys:
+				del self._entries[key]
+			self._invalidations += len(keys)
+		return len(keys)
+
+	def peek(self, key: Hashable) -> Any:
+		"""Lấy giá trị còn hạn mà không tính vào hits/misses; không có thì trả về None"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry[0] > time.monotonic():
+				return copy.deepcopy(entry[1])
+		return None
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._clears += 1
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			lookups = self._hits + self._misses
+			return {
+				"name": self.name,
+				"ttl_seconds": self.ttl,
+				"entries": len(self._entries),
+				"hits": self._hits,
+				"misses": self._misses,
+				"hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+				"invalidations": self._invalidations,
+			}
+
+
+def cached(cache: TTLCache, tags: Iterable[str]):
+	"""Decorator cache kết quả của hàm theo tên hàm + tham số"""
+	tags = frozenset(tags)
+
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			key = (func.__name__, args, tuple(sorted(kwargs.items())))
+			return cache.get_or_compute(key, tags, lambda: func(*args, **kwargs))
+		return wrapper
+	return decorator
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+	return {cache.name: cache.stats() for cache in list(_caches)}
+
+
+def _env_ttl(name: str, default: float) -> float:
+	try:
+		return float(os.environ.get(name, default))
+	except ValueError:
+		logger.warning(f"Giá trị {name} không hợp lệ, dùng mặc định {default}")
+		return default
+
+
+# Cache cho các endpoint dashboard (DASHBOARD_CACHE_TTL giây, 0 để tắt)
+dashboard_cache = TTLCache("dashboard", _env_ttl("DASHBOARD_CACHE_TTL", 60))
+
+# Cache tổng số dòng của danh sách nhân viên theo bộ lọc (EMPLOYEE_COUNT_CACHE_TTL giây)
+employee_count_cache = TTLCache("employee_count", _env_ttl("EMPLOYEE_COUNT_CACHE_TTL", 300))
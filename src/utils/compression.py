@@ -0,0 +1,171 @@
+import os
+import time
+import zlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+try:
+	import brotli
+except ImportError:  # brotli là tuỳ chọn, không có thì chỉ dùng gzip
+	brotli = None
+
+logger = logging.getLogger(__name__)
+
+# ------------------- Nén response -------------------
+# Nén gzip/brotli theo Accept-Encoding cho response JSON/CSV/NDJSON lớn hơn ngưỡng.
+# Response stream (export) được nén dần từng chunk. Thời gian CPU dùng để nén được
+# cộng dồn theo encoding để cân đối giữa băng thông và CPU của worker.
+#   COMPRESS_MIN_SIZE   - số byte tối thiểu để nén (mặc định 1024)
+#   COMPRESS_GZIP_LEVEL - 1..9 (mặc định 6)
+#   COMPRESS_BR_QUALITY - 0..11 (mặc định 4)
+#   COMPRESS_ENABLED    - 0 để tắt
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain"}
+
+
+def _env_int(name: str, default: int) -> int:
+	try:
+		return int(os.environ.get(name, default))
+	except ValueError:
+		logger.warning(f"Giá trị {name} không hợp lệ, dùng mặc định {default}")
+		return default
+
+
+def _gzip_compressor(level: int):
+	# wbits=31: định dạng gzip (header + CRC)
+	compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+	return compressor.compress, compressor.flush
+
+
+def _brotli_compressor(quality: int):
+	compressor = brotli.Compressor(quality=quality)
+	return compressor.process, compressor.finish
+
+
+class _CompressionStats:
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._stats: Dict[str, Dict[str, float]] = {}
+
+	def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+		with self._lock:
+			entry = self._stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_ms": 0.0})
+			entry["responses"] += 1
+			entry["bytes_in"] += bytes_in
+			entry["bytes_out"] += bytes_out
+			entry["cpu_ms"] += cpu_seconds * 1000
+
+	def snapshot(self) -> Dict[str, Dict[str, Any]]:
+		with self._lock:
+			return {
+				encoding: {
+					**entry,
+					"cpu_ms": round(entry["cpu_ms"], 2),
+					"ratio": round(entry["bytes_out"] / entry["bytes_in"], 4) if entry["bytes_in"] else None,
+					"cpu_ms_per_mb": round(entry["cpu_ms"] / (entry["bytes_in"] / 1048576), 2) if entry["bytes_in"] else None,
+				}
+				for encoding, entry in self._stats.items()
+			}
+
+
+_stats = _CompressionStats()
+
+
+def get_compression_stats() -> Dict[str, Any]:
+	return {
+		"min_size": _env_int("COMPRESS_MIN_SIZE", 1024),
+		"gzip_level": _env_int("COMPRESS_GZIP_LEVEL", 6),
+		"br_quality": _env_int("COMPRESS_BR_QUALITY", 4),
+		"brotli_available": brotli is not None,
+		"encodings": _stats.snapshot(),
+	}
+
+
+def _choose_encoding() -> Optional[str]:
+	accepted = request.accept_encodings
+	if brotli is not None and accepted["br"] > 0:
+		return "br"
+	if accepted["gzip"] > 0:
+		return "gzip"
+	return None
+
+
+def _compressor(encoding: str):
+	if encoding == "br":
+		return _brotli_compressor(_env_int("COMPRESS_BR_QUALITY", 4))
+	return _gzip_compressor(_env_int("COMPRESS_GZIP_LEVEL", 6))
+
+
+def _compress_stream(chunks: Iterable[Any], encoding: str) -> Iterator[bytes]:
+	process, finish = _compressor(encoding)
+	bytes_in = bytes_out = 0
+	cpu = 0.0
+	for chunk in chunks:
+		data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+		bytes_in += len(data)
+		start = time.thread_time()
+		out = process(data)
+		cpu += time.thread_time() - start
+		if out:
+			bytes_out += len(out)
+			yield out
+	start = time.thread_time()
+	out = finish()
+	cpu += time.thread_time() - start
+	bytes_out += len(out)
+	_stats.record(encoding, bytes_in, bytes_out, cpu)
+	if out:
+		yield out
+
+
+def _set_encoding_headers(response: Response, encoding: str) -> None:
+	response.headers["Content-Encoding"] = encoding
+	response.vary.add("Accept-Encoding")
+	# Biểu diễn nén là một biểu diễn khác -> ETag mạnh phải khác bản gốc
+	etag, weak = response.get_etag()
+	if etag:
+		response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+
+def compress_response(response: Response) -> Response:
+	"""Nén response nếu client chấp nhận và response đủ lớn (gọi trong after_request)"""
+	if (
+		request.method == "HEAD"
+		or response.status_code != 200
+		or "Content-Encoding" in response.headers
+		or response.mimetype not in COMPRESSIBLE_MIMETYPES
+	):
+		return response
+	encoding = _choose_encoding()
+	if encoding is None:
+		return response
+
+	if response.is_streamed:
+		response.response = _compress_stream(response.response, encoding)
+		response.headers.pop("Content-Length", None)
+		_set_encoding_headers(response, encoding)
+		return response
+
+	body = response.get_data()
+	if len(body) < _env_int("COMPRESS_MIN_SIZE", 1024):
+		return response
+	process, finish = _compressor(encoding)
+	start = time.thread_time()
+	compressed = process(body) + finish()
+	_stats.record(encoding, len(body), len(compressed), time.thread_time() - start)
+	response.set_data(compressed)
+	_set_encoding_headers(response, encoding)
+	return response
+
+
+def init_compression(app: Flask) -> None:
+	"""
+	Đăng ký nén response. Gọi trước init_etags: after_request chạy theo thứ tự ngược,
+	nên ETag được gắn trước rồi mới thêm hậu tố encoding.
+	"""
+	if os.environ.get("COMPRESS_ENABLED", "1").strip() in ("0", "false", "False"):
+		return
+	app.after_request(compress_response)
@@ -0,0 +1,69 @@
+import os
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_worker_state = threading.local()
+
+
+def _max_workers() -> int:
+	try:
+		return max(1, int(os.environ.get("FANOUT_MAX_WORKERS", "8")))
+	except ValueError:
+		return 8
+
+
+def _get_executor() -> ThreadPoolExecutor:
+	"""Worker pool dùng chung, giới hạn bởi FANOUT_MAX_WORKERS (mặc định 8)"""
+	global _executor
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(max_workers=_max_workers(), thread_name_prefix="fanout")
+	return _executor
+
+
+def _run_in_worker(ctx: contextvars.Context, func: Callable[[], Any]) -> Any:
+	_worker_state.active = True
+	try:
+		# Chạy trong bản sao context của thread gọi để Flask g / app context vẫn dùng được
+		return ctx.run(func)
+	finally:
+		_worker_state.active = False
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+	"""
+	Chạy song song các tác vụ độc lập trên worker pool dùng chung.
+	Trả về (results, errors) theo key; một tác vụ lỗi không ảnh hưởng các tác vụ khác.
+	Nếu đang ở trong một worker (gọi lồng nhau) thì chạy tuần tự để tránh
+	chiếm hết pool rồi chờ lẫn nhau.
+	"""
+	results: Dict[str, Any] = {}
+	errors: Dict[str, Exception] = {}
+
+	if len(tasks) <= 1 or getattr(_worker_state, "active", False):
+		for key, func in tasks.items():
+			try:
+				results[key] = func()
+			except Exception as e:
+				errors[key] = e
+		return results, errors
+
+	executor = _get_executor()
+	futures = {
+		key: executor.submit(_run_in_worker, contextvars.copy_context(), func)
+		for key, func in tasks.items()
+	}
+	for key, future in futures.items():
+		try:
+			results[key] = future.result()
+		except Exception as e:
+			errors[key] = e
+	return results, errors
@@ -0,0 +1,94 @@
+import os
+import time
+import uuid
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+from utils.cache import get_table_versions
+
+# ------------------- ETag / conditional GET -------------------
+# ETag của một GET được tính từ version của các bảng mà blueprint đọc (tăng mỗi lần
+# mark_tables_changed) + URL đầy đủ, nên có thể so với If-None-Match và trả 304
+# ngay trong before_request, trước khi chạy query nào.
+# Version chỉ tăng trong process hiện tại, vì vậy ETag còn gắn với token của process
+# và một cửa sổ thời gian ETAG_VERSION_TTL giây (mặc định 60, giống TTL cache dashboard)
+# để thay đổi từ worker/process khác (vd: app Java) cũng được nhận sau tối đa một cửa sổ.
+
+_ALL_TABLES = ("employees", "departments", "positions", "salaries", "attendance", "dividends")
+
+# blueprint -> các bảng mà response của blueprint đó phụ thuộc
+BLUEPRINT_TABLES: Dict[str, Tuple[str, ...]] = {
+	"employees": ("employees", "departments", "positions", "salaries"),
+	"departments": ("departments", "employees", "positions"),
+	"positions": ("positions", "employees", "departments"),
+	"salaries": ("salaries", "employees"),
+	"attendance": ("attendance", "employees"),
+	"dividends": ("dividends", "employees"),
+	"reports": _ALL_TABLES,
+	"dashboard": _ALL_TABLES,
+	"search": ("employees", "departments", "positions"),
+}
+
+# Endpoint trả về số liệu vận hành (thay đổi liên tục), không gắn ETag
+EXCLUDED_ENDPOINTS = {"dashboard.get_cache_stats_endpoint", "dashboard.debug_data"}
+
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def _version_ttl() -> float:
+	try:
+		return max(1.0, float(os.environ.get("ETAG_VERSION_TTL", "60")))
+	except ValueError:
+		return 60.0
+
+
+def _version_etag() -> Optional[str]:
+	"""ETag theo version bảng cho request hiện tại, None nếu request không áp dụng"""
+	if request.method not in ("GET", "HEAD") or request.endpoint in EXCLUDED_ENDPOINTS:
+		return None
+	tables = BLUEPRINT_TABLES.get(request.blueprint or "")
+	if not tables:
+		return None
+	# Browser mở trang HTML cùng URL với API -> không áp dụng (route trả về template)
+	accept_header = request.headers.get("Accept", "")
+	if "text/html" in accept_header and "application/json" not in accept_header:
+		return None
+
+	versions = get_table_versions(*tables)
+	parts = [
+		_PROCESS_TOKEN,
+		str(int(time.time() // _version_ttl())),
+		request.full_path,
+		",".join(f"{table}={versions[table]}" for table in tables),
+	]
+	return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def init_etags(app: Flask) -> None:
+	"""Đăng ký before/after_request để gắn ETag và trả 304 khi If-None-Match khớp"""
+
+	@app.before_request
+	def answer_not_modified():
+		etag = _version_etag()
+		g.etag = etag
+		if etag is None:
+			return None
+		# Bản nén mang ETag có hậu tố encoding (xem utils/compression.py)
+		for candidate in (etag, f"{etag}-gzip", f"{etag}-br"):
+			if request.if_none_match.contains(candidate):
+				response = Response(status=304)
+				response.set_etag(candidate)
+				response.headers["Cache-Control"] = "private, no-cache"
+				return response
+		return None
+
+	@app.after_request
+	def attach_etag(response: Response) -> Response:
+		etag = getattr(g, "etag", None)
+		if etag is not None and response.status_code == 200 and "ETag" not in response.headers:
+			response.set_etag(etag)
+			# Cho phép lưu nhưng luôn hỏi lại server (để nhận 304)
+			response.headers["Cache-Control"] = "private, no-cache"
+		return response
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator
+
+from flask import Response, stream_with_context
+
+# Định dạng export -> mimetype
+EXPORT_FORMATS = {
+	"csv": "text/csv; charset=utf-8",
+	"ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+# Số dòng gom lại trước mỗi lần ghi ra response
+_CHUNK_ROWS = 500
+
+
+def _plain_value(value: Any) -> Any:
+	"""Giá trị DB -> giá trị ghi được ra CSV/JSON (ngày dạng ISO, Decimal -> float)"""
+	if isinstance(value, (datetime.date, datetime.datetime)):
+		return value.isoformat()
+	if isinstance(value, Decimal):
+		return float(value)
+	return value
+
+
+def _csv_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+	first = next(rows, None)
+	if first is None:
+		return
+	columns = list(first.keys())
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	# BOM để Excel đọc đúng tiếng Việt
+	buffer.write("\ufeff")
+	writer.writerow(columns)
+	for index, row in enumerate(chain([first], rows), start=1):
+		writer.writerow([_plain_value(row.get(column)) for column in columns])
+		if index % _CHUNK_ROWS == 0:
+			yield buffer.getvalue()
+			buffer.seek(0)
+			buffer.truncate()
+	yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+	lines = []
+	for row in rows:
+		lines.append(json.dumps({k: _plain_value(v) for k, v in row.items()}, ensure_ascii=False))
+		if len(lines) >= _CHUNK_ROWS:
+			yield "\n".join(lines) + "\n"
+			lines = []
+	if lines:
+		yield "\n".join(lines) + "\n"
+
+
+def export_response(rows: Iterable[Dict[str, Any]], fmt: str, filename: str) -> Response:
+	"""
+	Response stream các dòng dưới dạng CSV hoặc NDJSON.
+	Dòng đầu tiên được đọc trước khi trả response để lỗi query vẫn trả về được mã lỗi HTTP.
+	"""
+	if fmt not in EXPORT_FORMATS:
+		raise ValueError(f"format phải là một trong: {', '.join(EXPORT_FORMATS)}")
+	rows = iter(rows)
+	first = next(rows, None)
+	rows = chain([first], rows) if first is not None else iter(())
+	chunks = _csv_chunks(rows) if fmt == "csv" else _ndjson_chunks(rows)
+	return Response(
+		stream_with_context(chunks),
+		content_type=EXPORT_FORMATS[fmt],
+		headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+	)
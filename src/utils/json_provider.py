@@ -0,0 +1,75 @@
+import os
+import json
+import uuid
+import datetime
+from decimal import Decimal
+from typing import Any
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+	import orjson
+except ImportError:  # orjson là tuỳ chọn, không có thì dùng json của stdlib
+	orjson = None
+
+# Key dict không phải str (vd: {EmployeeID: ...}) vẫn serialize được như json stdlib
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _default(value: Any) -> Any:
+	"""Kiểu dữ liệu trả về từ pyodbc/mysql-connector -> kiểu JSON (ngày ISO 8601, Decimal -> số)"""
+	if isinstance(value, Decimal):
+		return float(value)
+	if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+		return value.isoformat()
+	if isinstance(value, uuid.UUID):
+		return str(value)
+	if isinstance(value, (set, frozenset)):
+		return list(value)
+	if isinstance(value, (bytes, bytearray)):
+		return value.decode("utf-8", errors="replace")
+	raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+	"""Serialize ra bytes UTF-8: orjson nếu có, ngược lại json stdlib dạng gọn"""
+	if orjson is not None:
+		return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+	return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+	"""
+	JSON provider cho jsonify(): encode thẳng ra bytes (không sort key, không escape ASCII).
+	Ngày/giờ trả về dạng ISO 8601 và Decimal thành số, thay vì chuỗi HTTP-date / chuỗi số
+	của provider mặc định. Ở chế độ debug chỉ in đẹp (indent), kiểu dữ liệu trả về giống hệt.
+	"""
+
+	def dumps(self, obj: Any, **kwargs: Any) -> str:
+		if kwargs:
+			kwargs.setdefault("default", _default)
+			kwargs.setdefault("ensure_ascii", False)
+			return json.dumps(obj, **kwargs)
+		return dumps_bytes(obj).decode("utf-8")
+
+	def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+		if orjson is not None and not kwargs:
+			return orjson.loads(s)
+		return json.loads(s, **kwargs)
+
+	def response(self, *args: Any, **kwargs: Any):
+		obj = self._prepare_response_obj(args, kwargs)
+		if self._app.debug:
+			body = json.dumps(obj, indent=2, default=_default, ensure_ascii=False).encode("utf-8")
+		else:
+			body = dumps_bytes(obj)
+		return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def configure_json(app: Flask) -> None:
+	"""JSON_PROVIDER=fast (mặc định) dùng FastJSONProvider, JSON_PROVIDER=default giữ provider của Flask"""
+	if os.environ.get("JSON_PROVIDER", "fast").strip().lower() == "default":
+		return
+	app.json_provider_class = FastJSONProvider
+	app.json = FastJSONProvider(app)
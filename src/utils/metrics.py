@@ -0,0 +1,232 @@
+import time
+import bisect
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from flask import Flask, Response, g, request
+
+from config.db_pool import get_pool_stats
+from config.query_stats import HISTOGRAM_BOUNDS_MS, get_request_query_totals, query_stats
+from clients.java_client import get_java_latency_histogram
+from utils.cache import get_cache_stats
+
+# ------------------- /metrics (định dạng text của Prometheus) -------------------
+# Số liệu request được ghi trong before/after_request: mỗi request chỉ tốn vài phép
+# cộng dưới một lock. Pool DB, cache, thống kê query và JavaClient được đọc từ các
+# bộ đếm sẵn có tại thời điểm scrape.
+# Nhãn route là rule của Flask (vd: /employees/<int:employee_id>) để số series không
+# tăng theo ID; request không khớp route nào gộp vào "<unmatched>".
+# Với response stream (export), thời gian đo đến khi bắt đầu trả response.
+
+# Bucket (giây) cho độ trễ request
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bucket cho số query mỗi request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class _Histogram:
+	__slots__ = ("bounds", "buckets", "count", "total")
+
+	def __init__(self, bounds: Sequence[float]) -> None:
+		self.bounds = bounds
+		self.buckets = [0] * (len(bounds) + 1)
+		self.count = 0
+		self.total = 0.0
+
+	def observe(self, value: float) -> None:
+		self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+		self.count += 1
+		self.total += value
+
+
+class _RequestMetrics:
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self.latency: Dict[Tuple[str, str, str, str], _Histogram] = {}
+		self.queries: Dict[Tuple[str, str], _Histogram] = {}
+		self.db_seconds: Dict[Tuple[str, str], float] = {}
+		self.in_flight: Dict[str, int] = {}
+
+	def started(self, blueprint: str) -> None:
+		with self._lock:
+			self.in_flight[blueprint] = self.in_flight.get(blueprint, 0) + 1
+
+	def finished(self, blueprint: str) -> None:
+		with self._lock:
+			self.in_flight[blueprint] = self.in_flight.get(blueprint, 1) - 1
+
+	def observe(self, blueprint: str, route: str, method: str, status: str, seconds: float, query_count: int, query_ms: float) -> None:
+		with self._lock:
+			key = (blueprint, route, method, status)
+			histogram = self.latency.get(key)
+			if histogram is None:
+				histogram = self.latency[key] = _Histogram(REQUEST_BUCKETS)
+			histogram.observe(seconds)
+
+			route_key = (blueprint, route)
+			histogram = self.queries.get(route_key)
+			if histogram is None:
+				histogram = self.queries[route_key] = _Histogram(QUERY_COUNT_BUCKETS)
+			histogram.observe(query_count)
+			self.db_seconds[route_key] = self.db_seconds.get(route_key, 0.0) + query_ms / 1000
+
+
+_requests = _RequestMetrics()
+
+
+# ------------------- Ghi định dạng text -------------------
+
+def _escape(value: str) -> str:
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+	text = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+	return f"{{{text}}}" if text else ""
+
+
+def _format_bound(bound: float) -> str:
+	return repr(float(bound))
+
+
+def _write_histogram(lines: List[str], name: str, labels: List[Tuple[str, str]], bounds: Sequence[float], buckets: Sequence[int], count: int, total: float) -> None:
+	cumulative = 0
+	for bound, bucket_count in zip(bounds, buckets):
+		cumulative += bucket_count
+		lines.append(f"{name}_bucket{_labels(labels + [('le', _format_bound(bound))])} {cumulative}")
+	lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {count}")
+	lines.append(f"{name}_sum{_labels(labels)} {total}")
+	lines.append(f"{name}_count{_labels(labels)} {count}")
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+	lines.append(f"# HELP {name} {help_text}")
+	lines.append(f"# TYPE {name} {kind}")
+
+
+def _request_lines(lines: List[str]) -> None:
+	with _requests._lock:
+		latency = [(key, list(h.buckets), h.count, h.total) for key, h in _requests.latency.items()]
+		queries = [(key, list(h.buckets), h.count, h.total) for key, h in _requests.queries.items()]
+		db_seconds = dict(_requests.db_seconds)
+		in_flight = dict(_requests.in_flight)
+
+	_header(lines, "http_request_duration_seconds", "histogram", "Request latency by blueprint/route/method/status")
+	for (blueprint, route, method, status), buckets, count, total in latency:
+		labels = [("blueprint", blueprint), ("route", route), ("method", method), ("status", status)]
+		_write_histogram(lines, "http_request_duration_seconds", labels, REQUEST_BUCKETS, buckets, count, total)
+
+	_header(lines, "http_requests_in_flight", "gauge", "Requests currently being handled")
+	for blueprint, value in in_flight.items():
+		lines.append(f"http_requests_in_flight{_labels([('blueprint', blueprint)])} {value}")
+
+	_header(lines, "http_request_db_queries", "histogram", "DB queries executed per request")
+	for (blueprint, route), buckets, count, total in queries:
+		labels = [("blueprint", blueprint), ("route", route)]
+		_write_histogram(lines, "http_request_db_queries", labels, QUERY_COUNT_BUCKETS, buckets, count, total)
+
+	_header(lines, "http_request_db_seconds_total", "counter", "Time spent in DB queries by route")
+	for (blueprint, route), seconds in db_seconds.items():
+		lines.append(f"http_request_db_seconds_total{_labels([('blueprint', blueprint), ('route', route)])} {seconds}")
+
+
+def _db_lines(lines: List[str]) -> None:
+	pools = get_pool_stats()
+	gauges = (
+		("db_pool_connections_in_use", "in_use", "Connections checked out of the pool"),
+		("db_pool_connections_idle", "idle", "Idle connections kept in the pool"),
+		("db_pool_max_size", "max_size", "Configured pool size"),
+	)
+	for name, field, help_text in gauges:
+		_header(lines, name, "gauge", help_text)
+		for vendor, stats in pools.items():
+			lines.append(f"{name}{_labels([('vendor', vendor)])} {stats[field]}")
+	counters = (
+		("db_pool_checkouts_total", "checkouts", "Connections handed out"),
+		("db_pool_waits_total", "waits", "Checkouts that had to wait for a free connection"),
+		("db_pool_timeouts_total", "timeouts", "Checkouts that timed out"),
+	)
+	for name, field, help_text in counters:
+		_header(lines, name, "counter", help_text)
+		for vendor, stats in pools.items():
+			lines.append(f"{name}{_labels([('vendor', vendor)])} {stats[field]}")
+	_header(lines, "db_pool_wait_seconds_total", "counter", "Total time spent waiting for a connection")
+	for vendor, stats in pools.items():
+		lines.append(f"db_pool_wait_seconds_total{_labels([('vendor', vendor)])} {stats['wait_time_total_ms'] / 1000}")
+
+	totals = query_stats.vendor_totals()
+	bounds_seconds = [bound / 1000 for bound in HISTOGRAM_BOUNDS_MS]
+	_header(lines, "db_query_duration_seconds", "histogram", "Query latency by vendor (execute + fetch)")
+	for vendor, total in totals.items():
+		_write_histogram(lines, "db_query_duration_seconds", [("vendor", vendor)], bounds_seconds, total["buckets"], total["count"], total["total_ms"] / 1000)
+	_header(lines, "db_query_errors_total", "counter", "Queries that raised an error")
+	for vendor, total in totals.items():
+		lines.append(f"db_query_errors_total{_labels([('vendor', vendor)])} {total['errors']}")
+
+
+def _cache_lines(lines: List[str]) -> None:
+	caches = get_cache_stats()
+	for name, field, kind, help_text in (
+		("cache_hits_total", "hits", "counter", "Cache lookups served from memory"),
+		("cache_misses_total", "misses", "counter", "Cache lookups that computed the value"),
+		("cache_entries", "entries", "gauge", "Entries currently cached"),
+	):
+		_header(lines, name, kind, help_text)
+		for cache_name, stats in caches.items():
+			lines.append(f"{name}{_labels([('cache', cache_name)])} {stats[field]}")
+
+
+def _java_lines(lines: List[str]) -> None:
+	bounds_ms, buckets, count, total_ms = get_java_latency_histogram()
+	_header(lines, "java_client_request_duration_seconds", "histogram", "Latency of calls to the Java service")
+	_write_histogram(lines, "java_client_request_duration_seconds", [], [bound / 1000 for bound in bounds_ms], buckets, count, total_ms / 1000)
+
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics() -> str:
+	"""Toàn bộ số liệu theo định dạng text exposition của Prometheus"""
+	lines: List[str] = []
+	_request_lines(lines)
+	_db_lines(lines)
+	_cache_lines(lines)
+	_java_lines(lines)
+	return "\n".join(lines) + "\n"
+
+
+# ------------------- Hook request -------------------
+
+def _blueprint_label() -> str:
+	return request.blueprint or "app"
+
+
+def init_metrics(app: Flask) -> None:
+	"""
+	Đăng ký hook đo request. Gọi trước init_compression/init_etags:
+	before_request chạy trước khi ETag trả 304, after_request chạy sau cùng (thấy status cuối).
+	"""
+
+	@app.before_request
+	def start_request_timer():
+		g.metrics_start = time.perf_counter()
+		g.metrics_blueprint = _blueprint_label()
+		_requests.started(g.metrics_blueprint)
+
+	@app.after_request
+	def observe_request(response: Response) -> Response:
+		start = g.get("metrics_start")
+		if start is not None:
+			route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+			query_count, query_ms = get_request_query_totals()
+			_requests.observe(
+				g.metrics_blueprint, route, request.method, str(response.status_code),
+				time.perf_counter() - start, query_count, query_ms,
+			)
+		return response
+
+	@app.teardown_request
+	def finish_request(_error=None):
+		blueprint = g.pop("metrics_blueprint", None)
+		if blueprint is not None:
+			_requests.finished(blueprint)
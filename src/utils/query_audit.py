@@ -0,0 +1,64 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List
+
+from flask import Flask, Response, g, request
+
+from config.query_stats import fingerprint_id, get_request_fingerprints, get_request_query_totals, query_audit_enabled
+
+logger = logging.getLogger("query_audit")
+
+# ------------------- Phát hiện N+1 theo request -------------------
+# Dùng cho môi trường dev/staging (QUERY_AUDIT=1): mỗi response có header
+#   X-Query-Count    - số query đã chạy trong request
+#   X-Query-Time-Ms  - tổng thời gian các query
+#   X-Query-Repeated - số câu lệnh (fingerprint) bị lặp từ N_PLUS_ONE_THRESHOLD lần trở lên
+# và một dòng JSON cảnh báo (logger "query_audit", kèm trace_id) khi có câu lệnh lặp,
+# tức là query đang chạy trong vòng lặp Python thay vì gộp thành một.
+#   N_PLUS_ONE_THRESHOLD - số lần lặp cùng fingerprint để cảnh báo (mặc định 3)
+# Query chạy trong lúc stream response (export) không được tính vào header.
+
+
+def _threshold() -> int:
+	try:
+		return max(2, int(os.environ.get("N_PLUS_ONE_THRESHOLD", "3")))
+	except ValueError:
+		return 3
+
+
+def find_repeated_queries(fingerprints: Dict[str, int], threshold: int) -> List[Dict[str, Any]]:
+	"""Các fingerprint chạy >= threshold lần, nhiều nhất trước"""
+	repeated = [
+		{"fingerprint_id": fingerprint_id(text), "count": count, "fingerprint": text[:300]}
+		for text, count in fingerprints.items()
+		if count >= threshold
+	]
+	repeated.sort(key=lambda item: item["count"], reverse=True)
+	return repeated
+
+
+def init_query_audit(app: Flask) -> None:
+	"""Đăng ký after_request gắn X-Query-Count và cảnh báo N+1 (chỉ khi QUERY_AUDIT=1)"""
+	if not query_audit_enabled():
+		return
+
+	@app.after_request
+	def audit_queries(response: Response) -> Response:
+		query_count, query_ms = get_request_query_totals()
+		repeated = find_repeated_queries(get_request_fingerprints(), _threshold())
+		response.headers["X-Query-Count"] = str(query_count)
+		response.headers["X-Query-Time-Ms"] = f"{query_ms:.1f}"
+		response.headers["X-Query-Repeated"] = str(len(repeated))
+		if repeated:
+			logger.warning(json.dumps({
+				"event": "n_plus_one",
+				"trace_id": g.get("trace_id"),
+				"method": request.method,
+				"path": request.path,
+				"endpoint": request.endpoint,
+				"query_count": query_count,
+				"query_ms": round(query_ms, 2),
+				"repeated": repeated,
+			}, ensure_ascii=False))
+		return response
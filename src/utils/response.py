@@ -1,6 +1,18 @@
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Tuple
 from datetime import datetime
 
+_now_text_cache: Tuple[int, str] = (0, "")
+
+
+def _now_text() -> str:
+	"""Thời gian dạng dd/mm/YYYY HH:MM:SS, chỉ format lại mỗi giây một lần"""
+	global _now_text_cache
+	second = int(time.time())
+	if _now_text_cache[0] != second:
+		_now_text_cache = (second, datetime.fromtimestamp(second).strftime("%d/%m/%Y %H:%M:%S"))
+	return _now_text_cache[1]
+
 
 def wrap_success(data: Any, trace_id: Optional[str] = None) -> Dict[str, Any]:
 	return {
@@ -10,7 +22,7 @@ def wrap_success(data: Any, trace_id: Optional[str] = None) -> Dict[str, Any]:
 		"data": data,
 		"size": len(data) if isinstance(data, (list, tuple, set)) else 0,
 		"traceId": trace_id,
-		"thời gian": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+		"thời gian": _now_text()
 	}
 
 
@@ -22,7 +34,7 @@ def wrap_error(code: str, message: str, domain: Optional[str] = None, details: O
 		"domain": domain,
 		"details": details,
 		"traceId": trace_id,
-		"thời gian": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+		"thời gian": _now_text()
 	}
 
 
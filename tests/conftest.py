@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Service import theo kiểu "from config.db import ..." (chạy app từ src/), dữ liệu mẫu lấy từ benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "benchmarks")]
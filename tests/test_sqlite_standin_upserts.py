@@ -0,0 +1,90 @@
+"""
+Chạy hai câu upsert nhiều dòng (MERGE trên sqlserver, ON DUPLICATE KEY trên mysql) của
+run_payroll và import_attendances trên SQLite đóng thế (SQLITE_STANDIN), không cần server thật.
+"""
+import pytest
+
+from hr_dataset import generate_dataset, load_dataset
+
+EMPLOYEES = 20
+NEW_MONTH = "2031-01"
+
+
+@pytest.fixture(params=["sqlserver", "mysql"])
+def vendor(request, monkeypatch, tmp_path):
+    vendor = request.param
+    monkeypatch.setenv("SQLITE_STANDIN", vendor)
+    monkeypatch.setenv(f"SQLITE_{vendor.upper()}_DB_PATH", str(tmp_path / f"hr_{vendor}.db"))
+    for name in ("DB_VENDOR", "SALARY_DB_VENDOR", "ATTENDANCE_DB_VENDOR"):
+        monkeypatch.setenv(name, vendor)
+    load_dataset(generate_dataset(EMPLOYEES, 2, seed=7), vendor)
+    # Mỗi test có database mới: bỏ kết quả kiểm tra khoá UNIQUE của database trước
+    from config import db
+    db._unique_period_keys.clear()
+    return vendor
+
+
+def _count(vendor, table, column):
+    from config.db import fetch_scalar_from_db
+    return fetch_scalar_from_db(f"SELECT COUNT(*) FROM {table} WHERE {column} >= '{NEW_MONTH}-01'", (), vendor)
+
+
+def test_run_payroll_upsert(vendor):
+    from config.db import fetch_data_from_db
+    from services.salarie_service import run_payroll
+
+    first = run_payroll({"SalaryMonth": NEW_MONTH, "DefaultBaseSalary": 1000})
+    assert (first["inserted"], first["updated"]) == (EMPLOYEES, 0)
+
+    second = run_payroll({"SalaryMonth": NEW_MONTH, "BaseSalaries": {"1": 2500}, "DefaultBaseSalary": 1000})
+    assert (second["inserted"], second["updated"]) == (0, EMPLOYEES)
+    assert _count(vendor, "salaries", "SalaryMonth") == EMPLOYEES
+
+    row = fetch_data_from_db(
+        f"SELECT BaseSalary, Bonus, Deductions, NetSalary FROM salaries WHERE EmployeeID = 1 AND SalaryMonth >= '{NEW_MONTH}-01'",
+        (), vendor,
+    )[0]
+    assert float(row["BaseSalary"]) == 2500
+    assert float(row["NetSalary"]) == pytest.approx(2500 + float(row["Bonus"] or 0) - float(row["Deductions"] or 0))
+
+
+def test_import_attendances_upsert(vendor):
+    from config.db import fetch_data_from_db
+    from services.attendance_service import import_attendances
+
+    records = [
+        {"EmployeeID": 1, "AttendanceMonth": NEW_MONTH, "WorkDays": 20, "AbsentDays": 1, "LeaveDays": 1},
+        {"EmployeeID": 2, "AttendanceMonth": f"{NEW_MONTH}-15", "WorkDays": 18, "AbsentDays": 2, "LeaveDays": 0},
+    ]
+    first = import_attendances(records)
+    assert (first["inserted"], first["updated"], first["failed"]) == (2, 0, 0)
+
+    records[0]["WorkDays"] = 5
+    second = import_attendances(records)
+    assert (second["inserted"], second["updated"], second["failed"]) == (0, 2, 0)
+    assert _count(vendor, "attendance", "AttendanceMonth") == 2
+
+    work_days = fetch_data_from_db(
+        f"SELECT WorkDays FROM attendance WHERE EmployeeID = 1 AND AttendanceMonth >= '{NEW_MONTH}-01'", (), vendor
+    )
+    assert [row["WorkDays"] for row in work_days] == [5]
+
+
+@pytest.mark.parametrize("table, index", [
+    ("salaries", "UX_salaries_employee_period"),
+    ("attendance", "UX_attendance_employee_period"),
+])
+def test_upsert_refuses_without_unique_key(vendor, table, index):
+    from config.db import execute_db
+    from services.attendance_service import import_attendances
+    from services.salarie_service import run_payroll
+
+    if vendor == "sqlserver":
+        pytest.skip("MERGE ... WITH (HOLDLOCK) không dựa vào khoá UNIQUE")
+    execute_db(f"DROP INDEX {index}", (), vendor)
+    with pytest.raises(RuntimeError, match="khoá UNIQUE"):
+        if table == "salaries":
+            run_payroll({"SalaryMonth": NEW_MONTH, "DefaultBaseSalary": 1000})
+        else:
+            import_attendances([{"EmployeeID": 1, "AttendanceMonth": NEW_MONTH, "WorkDays": 20}])
+    assert _count(vendor, table, "SalaryMonth" if table == "salaries" else "AttendanceMonth") == 0